@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the cost per record of window aggregation, and of the records it saves.
+
+@file           bench_aggregation.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import random
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender.aggregation import WindowAggregator  # noqa: E402
+
+
+def run(aggregator, records, rate=10.0):
+    """Adds records sampled at rate Hz, and returns the number of windows.
+    """
+    windows = 0
+    for i, record in enumerate(records):
+        windows += len(aggregator.add(record, i / rate))
+    return windows + len(aggregator.flush())
+
+
+def main(n=60000, repeat=5):
+    records = [{'ts': '2020-01-01T00:00:00', 'd': {'rnd': random.random(), 'n': i}}
+               for i in range(n)]
+    cases = [
+        ("tumbling 60 s", lambda: WindowAggregator(60)),
+        ("sliding 60 s, step 10 s", lambda: WindowAggregator(60, step=10)),
+        ("sliding 600 s, step 1 s", lambda: WindowAggregator(600, step=1)),
+    ]
+    for title, make in cases:
+        best = min(timeit.repeat(lambda: run(make(), records), number=1, repeat=repeat))
+        windows = run(make(), records)
+        print("{:26s} {:8.3f} us/record {:8d} records -> {:6d} windows".format(
+            title, best / n * 1e6, n, windows))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the sender codecs on typical SchemeReader and RandomReader payloads.
+
+@file           bench_codecs.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import timeit
+import logging
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender.readers import RandomReader, SchemeReader  # noqa: E402
+from readersender.serialization import CODECS, get_codec  # noqa: E402
+
+
+def payloads():
+    """Returns (title, scheme, records) of the benchmarked payloads.
+    """
+    random_reader = RandomReader(seed=1, loglevel=logging.WARN)
+    random_reader.connect()
+    scheme = {
+        'ts': lambda: '2020-01-01T00:00:00',
+        'd': {'temperature': lambda: 21.5, 'humidity': lambda: 45.25, 'count': lambda: 7,
+              'status': lambda: 'ok', 'values': lambda: [0.1, 0.2, 0.3]},
+    }
+    scheme_reader = SchemeReader(scheme, loglevel=logging.WARN)
+    scheme_reader.connect()
+    return [
+        ("RandomReader", random_reader.scheme, random_reader.read_many(1000)),
+        ("SchemeReader", scheme_reader.scheme, scheme_reader.read_many(1000)),
+    ]
+
+
+def main(number=20, repeat=5):
+    for title, scheme, records in payloads():
+        print("{} payload, {} records:".format(title, len(records)))
+        for name, codec_class in CODECS.items():
+            if name == 'str' or not codec_class.available():
+                continue
+            codec = get_codec(name, scheme=scheme)
+            encode = codec.encode
+            best = min(timeit.repeat(lambda: [encode(record) for record in records],
+                                     number=number, repeat=repeat))
+            best_batch = min(timeit.repeat(lambda: codec.encode_batch(records),
+                                           number=number, repeat=repeat))
+            size = sum(len(encode(record)) for record in records) / len(records)
+            print("  {:12s} {:8.3f} us/record {:8.3f} us/record batched {:6.1f} bytes"
+                  .format(name, best / number / len(records) * 1e6,
+                          best_batch / number / len(records) * 1e6, size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the cost per record of the deadband filter, and of the records it drops.
+
+@file           bench_deadband.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import random
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender.deadband import Deadband  # noqa: E402
+
+
+def slow_signal(n):
+    """Returns records of a slowly drifting temperature with noise.
+    """
+    records = []
+    temperature = 20.0
+    for i in range(n):
+        temperature += random.gauss(0, 0.01)
+        records.append({'ts': str(i), 'd': {'temperature': round(temperature, 2),
+                                            'unit': 'C', 'status': {'ok': True}}})
+    return records
+
+
+def main(n=100000, repeat=5):
+    records = slow_signal(n)
+    for absolute in [0.0, 0.05, 0.1, 0.5]:
+        def run():
+            deadband = Deadband(absolute=absolute, heartbeat=300)
+            return sum(deadband.check(record) for record in records)
+        best = min(timeit.repeat(run, number=1, repeat=repeat))
+        passed = run()
+        print("deadband {:4.2f} {:8.3f} us/record {:6.2f} % passed".format(
+            absolute, best / n * 1e6, 100.0 * passed / n))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the per-call overhead of the connection guard decorators.
+
+@file           bench_guards.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import timeit
+import asyncio
+import logging
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender import Reader  # noqa: E402
+from readersender.helpers import only_connected  # noqa: E402
+
+
+def old_only_connected(action='pass'):
+    """The only_connected decorator before guarded methods were rebound on connect.
+    """
+    def fail_action():
+        if action == 'pass':
+            return lambda *args, **kwargs: None
+        if action == 'warn':
+            return lambda *args, **kwargs: \
+                args[0].log("Failed assertion: not connected.", logging.WARN)
+        if action == 'raise':
+            return lambda *args, **kwargs: (_ for _ in ()).\
+                throw(RuntimeError("Failed assertion: not connected."))
+        return lambda *args, **kwargs: action(*args, **kwargs)
+    fail_action = fail_action()
+
+    def wrapped_method(method):
+        if asyncio.iscoroutinefunction(method):
+            async def async_wrapper(*args, **kwargs):
+                if not args[0].connected:
+                    fail_action(*args, **kwargs)
+                    return
+                else:
+                    return await method(*args, **kwargs)
+            return async_wrapper
+
+        def wrapper(*args, **kwargs):
+            if not args[0].connected:
+                fail_action(*args, **kwargs)
+                return
+            else:
+                return method(*args, **kwargs)
+        return wrapper
+    return wrapped_method
+
+
+class PlainReader(Reader):
+    def read(self):
+        return 1
+
+
+class OldGuardedReader(Reader):
+    @old_only_connected(action='warn')
+    def read(self):
+        return 1
+
+
+class GuardedReader(Reader):
+    @only_connected(action='warn')
+    def read(self):
+        return 1
+
+
+class CheckedGuardedReader(GuardedReader):
+    """Defines its own 'connected', so the guard checks the state on every call.
+    """
+    @property
+    def connected(self):
+        return self._connected_state
+
+
+def main(number=1000000, repeat=5):
+    for cls in [PlainReader, OldGuardedReader, GuardedReader, CheckedGuardedReader]:
+        reader = cls()
+        reader.connect()
+        best = min(timeit.repeat(reader.read, number=number, repeat=repeat))
+        print("{:22s} {:8.1f} ns/call".format(cls.__name__, best / number * 1e9))
+
+
+if __name__ == '__main__':
+    main()
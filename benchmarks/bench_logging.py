@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the per-call overhead of ReaderSender.log() for disabled messages.
+
+@file           bench_logging.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import json
+import timeit
+import logging
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender import ReaderSender  # noqa: E402
+from readersender.helpers import lazy  # noqa: E402
+from readersender.readers import SchemeReader  # noqa: E402
+
+
+DATA = {'ts': '2020-01-01T00:00:00', 'd': {'rnd': 0.5, 'values': list(range(10))}}
+
+
+def eager_log(rs, msg, loglevel):
+    """The logging that ReaderSender used before deferred formatting.
+    """
+    for logger in rs.loggers:
+        logger.log(loglevel, "{}".format(msg))
+
+
+def main(number=200000, repeat=5):
+    rs = ReaderSender(loglevel=logging.INFO)
+    name = rs.__class__.__name__
+    cases = [
+        ("eager, format + json.dumps", lambda: eager_log(
+            rs, "{} read data: {}".format(name, json.dumps(DATA)), logging.DEBUG)),
+        ("deferred, lazy json.dumps", lambda: rs.log(
+            "{} read data: {}", logging.DEBUG, name, lazy(json.dumps, DATA))),
+        ("guarded with log_enabled()", lambda: rs.log_enabled(logging.DEBUG) and rs.log(
+            "{} read data: {}", logging.DEBUG, name, json.dumps(DATA))),
+    ]
+    for title, func in cases:
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        print("{:30s} {:8.3f} us/call".format(title, best / number * 1e6))
+
+    reader = SchemeReader({'rnd': lambda: 0.5}, loglevel=logging.WARN)
+    reader.connect()
+    best = min(timeit.repeat(reader.read, number=number, repeat=repeat))
+    print("{:30s} {:8.3f} us/call".format("SchemeReader.read()", best / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the per-call overhead of the metrics of readers and senders.
+
+@file           bench_metrics.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import timeit
+import logging
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender import ReaderSender  # noqa: E402
+from readersender.readers import SchemeReader  # noqa: E402
+from readersender.metrics import collect, format_prometheus  # noqa: E402
+
+
+def main(number=200000, repeat=5):
+    for metrics in (False, True):
+        reader = SchemeReader({'rnd': lambda: 0.5}, loglevel=logging.WARN, metrics=metrics)
+        reader.connect()
+        best = min(timeit.repeat(reader.read, number=number, repeat=repeat))
+        print("{:36s} {:8.3f} us/call".format(
+            "SchemeReader.read(), metrics={}".format(metrics), best / number * 1e6))
+
+    for metrics in (False, True):
+        rs = ReaderSender(loglevel=logging.WARN, metrics=metrics)
+        rs.connect()
+        best = min(timeit.repeat(rs.connect, number=number, repeat=repeat))
+        print("{:36s} {:8.3f} us/call".format(
+            "guarded no-op, metrics={}".format(metrics), best / number * 1e6))
+
+    best = min(timeit.repeat(lambda: format_prometheus(collect()), number=100, repeat=repeat))
+    print("{:36s} {:8.3f} us/call".format("format_prometheus(collect())", best / 100 * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the memory and creation time of timestamped samples.
+
+@file           bench_sample.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import timeit
+import datetime
+import tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender.sample import Sample, SampleBatch  # noqa: E402
+
+
+def timestamped_dict(payload):
+    """The way RandomReader timestamps data, with an ISO string per item.
+    """
+    return {'ts': datetime.datetime.utcnow().isoformat(), 'd': payload}
+
+
+def memory_per_item(func, n):
+    tracemalloc.start()
+    items = func(n)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return size / n
+
+
+def main(n=100000, number=100000, repeat=5):
+    payload = 0.5
+    cases = [
+        ("dict with ISO timestamp", lambda n: [timestamped_dict(payload) for _ in range(n)],
+         lambda: timestamped_dict(payload)),
+        ("Sample", lambda n: [Sample(payload, i, 'a') for i in range(n)],
+         lambda: Sample(payload, 0, 'a')),
+        ("SampleBatch", lambda n: SampleBatch.from_payloads([payload] * n, 0, 'a'), None),
+    ]
+    for title, make, create in cases:
+        print("{:26s} {:8.1f} bytes/item".format(title, memory_per_item(make, n)), end='')
+        if create is not None:
+            best = min(timeit.repeat(create, number=number, repeat=repeat))
+            print(" {:8.3f} us/item".format(best / number * 1e6), end='')
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of SchemeReader: compiled scheme vs. a recursive walk of the scheme.
+
+@file           bench_schemereader.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import random
+import timeit
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from readersender.readers import SchemeReader  # noqa: E402
+
+
+SCHEME = {
+    'ts': lambda: 0,
+    'd': {
+        'rnd': random.random,
+        'values': [random.random for _ in range(8)],
+        'nested': {'a': random.random, 'b': (random.random, random.random)},
+    },
+}
+
+
+def process_scheme(scheme):
+    """The recursive walk that SchemeReader used before schemes were compiled.
+    """
+    if (isinstance(scheme, (list, tuple))):
+        cnt = 0
+        data = []
+        for item in scheme:
+            data.append(process_scheme(item))
+            cnt += 1
+        return data
+    elif (isinstance(scheme, dict)):
+        data = {}
+        for k, v in scheme.items():
+            data[k] = process_scheme(v)
+        return data
+    else:
+        try:
+            val = scheme.__call__()
+            return val
+        except TypeError:
+            raise AttributeError("Cannot process scheme for '{}'.".format(str(scheme)))
+
+
+def main(number=100000, repeat=5):
+    plan = SchemeReader.compile_scheme(SCHEME)
+    assert process_scheme(SCHEME).keys() == plan().keys()
+
+    walk = min(timeit.repeat(lambda: process_scheme(SCHEME), number=number, repeat=repeat))
+    compiled = min(timeit.repeat(plan, number=number, repeat=repeat))
+    print("recursive walk: {:8.3f} us/read".format(walk / number * 1e6))
+    print("compiled plan:  {:8.3f} us/read".format(compiled / number * 1e6))
+    print("speedup:        {:8.2f}x".format(walk / compiled))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the startup time of the package and the command line tools.
+
+@file           bench_startup.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import time
+import subprocess
+import statistics
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+CASES = [
+    ("python startup", "pass"),
+    ("import readersender", "import readersender"),
+    ("read_value imports", "import readersender.tools.read_scripts"),
+    ("read_value, random reader",
+     "from readersender.tools.loaders import load_reader_class; "
+     "load_reader_class('random')"),
+    ("entry point scan",
+     "from readersender.tools.loaders import reader_names; reader_names()"),
+    ("all readers and senders",
+     "import readersender; [getattr(readersender.readers, name) "
+     "for name in readersender.readers.__all__]; [getattr(readersender.senders, name) "
+     "for name in readersender.senders.__all__]"),
+]
+
+
+def main(repeat=20):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    for title, code in CASES:
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], env=env, check=True)
+            times.append(time.perf_counter() - started)
+        print("{:30s} {:8.1f} ms (median) {:8.1f} ms (min)".format(
+            title, statistics.median(times) * 1e3, min(times) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
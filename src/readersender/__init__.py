@@ -4,16 +4,38 @@
 from .readersender import ReaderSender
 from .reader import Reader
 from .sender import Sender
-from . import readers
-from . import senders
-from . import tools
-from . import helpers
+from .helpers import lazy_imports
+
+# The rest is imported on first access, so that eg. read_value only imports the
+# reader it uses
+__getattr__, __dir__ = lazy_imports(__name__, {
+    'AsyncReaderSender': '.asyncreadersender:AsyncReaderSender',
+    'AsyncReader': '.asyncreader:AsyncReader',
+    'AsyncSender': '.asyncsender:AsyncSender',
+    'readers': '.readers',
+    'senders': '.senders',
+    'tools': '.tools',
+    'helpers': '.helpers',
+    'bench': '.bench',
+    'connection': '.connection',
+    'framing': '.framing',
+    'metrics': '.metrics',
+    'serialization': '.serialization',
+    'sample': '.sample',
+    'Sample': '.sample:Sample',
+    'SampleBatch': '.sample:SampleBatch',
+})
 
 
 __all__ = [
     'ReaderSender',
     'Reader',
     'Sender',
+    'AsyncReaderSender',
+    'AsyncReader',
+    'AsyncSender',
+    'Sample',
+    'SampleBatch',
     'readers',
     'senders',
     'tools',
@@ -0,0 +1,287 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Incremental window statistics of numeric fields of records.
+
+@file           aggregation.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import math
+import collections
+from .sample import Sample, isoformat
+
+STATISTICS = ['count', 'mean', 'min', 'max', 'first', 'last', 'sum', 'stdev', 'variance']
+DEFAULT_STATISTICS = ['count', 'mean', 'min', 'max', 'last']
+
+
+class RunningStats(object):
+    """Statistics of a stream of values, updated in O(1) per value.
+    The variance is computed with Welford's algorithm, which is numerically stable.
+    @version 1.0
+    """
+    __slots__ = ('count', 'sum', 'mean', 'm2', 'min', 'max', 'first', 'last')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.sum = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.first = None
+        self.last = None
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.count == 1:
+            self.min = self.max = self.first = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.last = value
+
+    @property
+    def variance(self):
+        """Sample variance, or None with less than two values.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def stdev(self):
+        variance = self.variance
+        return math.sqrt(max(variance, 0.0)) if variance is not None else None
+
+    def as_dict(self, statistics=DEFAULT_STATISTICS):
+        return {name: getattr(self, name) for name in statistics}
+
+
+class SlidingStats(RunningStats):
+    """Statistics of the values of the last 'size' seconds, updated in amortized O(1)
+    per value. Expired values are removed from the mean and variance with Welford's
+    update in reverse, and the minimum and maximum are kept in monotonic queues.
+    @version 1.0
+    """
+    __slots__ = ('size', 'values', 'mins', 'maxs')
+
+    def __init__(self, size):
+        self.size = float(size)
+        self.values = collections.deque()
+        self.mins = collections.deque()
+        self.maxs = collections.deque()
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        if hasattr(self, 'values'):
+            self.values.clear()
+            self.mins.clear()
+            self.maxs.clear()
+
+    def add(self, value, t):
+        """Adds a value with its time in seconds. Times must not decrease.
+        """
+        self.values.append((t, value))
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        mins, maxs = self.mins, self.maxs
+        while mins and mins[-1][1] > value:
+            mins.pop()
+        mins.append((t, value))
+        while maxs and maxs[-1][1] < value:
+            maxs.pop()
+        maxs.append((t, value))
+        self.last = value
+        self._update_extremes()
+
+    def expire(self, now):
+        """Removes the values from before the window of 'size' seconds ending at now.
+        """
+        start = now - self.size
+        values = self.values
+        while values and values[0][0] < start:
+            _, value = values.popleft()
+            self.count -= 1
+            if self.count == 0:
+                self.reset()
+                return
+            self.sum -= value
+            delta = value - self.mean
+            self.mean -= delta / self.count
+            self.m2 -= delta * (value - self.mean)
+        while self.mins and self.mins[0][0] < start:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] < start:
+            self.maxs.popleft()
+        self._update_extremes()
+
+    def _update_extremes(self):
+        self.min = self.mins[0][1] if self.mins else None
+        self.max = self.maxs[0][1] if self.maxs else None
+        self.first = self.values[0][1] if self.values else None
+
+
+def numeric_fields(record, path=()):
+    """Yields (path, value) of the numeric leaves of nested dictionaries, where path is a
+    tuple of keys. Booleans are not numeric.
+    """
+    if isinstance(record, dict):
+        for key, value in record.items():
+            yield from numeric_fields(value, path + (key,))
+    elif isinstance(record, (int, float)) and not isinstance(record, bool):
+        yield path, record
+
+
+def _nest(items):
+    """Returns nested dictionaries from (path, value) pairs.
+    """
+    result = {}
+    for path, value in items:
+        d = result
+        for key in path[:-1]:
+            d = d.setdefault(key, {})
+        d[path[-1]] = value
+    return result
+
+
+class WindowAggregator(object):
+    """Aggregates the numeric fields of records over time windows.
+    Windows are aligned to multiples of 'step' seconds since the epoch. With the default
+    step, windows are tumbling, ie. back to back. With a step shorter than 'size', they
+    are sliding, and a window of the last 'size' seconds is emitted every step. A window
+    is emitted when the first record after its end is added, or by flush().
+    An emitted record has the shape of the input records, with every numeric field
+    replaced by a dictionary of its statistics, and key 'window' with the 'start', 'end'
+    and 'count' of the window. Non-numeric fields are left out. The statistics of records
+    that are plain numbers are in key 'value'.
+    @version 1.0
+    """
+    def __init__(self, size, step=None, fields=None, statistics=None):
+        """Initializes a new WindowAggregator.
+        @param size : float - Window size in seconds
+        @param step : float - Seconds between windows (default: size)
+        @param fields : list - Fields to aggregate as dotted paths, eg. 'd.rnd'
+            (default: all numeric fields)
+        @param statistics : list - Names in STATISTICS (default: DEFAULT_STATISTICS)
+        """
+        self._size = float(size)
+        self._step = float(step) if step is not None else self._size
+        if self._size <= 0 or self._step <= 0:
+            raise ValueError("Window size and step must be positive.")
+        if self._step > self._size:
+            raise ValueError("Window step cannot be longer than its size.")
+        self._sliding = self._step < self._size
+        self._fields = None if fields is None else \
+            {tuple(field.split('.')) if isinstance(field, str) else tuple(field)
+             for field in fields}
+        self._statistics = list(statistics or DEFAULT_STATISTICS)
+        for name in self._statistics:
+            if name not in STATISTICS:
+                raise AttributeError("Statistic unknown '{}'.".format(name))
+        self._stats = collections.OrderedDict()     # path -> RunningStats/SlidingStats
+        self._times = collections.deque()           # Record times of a sliding window
+        self._count = 0
+        self._end = None
+        self.received = 0
+        self.emitted = 0
+
+    @property
+    def sliding(self):
+        return self._sliding
+
+    def add(self, record, t):
+        """Adds a record with its time in seconds since the epoch.
+        A Sample is added with its payload and capture time, if t is None.
+        @returns list -- Records of the windows that ended before t
+        """
+        if isinstance(record, Sample):
+            if t is None:
+                t = record.time_ns / 1e9
+            record = record.payload
+        emitted = []
+        if self._end is None:
+            self._end = (math.floor(t / self._step) + 1) * self._step
+        elif t >= self._end:
+            while t >= self._end:
+                window = self._emit(self._end)
+                if window is not None:
+                    emitted.append(window)
+                self._end += self._step
+                if not self._count:
+                    # Skip the empty windows of a gap
+                    self._end = (math.floor(t / self._step) + 1) * self._step
+                    break
+        self.received += 1
+        self._count += 1
+        if self._sliding:
+            self._times.append(t)
+        for path, value in numeric_fields(record):
+            if self._fields is not None and path not in self._fields:
+                continue
+            stats = self._stats.get(path)
+            if stats is None:
+                stats = self._stats[path] = SlidingStats(self._size) if self._sliding \
+                    else RunningStats()
+            if self._sliding:
+                stats.add(value, t)
+            else:
+                stats.add(value)
+        return emitted
+
+    def flush(self):
+        """Emits the current window, eg. on shutdown.
+        @returns list -- Record of the window, if it has data
+        """
+        if self._end is None:
+            return []
+        window = self._emit(self._end)
+        self._end = None
+        for stats in self._stats.values():
+            stats.reset()
+        self._times.clear()
+        self._count = 0
+        return [window] if window is not None else []
+
+    def _emit(self, end):
+        """Returns the record of the window ending at end, or None if it is empty, and
+        starts the next window.
+        """
+        start = end - self._size
+        if self._sliding:
+            times = self._times
+            while times and times[0] < start:
+                times.popleft()
+            self._count = len(times)
+            for stats in self._stats.values():
+                stats.expire(end)
+        if not self._count:
+            return None
+        items = [(path, stats.as_dict(self._statistics))
+                 for path, stats in self._stats.items() if stats.count]
+        if items and not items[0][0]:
+            # Records are plain numbers
+            record = {'value': items[0][1]}
+        else:
+            record = _nest(items)
+        record['window'] = {
+            'start': isoformat(int(start * 1e9)),
+            'end': isoformat(int(end * 1e9)),
+            'count': self._count,
+        }
+        if not self._sliding:
+            for stats in self._stats.values():
+                stats.reset()
+            self._count = 0
+        self.emitted += 1
+        return record
@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Asyncio reader classes.
+
+@file           asyncreader.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+from .asyncreadersender import AsyncReaderSender, ThreadOffloader
+from .helpers import only_connected
+
+
+class AsyncReader(AsyncReaderSender):
+    """An abstract asyncio reader class.
+    Defines coroutines to be implemented in subclasses.
+    @version 1.0
+    """
+    @only_connected(action='warn')
+    async def read(self):
+        """Reads data from the reader.
+        Subclasses should implement their own coroutines with optional arguments.
+        @returns Read data
+        """
+        return NotImplemented
+
+
+class ThreadedAsyncReader(AsyncReader):
+    """Adapts a synchronous Reader (eg. SerialReader) to the AsyncReader interface.
+    Blocking calls are offloaded to a thread, so they do not stall the event loop.
+    @version 1.0
+    """
+    def __init__(self, reader, executor=None, **kwargs):
+        """Initializes a new ThreadedAsyncReader.
+        @param reader - Synchronous Reader instance to wrap
+        @param executor - concurrent.futures.Executor to use (default: event loop default)
+        """
+        kwargs.setdefault('logger', reader.logger)
+        kwargs.setdefault('loglevel', reader.logger.level)
+        super().__init__(**kwargs)
+        self._reader = reader
+        self._offloader = ThreadOffloader(executor)
+
+    @property
+    def reader(self):
+        """Returns the wrapped synchronous reader.
+        """
+        return self._reader
+
+    @property
+    def connected(self):
+        return self._reader.connected
+
+    async def connect(self):
+        await self._offloader.run(self._reader.connect)
+
+    async def disconnect(self):
+        await self._offloader.run(self._reader.disconnect)
+
+    async def read(self, **kwargs):
+        return await self._offloader.run(self._reader.read, **kwargs)
+
+
+def as_async_reader(reader, executor=None):
+    """Returns an AsyncReader for reader, wrapping synchronous readers if needed.
+    """
+    if isinstance(reader, AsyncReader):
+        return reader
+    return ThreadedAsyncReader(reader, executor=executor)
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+AsyncReaderSender abstract base class for asyncio readers and senders.
+
+@file           asyncreadersender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import asyncio
+from . import ReaderSender
+from .helpers import only_connected, only_disconnected
+
+
+class AsyncReaderSender(ReaderSender):
+    """An abstract asyncio ReaderSender class.
+    Same as ReaderSender, but connect and disconnect are coroutines and the object
+    is used as an asynchronous context manager.
+    @version  1.0
+    """
+    @only_disconnected(action='pass')
+    async def connect(self):
+        """Connects a reader/sender to source/target.
+        Usually called after init.
+        """
+        self._connected = True
+
+    @only_connected(action='pass')
+    async def disconnect(self):
+        """Disconnects from the server.
+        """
+        self._connected = False
+
+    # Context Manager implementation
+    def __enter__(self):
+        raise TypeError("{} must be used with 'async with'.".format(self.__class__.__name__))
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+    async def __aenter__(self):
+        """Initializes the context by opening the connection.
+
+        Notes
+        -----
+        Usage example:
+            async with AsyncReaderSender() as rs:
+                if rs.connected:
+                    print("Connected.")
+        """
+        await self.connect()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        """Takes care of closing connections automatically. Exceptions raised in the
+        context are propagated.
+        """
+        if self.connected:
+            await self.disconnect()
+        return False
+
+
+class ThreadOffloader(object):
+    """Runs blocking calls of a synchronous reader/sender in an executor.
+    Calls to the same wrapped object are serialized, since most devices
+    (eg. serial ports) do not tolerate concurrent access.
+    @version  1.0
+    """
+    def __init__(self, executor=None):
+        """Initializes a new ThreadOffloader.
+        @param executor - concurrent.futures.Executor to use (default: event loop default)
+        """
+        self._executor = executor
+        self._lock = None
+
+    async def run(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) in the executor and returns its result.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
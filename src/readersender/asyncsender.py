@@ -0,0 +1,70 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Asyncio sender classes.
+
+@file           asyncsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+from .asyncreadersender import AsyncReaderSender, ThreadOffloader
+from .helpers import only_connected
+
+
+class AsyncSender(AsyncReaderSender):
+    """An abstract asyncio class that takes care of data processing and sending.
+    @version 1.0
+    """
+    @only_connected(action='warn')
+    async def send(self, data):
+        """Send data.
+        @param[in]    data    - Data to send
+        @remarks      Implement this in subclass.
+                      Raise RuntimeError if send failed.
+                      No return value
+        """
+        pass
+
+
+class ThreadedAsyncSender(AsyncSender):
+    """Adapts a synchronous Sender (eg. MqttSender) to the AsyncSender interface.
+    Blocking calls are offloaded to a thread, so they do not stall the event loop.
+    @version 1.0
+    """
+    def __init__(self, sender, executor=None, **kwargs):
+        """Initializes a new ThreadedAsyncSender.
+        @param sender - Synchronous Sender instance to wrap
+        @param executor - concurrent.futures.Executor to use (default: event loop default)
+        """
+        kwargs.setdefault('logger', sender.logger)
+        kwargs.setdefault('loglevel', sender.logger.level)
+        super().__init__(**kwargs)
+        self._sender = sender
+        self._offloader = ThreadOffloader(executor)
+
+    @property
+    def sender(self):
+        """Returns the wrapped synchronous sender.
+        """
+        return self._sender
+
+    @property
+    def connected(self):
+        return self._sender.connected
+
+    async def connect(self):
+        await self._offloader.run(self._sender.connect)
+
+    async def disconnect(self):
+        await self._offloader.run(self._sender.disconnect)
+
+    async def send(self, data, **kwargs):
+        return await self._offloader.run(self._sender.send, data, **kwargs)
+
+
+def as_async_sender(sender, executor=None):
+    """Returns an AsyncSender for sender, wrapping synchronous senders if needed.
+    """
+    if isinstance(sender, AsyncSender):
+        return sender
+    return ThreadedAsyncSender(sender, executor=executor)
@@ -0,0 +1,349 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of readers, senders and reader-sender pipelines.
+
+@file           bench.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import json
+import time
+import math
+import argparse
+import platform
+import datetime
+import threading
+import contextlib
+import logging
+try:
+    import pty
+    import tty
+except ModuleNotFoundError:
+    pty = None
+from .readers import SchemeReader, RandomReader, SerialReader
+from .senders import FooSender
+
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+def percentile(values, p):
+    """Returns the p:th percentile of sorted values with the nearest-rank method.
+    """
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100.0 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def summarize(latencies, elapsed, items=None):
+    """Returns the statistics of a benchmark run.
+    @param latencies : list - Latencies of the calls in nanoseconds
+    @param elapsed : float - Wall time of the run in seconds
+    @param items : int - Number of items processed (default: number of calls)
+    @returns dict -- Latencies in microseconds and throughput in items per second
+    """
+    latencies = sorted(latencies)
+    count = len(latencies)
+    items = count if items is None else items
+    result = {
+        'calls': count,
+        'items': items,
+        'elapsed': elapsed,
+        'throughput': items / elapsed if elapsed > 0 else None,
+    }
+    if not count:
+        return result
+    mean = sum(latencies) / count
+    variance = sum((x - mean) ** 2 for x in latencies) / count
+    result['latency_us'] = {
+        'min': latencies[0] / 1e3,
+        'mean': mean / 1e3,
+        'stdev': math.sqrt(variance) / 1e3,
+        'max': latencies[-1] / 1e3,
+    }
+    for p in PERCENTILES:
+        result['latency_us']['p{:g}'.format(p)] = percentile(latencies, p) / 1e3
+    return result
+
+
+def measure(func, number, warmup=0, items_per_call=1):
+    """Calls func number times after warmup calls and summarizes the latencies.
+    """
+    for _ in range(warmup):
+        func()
+    clock = time.perf_counter_ns
+    latencies = [0] * number
+    started = time.perf_counter()
+    for i in range(number):
+        t0 = clock()
+        func()
+        latencies[i] = clock() - t0
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, items=number * items_per_call)
+
+
+def _logger():
+    return logging.getLogger('readersender.bench')
+
+
+@contextlib.contextmanager
+def _discard_stdout():
+    """Redirects sys.stdout to os.devnull, eg. for FooSender.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+@contextlib.contextmanager
+def _connected(*readersenders):
+    for rs in readersenders:
+        rs.connect()
+    try:
+        yield readersenders
+    finally:
+        for rs in readersenders:
+            rs.disconnect()
+
+
+BENCHMARK_SCHEME = {
+    'ts': lambda: '2020-01-01T00:00:00',
+    'd': {'temperature': lambda: 21.5, 'humidity': lambda: 45.25, 'count': lambda: 7},
+}
+
+
+def bench_schemereader(number, warmup, batch_size):
+    reader = SchemeReader(BENCHMARK_SCHEME, logger=_logger(), loglevel=logging.WARN)
+    with _connected(reader):
+        return {
+            'read': measure(reader.read, number, warmup),
+            'read_many': measure(lambda: reader.read_many(batch_size),
+                                 max(1, number // batch_size), warmup,
+                                 items_per_call=batch_size),
+        }
+
+
+def bench_randomreader(number, warmup, batch_size):
+    reader = RandomReader(seed=0, logger=_logger(), loglevel=logging.WARN)
+    with _connected(reader):
+        return {
+            'read': measure(reader.read, number, warmup),
+            'read_many': measure(lambda: reader.read_many(batch_size),
+                                 max(1, number // batch_size), warmup,
+                                 items_per_call=batch_size),
+        }
+
+
+def bench_foosender(number, warmup, batch_size):
+    sender = FooSender(logger=_logger(), loglevel=logging.WARN)
+    data = {'ts': '2020-01-01T00:00:00', 'd': {'temperature': 21.5}}
+    batch = [data] * batch_size
+    with _discard_stdout(), _connected(sender):
+        return {
+            'send': measure(lambda: sender.send(data), number, warmup),
+            'send_batch': measure(lambda: sender.send_batch(batch),
+                                  max(1, number // batch_size), warmup,
+                                  items_per_call=batch_size),
+        }
+
+
+class _PtyDevice(object):
+    """A fake serial device on a pseudo terminal that answers every request line.
+    """
+    def __init__(self, response=b"21.5\n"):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self._response = response
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        buffer = b""
+        while True:
+            try:
+                chunk = os.read(self.master, 1024)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buffer += chunk
+            requests = buffer.count(b"\n")
+            buffer = buffer[buffer.rfind(b"\n") + 1:]
+            if requests:
+                os.write(self.master, self._response * requests)
+
+    def close(self):
+        os.close(self.slave)
+        os.close(self.master)
+        self._thread.join(1.0)
+
+
+def bench_serialreader(number, warmup, batch_size):
+    if SerialReader is None:
+        return {'skipped': "pyserial is not installed"}
+    if pty is None:
+        return {'skipped': "pty is not available on this platform"}
+    device = _PtyDevice()
+    try:
+        reader = SerialReader(device.port, read_command="?\n", timeout=1.0,
+                              logger=_logger(), loglevel=logging.WARN)
+        with _connected(reader):
+            return {'read': measure(reader.read, number, warmup)}
+    finally:
+        device.close()
+
+
+def bench_pipeline(number, warmup, batch_size):
+    """Measures the end-to-end latency of reading and sending a data item.
+    """
+    reader = RandomReader(seed=0, logger=_logger(), loglevel=logging.WARN)
+    sender = FooSender(logger=_logger(), loglevel=logging.WARN)
+    json_sender = FooSender(codec='json', logger=_logger(), loglevel=logging.WARN)
+    with _discard_stdout(), _connected(reader, sender, json_sender):
+        return {
+            'read_send': measure(lambda: sender.send(reader.read()), number, warmup),
+            'read_send_json': measure(lambda: json_sender.send(reader.read()),
+                                      number, warmup),
+            'read_send_batch': measure(
+                lambda: json_sender.send_batch(reader.read_many(batch_size)),
+                max(1, number // batch_size), warmup, items_per_call=batch_size),
+        }
+
+
+BENCHMARKS = {
+    'schemereader': bench_schemereader,
+    'randomreader': bench_randomreader,
+    'foosender': bench_foosender,
+    'serialreader': bench_serialreader,
+    'pipeline': bench_pipeline,
+}
+
+
+def run_benchmarks(names=None, number=10000, warmup=100, batch_size=100):
+    """Runs benchmarks and returns the results with information about the environment.
+    @param names : list - Names in BENCHMARKS (default: all)
+    @returns dict -- JSON-serializable results
+    """
+    names = list(BENCHMARKS) if not names else names
+    for name in names:
+        if name not in BENCHMARKS:
+            raise AttributeError("Benchmark unknown '{}'.".format(name))
+    results = {}
+    for name in names:
+        try:
+            results[name] = BENCHMARKS[name](number, warmup, batch_size)
+        except Exception as e:
+            results[name] = {'error': "{}: {}".format(e.__class__.__name__, e)}
+    return {
+        'meta': {
+            'time': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'number': number,
+            'warmup': warmup,
+            'batch_size': batch_size,
+        },
+        'results': results,
+    }
+
+
+def _cases(report):
+    """Yields (name, case, result) of every measured case of a report.
+    """
+    for name, cases in report['results'].items():
+        for case, result in cases.items():
+            if isinstance(result, dict):
+                yield name, case, result
+
+
+def compare(report, baseline, threshold=0.1, metric='p50'):
+    """Compares a report with a baseline report.
+    @param threshold : float - Relative slowdown that counts as a regression
+    @param metric : str - Latency metric to compare, eg. 'p50' or 'mean'
+    @returns list -- (name, case, baseline value, value, change) of the regressions
+    """
+    old = {(name, case): result for name, case, result in _cases(baseline)}
+    regressions = []
+    for name, case, result in _cases(report):
+        base = old.get((name, case))
+        if base is None or 'latency_us' not in base or 'latency_us' not in result:
+            continue
+        before = base['latency_us'][metric]
+        after = result['latency_us'][metric]
+        if before > 0 and (after - before) / before > threshold:
+            regressions.append((name, case, before, after, (after - before) / before))
+    return regressions
+
+
+def format_report(report):
+    """Returns the results as a human-readable table.
+    """
+    lines = ["{:28s} {:>10s} {:>10s} {:>10s} {:>10s} {:>14s}".format(
+        "benchmark", "p50 us", "p99 us", "p99.9 us", "max us", "items/s")]
+    for name, cases in report['results'].items():
+        for case in ('skipped', 'error'):
+            if case in cases:
+                lines.append("{:28s} {}: {}".format(name, case, cases[case]))
+        for name_case, result in ((name + "." + c, r) for c, r in cases.items()
+                                  if isinstance(r, dict)):
+            lat = result.get('latency_us', {})
+            lines.append("{:28s} {:10.2f} {:10.2f} {:10.2f} {:10.2f} {:14.0f}".format(
+                name_case, lat.get('p50', 0.0), lat.get('p99', 0.0), lat.get('p99.9', 0.0),
+                lat.get('max', 0.0), result['throughput'] or 0.0))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Command line interface of the benchmarks.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measures the latency and throughput of readers and senders")
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                        help="benchmarks to run: {} (default: all)".format(
+                            ", ".join(BENCHMARKS)))
+    parser.add_argument('--number', help="number of calls per case (default: 10000)",
+                        type=int, default=10000)
+    parser.add_argument('--warmup', help="number of calls before measuring (default: 100)",
+                        type=int, default=100)
+    parser.add_argument('--batch_size', help="items per batch call (default: 100)",
+                        type=int, default=100)
+    parser.add_argument('--json', help="print the results as JSON (default: table)",
+                        action='store_true')
+    parser.add_argument('--output', help="also write the JSON results to this file")
+    parser.add_argument('--compare',
+                        help="compare with the JSON results in this file, and exit with " +
+                        "status 1 on regressions")
+    parser.add_argument('--threshold',
+                        help="relative slowdown that is a regression (default: 0.1)",
+                        type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark '{}'".format(name))
+    report = run_benchmarks(args.benchmarks, number=args.number, warmup=args.warmup,
+                            batch_size=args.batch_size)
+    if args.output:
+        with open(args.output, 'w') as fd:
+            json.dump(report, fd, indent=2)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd)
+        regressions = compare(report, baseline, threshold=args.threshold)
+        for name, case, before, after, change in regressions:
+            print("Regression in {}.{}: {:.2f} us -> {:.2f} us ({:+.0%})".format(
+                name, case, before, after, change), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
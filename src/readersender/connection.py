@@ -0,0 +1,247 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Connection lifecycle management for readers and senders.
+
+@file           connection.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import logging
+import threading
+import contextlib
+
+
+class ConnectionManager(object):
+    """Keeps a reader or sender connected between uses.
+    The connection is opened lazily by acquire() or use(), and kept open until it has
+    been idle for 'idle_timeout' seconds. An idle_timeout of 0 disconnects after every
+    use, and None never disconnects an idle connection. While the connection is idle,
+    'health_check' is run every 'keepalive_interval' seconds, and a failing connection
+    is closed to be reopened on the next use. The default health check is the ping() of
+    the reader or sender; if it cannot check the connection, the keepalive is disabled.
+    Failed connection attempts are retried with an exponential backoff: during the
+    backoff, acquire() fails immediately.
+    @version 1.0
+    """
+    def __init__(self, readersender, idle_timeout=None, keepalive_interval=None,
+                 health_check=None, backoff=1.0, backoff_factor=2.0, max_backoff=60.0,
+                 disconnect_on_error=False, clock=time.monotonic):
+        """Initializes a new ConnectionManager.
+        @param readersender - Reader or sender to manage
+        @param idle_timeout : float - Seconds of inactivity before disconnecting
+        @param keepalive_interval : float - Seconds between health checks of an idle
+            connection, or None for no checks
+        @param health_check : function - Receives the readersender and returns False if
+            the connection is broken, or None if it cannot be checked (default: calls
+            ping() of the readersender)
+        @param backoff : float - Delay after the first failed connection attempt in seconds
+        @param backoff_factor : float - Multiplier applied to the delay after each failure
+        @param max_backoff : float - Upper limit for the delay
+        @param disconnect_on_error : bool - If True, an exception during use() closes
+            the connection
+        @param clock : function - Monotonic clock in seconds
+        """
+        self._rs = readersender
+        self._idle_timeout = float(idle_timeout) if idle_timeout is not None else None
+        self._keepalive_interval = float(keepalive_interval) \
+            if keepalive_interval is not None else None
+        self._health_check = health_check if health_check is not None \
+            else (lambda rs: rs.ping())
+        self._backoff = float(backoff)
+        self._backoff_factor = float(backoff_factor)
+        self._max_backoff = float(max_backoff)
+        self._disconnect_on_error = disconnect_on_error
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._monitor = None
+        self._closed = False
+        self._in_use = 0
+        self._last_used = None
+        self._last_check = None
+        self._failures = 0
+        self._retry_at = None
+        self.connects = 0
+        self.connect_failures = 0
+        self.disconnects = 0
+        self.idle_disconnects = 0
+        self.health_check_failures = 0
+        self.connect_time_total = 0.0
+        self.connect_time_max = 0.0
+        self.connect_time_last = None
+
+    @property
+    def readersender(self):
+        """Returns the managed reader or sender.
+        """
+        return self._rs
+
+    @property
+    def connected(self):
+        return self._rs.connected
+
+    def acquire(self):
+        """Connects if needed and marks the connection as being used.
+        Every acquire() must be followed by a release().
+        @returns The managed reader or sender
+        @raises RuntimeError if a reconnection is not allowed yet, or the exception of
+            a failed connection attempt.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection manager is closed.")
+            if not self._rs.connected:
+                self._connect()
+            self._in_use += 1
+            self._last_used = self._clock()
+            return self._rs
+
+    def release(self, failed=False):
+        """Marks the end of a use of the connection.
+        @param failed : bool - If True and disconnect_on_error is set, disconnects
+        """
+        with self._lock:
+            self._in_use -= 1
+            self._last_used = self._clock()
+            if self._in_use <= 0 and self._rs.connected and \
+                    ((failed and self._disconnect_on_error) or self._idle_timeout == 0):
+                self._disconnect()
+            self._wakeup.notify_all()
+
+    @contextlib.contextmanager
+    def use(self):
+        """Returns a context manager that acquires and releases the connection.
+        Usage example:
+            with manager.use() as reader:
+                data = reader.read()
+        """
+        rs = self.acquire()
+        failed = False
+        try:
+            yield rs
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.release(failed=failed)
+
+    def call(self, method, *args, **kwargs):
+        """Calls a method of the managed reader or sender in use().
+        @param method : str - Name of the method, eg. 'read'
+        """
+        with self.use() as rs:
+            return getattr(rs, method)(*args, **kwargs)
+
+    def _connect(self):
+        now = self._clock()
+        if self._retry_at is not None and now < self._retry_at:
+            raise RuntimeError("Reconnecting {} in {:.1f} s.".format(
+                self._rs.__class__.__name__, self._retry_at - now))
+        try:
+            self._rs.connect()
+        except Exception:
+            self.connect_failures += 1
+            delay = min(self._backoff * self._backoff_factor ** self._failures,
+                        self._max_backoff)
+            self._failures += 1
+            self._retry_at = self._clock() + delay
+            self._rs.log("Connection failed, retrying in {:.1f} s.", logging.WARN, delay)
+            raise
+        elapsed = self._clock() - now
+        self._failures = 0
+        self._retry_at = None
+        self.connects += 1
+        self.connect_time_total += elapsed
+        self.connect_time_max = max(self.connect_time_max, elapsed)
+        self.connect_time_last = elapsed
+        self._last_check = self._clock()
+        if self._monitor is None and (self._keepalive_interval is not None or
+                                      self._idle_timeout):
+            self._monitor = threading.Thread(
+                target=self._run, daemon=True,
+                name="{}-{}".format(self.__class__.__name__, id(self)))
+            self._monitor.start()
+
+    def _disconnect(self):
+        try:
+            self._rs.disconnect()
+        except Exception as e:
+            self._rs.log("Disconnect failed. Message: '{}'.", logging.ERROR, e)
+        self.disconnects += 1
+
+    def _next_deadline(self):
+        """Returns the time of the next idle timeout or health check, or None.
+        """
+        if self._in_use > 0 or not self._rs.connected:
+            return None
+        deadlines = []
+        if self._idle_timeout and self._last_used is not None:
+            deadlines.append(self._last_used + self._idle_timeout)
+        if self._keepalive_interval is not None and self._last_check is not None:
+            deadlines.append(self._last_check + self._keepalive_interval)
+        return min(deadlines) if deadlines else None
+
+    def _run(self):
+        """Disconnects idle connections and runs the health checks.
+        """
+        with self._lock:
+            while not self._closed:
+                deadline = self._next_deadline()
+                timeout = None if deadline is None else max(0.0, deadline - self._clock())
+                # Wake up now and then, as the state of the connection may change silently
+                self._wakeup.wait(1.0 if timeout is None else min(timeout, 1.0))
+                if self._closed or self._in_use > 0 or not self._rs.connected:
+                    continue
+                now = self._clock()
+                if self._idle_timeout and self._last_used is not None and \
+                        now - self._last_used >= self._idle_timeout:
+                    self._rs.log("Disconnecting idle {}.", logging.DEBUG,
+                                 self._rs.__class__.__name__)
+                    self.idle_disconnects += 1
+                    self._disconnect()
+                elif self._keepalive_interval is not None and \
+                        now - self._last_check >= self._keepalive_interval:
+                    self._last_check = now
+                    try:
+                        healthy = self._health_check(self._rs)
+                    except Exception:
+                        healthy = False
+                    if healthy is None:
+                        self._rs.log("{} cannot be health checked, keepalive disabled.",
+                                     logging.DEBUG, self._rs.__class__.__name__)
+                        self._keepalive_interval = None
+                    elif not healthy:
+                        self._rs.log("Health check of {} failed.", logging.WARN,
+                                     self._rs.__class__.__name__)
+                        self.health_check_failures += 1
+                        self._disconnect()
+
+    def close(self):
+        """Stops the monitor thread and disconnects.
+        """
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+            monitor, self._monitor = self._monitor, None
+        if monitor is not None:
+            monitor.join()
+        with self._lock:
+            if self._rs.connected:
+                self._disconnect()
+
+    def stats(self):
+        """Returns the connection metrics as a dictionary.
+        """
+        return {
+            'connected': bool(self._rs.connected),
+            'connects': self.connects,
+            'connect_failures': self.connect_failures,
+            'disconnects': self.disconnects,
+            'idle_disconnects': self.idle_disconnects,
+            'health_check_failures': self.health_check_failures,
+            'connect_time_total': self.connect_time_total,
+            'connect_time_max': self.connect_time_max,
+            'connect_time_last': self.connect_time_last,
+        }
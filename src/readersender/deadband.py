@@ -0,0 +1,162 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Deadband filter that passes only records that have changed, ie. report by exception.
+
+@file           deadband.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import math
+import time
+from .sample import Sample
+
+# Fields that change with every record and are not compared by default
+DEFAULT_IGNORE = ('ts', 'window')
+
+
+def leaves(record, path=()):
+    """Yields (path, value) of the leaves of nested dictionaries, where path is a tuple of
+    keys.
+    """
+    if isinstance(record, dict):
+        for key, value in record.items():
+            yield from leaves(value, path + (key,))
+    else:
+        yield path, record
+
+
+def _path(field):
+    return tuple(field.split('.')) if isinstance(field, str) else tuple(field)
+
+
+def _isnumber(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Deadband(object):
+    """Decides whether a record has changed enough since the last passed record.
+    Records are compared field by field, in nested dictionaries too. A numeric field has
+    changed when it differs from its last passed value by more than the larger of the
+    'absolute' deadband and the 'relative' deadband times the last value, or when it
+    becomes or stops being NaN. Other fields have changed when they are not equal, and a
+    record has changed when its set of fields changes. A record is also passed when
+    'heartbeat' seconds have passed since the last passed record, so that consumers know
+    the source is alive.
+    Records are tracked per source: Samples by their source, and others by argument
+    'source'.
+    @version 1.0
+    """
+    def __init__(self, absolute=0.0, relative=0.0, fields=None, ignore=DEFAULT_IGNORE,
+                 heartbeat=None, clock=time.monotonic):
+        """Initializes a new Deadband.
+        @param absolute : float - Default absolute deadband of numeric fields
+        @param relative : float - Default relative deadband of numeric fields,
+            eg. 0.01 for 1 %
+        @param fields : dict - Deadbands of fields by dotted path, eg. 'd.temperature',
+            as an absolute deadband or a dictionary with 'absolute' and 'relative'
+        @param ignore : list - Fields that are not compared as dotted paths
+        @param heartbeat : float - Maximum time between passed records in seconds
+            (default: no heartbeat)
+        @param clock : function - Monotonic clock in seconds
+        """
+        self._default = self._band(absolute, relative)
+        self._bands = {}
+        for field, band in (fields or {}).items():
+            if isinstance(band, dict):
+                unknown = set(band) - {'absolute', 'relative'}
+                if unknown:
+                    raise AttributeError("Deadband unknown '{}'.".format(unknown.pop()))
+                band = self._band(band.get('absolute', 0.0), band.get('relative', 0.0))
+            else:
+                band = self._band(band, 0.0)
+            self._bands[_path(field)] = band
+        self._ignore = {_path(field) for field in ignore or ()}
+        self._heartbeat = float(heartbeat) if heartbeat is not None else None
+        if self._heartbeat is not None and self._heartbeat <= 0:
+            raise ValueError("Heartbeat must be positive, got '{}'.".format(heartbeat))
+        self._clock = clock
+        self._last = {}     # source -> (time, {path: value})
+        self.passed = 0
+        self.suppressed = 0
+        self.heartbeats = 0
+
+    @staticmethod
+    def _band(absolute, relative):
+        absolute, relative = float(absolute or 0.0), float(relative or 0.0)
+        if absolute < 0 or relative < 0:
+            raise ValueError("Deadbands cannot be negative.")
+        return absolute, relative
+
+    def _fields(self, record):
+        return {path: value for path, value in leaves(record)
+                if path not in self._ignore}
+
+    def changed(self, record, source=None):
+        """Returns True if record has changed since the last passed record of source.
+        """
+        if isinstance(record, Sample):
+            source, record = record.source, record.payload
+        last = self._last.get(source)
+        if last is None:
+            return True
+        return self._changed(self._fields(record), last[1])
+
+    def _changed(self, values, last_values):
+        if len(values) != len(last_values):
+            return True
+        for path, value in values.items():
+            if path not in last_values:
+                return True
+            last = last_values[path]
+            if _isnumber(value) and _isnumber(last):
+                value_nan, last_nan = math.isnan(value), math.isnan(last)
+                if value_nan or last_nan:
+                    # NaN, eg. a sensor fault, changes only when it appears or goes away
+                    if value_nan != last_nan:
+                        return True
+                    continue
+                absolute, relative = self._bands.get(path, self._default)
+                if abs(value - last) > max(absolute, relative * abs(last)):
+                    return True
+            elif value != last:
+                return True
+        return False
+
+    def check(self, record, source=None):
+        """Returns True if record should be passed, ie. it has changed or the heartbeat is
+        due, and remembers it as the last passed record of source.
+        """
+        if isinstance(record, Sample):
+            source, record = record.source, record.payload
+        now = self._clock()
+        values = self._fields(record)
+        last = self._last.get(source)
+        if last is not None and not self._changed(values, last[1]):
+            if self._heartbeat is None or now - last[0] < self._heartbeat:
+                self.suppressed += 1
+                return False
+            self.heartbeats += 1
+        self._last[source] = (now, values)
+        self.passed += 1
+        return True
+
+    def save(self):
+        """Returns the last passed records, for restore().
+        """
+        return dict(self._last)
+
+    def restore(self, saved):
+        """Restores the last passed records from save(), eg. when passing the checked
+        records on failed, so that they are passed again.
+        """
+        self._last = dict(saved)
+
+    def reset(self):
+        """Forgets the last passed records, so the next record of every source is passed.
+        """
+        self._last.clear()
+
+    def stats(self):
+        return {'passed': self.passed, 'suppressed': self.suppressed,
+                'heartbeats': self.heartbeats}
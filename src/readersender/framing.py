@@ -0,0 +1,322 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Framers that split a byte stream into frames without intermediate copies.
+
+@file           framing.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import zlib
+import struct
+
+
+def sum8(data):
+    """8-bit sum of all bytes.
+    """
+    return sum(data) & 0xFF
+
+
+def xor8(data):
+    """8-bit XOR of all bytes.
+    """
+    value = 0
+    for byte in data:
+        value ^= byte
+    return value
+
+
+def _crc16_table(poly):
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC16_MODBUS_TABLE = _crc16_table(0xA001)
+
+
+def crc16_modbus(data):
+    """CRC-16/MODBUS, as used on RS-485 buses.
+    """
+    crc = 0xFFFF
+    table = _CRC16_MODBUS_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def crc32(data):
+    """CRC-32, as in zlib.
+    """
+    return zlib.crc32(data)
+
+
+CHECKSUMS = {
+    'sum8': (sum8, '<B'),
+    'xor8': (xor8, '<B'),
+    'crc16-modbus': (crc16_modbus, '<H'),
+    'crc32': (crc32, '<I'),
+}
+
+
+class Framer(object):
+    """An abstract framer with a preallocated receive buffer.
+    Data is written directly into the buffer, eg. with readinto(writable()) followed by
+    commit(), or copied in with feed(). frames() yields complete frames as memoryview
+    slices of the buffer. A frame is only valid until data is written into the
+    framer again, so it should be decoded or copied before that.
+    Frames with a wrong checksum are dropped and counted in 'errors'.
+    @version 1.0
+    """
+    def __init__(self, capacity=65536, checksum=None):
+        """Initializes a new Framer.
+        @param capacity : int - Size of the receive buffer, ie. the maximum frame size
+        @param checksum : str/tuple - Name in CHECKSUMS, or a (function, struct format)
+            tuple. The checksum is computed over the frame payload and follows it.
+        """
+        self._buffer = bytearray(int(capacity))
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        if isinstance(checksum, str):
+            if checksum not in CHECKSUMS:
+                raise AttributeError("Checksum unknown '{}'.".format(checksum))
+            checksum = CHECKSUMS[checksum]
+        if checksum is not None:
+            self._checksum_func = checksum[0]
+            self._checksum_struct = struct.Struct(checksum[1])
+        else:
+            self._checksum_func = None
+            self._checksum_struct = None
+        self.frames_out = 0
+        self.errors = 0
+        self.overflows = 0
+
+    @property
+    def capacity(self):
+        """Size of the receive buffer in bytes.
+        """
+        return len(self._buffer)
+
+    def __len__(self):
+        """Number of buffered bytes not yet framed.
+        """
+        return self._end - self._start
+
+    def writable(self):
+        """Returns a writable memoryview of the free space in the buffer.
+        Makes room by moving any partial frame to the start of the buffer. If the buffer
+        is full of a single unterminated frame, the data is discarded.
+        """
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            if self._start == 0:
+                self.overflows += 1
+                self.reset()
+            else:
+                size = self._end - self._start
+                self._buffer[:size] = self._view[self._start:self._end]
+                self._start, self._end = 0, size
+        return self._view[self._end:]
+
+    def commit(self, count):
+        """Marks count bytes written into writable() as received.
+        """
+        self._end += count
+
+    def feed(self, data):
+        """Copies data into the buffer and returns the complete frames.
+        @returns list -- Frames as bytes
+        """
+        frames = []
+        data = memoryview(data)
+        while data:
+            view = self.writable()
+            count = min(len(view), len(data))
+            view[:count] = data[:count]
+            self.commit(count)
+            data = data[count:]
+            frames.extend(bytes(frame) for frame in self.frames())
+        return frames
+
+    def reset(self):
+        """Discards all buffered data.
+        """
+        self._start = self._end = 0
+
+    def frames(self):
+        """Yields complete frames as memoryview slices of the buffer.
+        """
+        while True:
+            frame = self._next_frame()
+            if frame is None:
+                return
+            if self._checksum_func is not None:
+                size = self._checksum_struct.size
+                if len(frame) < size:
+                    self.errors += 1
+                    continue
+                payload = frame[:len(frame) - size]
+                expected, = self._checksum_struct.unpack_from(frame, len(frame) - size)
+                if self._checksum_func(payload) != expected:
+                    self.errors += 1
+                    continue
+                frame = payload
+            self.frames_out += 1
+            yield frame
+
+    def _next_frame(self):
+        """Returns the next frame and advances the start of the buffer, or returns None.
+        Implement this in subclass.
+        """
+        raise NotImplementedError
+
+
+class DelimiterFramer(Framer):
+    """Splits the stream at a delimiter, eg. b'\\n'.
+    @version 1.0
+    """
+    def __init__(self, delimiter=b'\n', include_delimiter=False, **kwargs):
+        """Initializes a new DelimiterFramer.
+        @param delimiter : bytes - Frame delimiter
+        @param include_delimiter : bool - If True, the delimiter is part of the frame
+        """
+        super().__init__(**kwargs)
+        if not delimiter:
+            raise ValueError("Delimiter cannot be empty.")
+        self._delimiter = bytes(delimiter)
+        self._include_delimiter = include_delimiter
+        self._scanned = 0   # Bytes after start that contain no delimiter
+        self._overflows_seen = 0
+
+    @property
+    def delimiter(self):
+        return self._delimiter
+
+    def _next_frame(self):
+        i = self._buffer.find(self._delimiter, self._start + self._scanned, self._end)
+        if i < 0:
+            # Do not scan the same bytes again, except for a partial delimiter
+            self._scanned = max(0, self._end - self._start - len(self._delimiter) + 1)
+            return None
+        end = i + len(self._delimiter)
+        if self.overflows != self._overflows_seen:
+            # Drop the tail of a frame that did not fit in the buffer
+            self._overflows_seen = self.overflows
+            self._start = end
+            self._scanned = 0
+            return self._next_frame()
+        frame = self._view[self._start:end if self._include_delimiter else i]
+        self._start = end
+        self._scanned = 0
+        return frame
+
+    def reset(self):
+        super().reset()
+        self._scanned = 0
+
+
+class FixedLengthFramer(Framer):
+    """Splits the stream into frames of a fixed size.
+    @version 1.0
+    """
+    def __init__(self, size, **kwargs):
+        """Initializes a new FixedLengthFramer.
+        @param size : int - Frame size in bytes, including any checksum
+        """
+        super().__init__(**kwargs)
+        self._size = max(1, int(size))
+
+    def _next_frame(self):
+        if self._end - self._start < self._size:
+            return None
+        frame = self._view[self._start:self._start + self._size]
+        self._start += self._size
+        return frame
+
+
+class LengthPrefixFramer(Framer):
+    """Splits the stream into frames that start with a length field.
+    A frame is: sync bytes (optional), length field, payload, checksum (optional).
+    Frames are returned without the sync bytes and length field. If sync bytes are
+    given, data before them is skipped, which allows resynchronizing after errors.
+    @version 1.0
+    """
+    def __init__(self, length_format='>H', sync=b'', length_includes_checksum=False,
+                 **kwargs):
+        """Initializes a new LengthPrefixFramer.
+        @param length_format : str - struct format of the length field
+        @param sync : bytes - Bytes that start every frame
+        @param length_includes_checksum : bool - If True, the length counts the checksum
+        """
+        super().__init__(**kwargs)
+        self._length_struct = struct.Struct(length_format)
+        self._sync = bytes(sync)
+        self._length_includes_checksum = length_includes_checksum
+
+    def _next_frame(self):
+        if self._sync:
+            i = self._buffer.find(self._sync, self._start, self._end)
+            if i < 0:
+                # Keep a possible partial sync sequence
+                self._start = max(self._start, self._end - len(self._sync) + 1)
+                return None
+            self._start = i
+        header = len(self._sync) + self._length_struct.size
+        if self._end - self._start < header:
+            return None
+        length, = self._length_struct.unpack_from(self._buffer, self._start + len(self._sync))
+        if not self._length_includes_checksum and self._checksum_struct is not None:
+            length += self._checksum_struct.size
+        if header + length > self.capacity:
+            # Cannot be a valid frame, skip the sync bytes and look for the next one
+            self.errors += 1
+            if not self._sync:
+                self.reset()
+                return None
+            self._start += len(self._sync)
+            return self._next_frame()
+        if self._end - self._start < header + length:
+            return None
+        frame = self._view[self._start + header:self._start + header + length]
+        self._start += header + length
+        return frame
+
+
+class StructDecoder(object):
+    """Decodes fixed-layout binary records with a precompiled struct format.
+    @version 1.0
+    """
+    def __init__(self, fmt, fields=None, offset=0):
+        """Initializes a new StructDecoder.
+        @param fmt : str - struct format, eg. '<hHf'
+        @param fields : list - Field names; if given, records are dicts instead of tuples
+        @param offset : int - Offset of the record in the frame
+        """
+        self._struct = struct.Struct(fmt)
+        self._fields = tuple(fields) if fields is not None else None
+        if self._fields is not None and \
+                len(self._fields) != len(self._struct.unpack(bytes(self._struct.size))):
+            raise ValueError("Number of fields does not match format '{}'.".format(fmt))
+        self._offset = int(offset)
+
+    @property
+    def size(self):
+        """Size of a record in bytes.
+        """
+        return self._struct.size
+
+    def decode(self, frame):
+        """Decodes a record from a bytes-like frame.
+        """
+        values = self._struct.unpack_from(frame, self._offset)
+        if self._fields is None:
+            return values
+        return dict(zip(self._fields, values))
+
+    __call__ = decode
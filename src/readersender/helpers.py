@@ -1,6 +1,84 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import types
 import logging
+import weakref
+import functools
+import importlib
+import importlib.util
+
+CO_COROUTINE = 0x80
+
+
+def iscoroutinefunction(func):
+    """Returns if func is a coroutine function, eg. an 'async def' method.
+    Checks the code flags like inspect.iscoroutinefunction(), without importing inspect
+    or asyncio.
+    """
+    while isinstance(func, functools.partial):
+        func = func.func
+    return bool(getattr(getattr(func, '__code__', None), 'co_flags', 0) & CO_COROUTINE)
+
+
+def _fail_action(action, message):
+    """Returns a function for the action to take when a guard condition is not met.
+    """
+    if action == 'pass':
+        def fail(*args, **kwargs):
+            pass
+    elif action == 'warn':
+        def fail(self, *args, **kwargs):
+            self.log(message, logging.WARN)
+    elif action == 'raise':
+        def fail(*args, **kwargs):
+            raise RuntimeError(message)
+    else:
+        def fail(*args, **kwargs):
+            action(*args, **kwargs)
+    return fail
+
+
+def _guard(method, require_connected, fail):
+    """Wraps method so that fail is called instead, if the connection state is wrong.
+    The wrapper keeps the metadata of method, and stores the guard in '_guard' for
+    bind_guards().
+    """
+    if iscoroutinefunction(method):
+        async def fail_method(*args, **kwargs):
+            fail(*args, **kwargs)
+
+        if require_connected:
+            async def wrapper(self, *args, **kwargs):
+                if not self.connected:
+                    fail(self, *args, **kwargs)
+                    return
+                return await method(self, *args, **kwargs)
+        else:
+            async def wrapper(self, *args, **kwargs):
+                if self.connected:
+                    fail(self, *args, **kwargs)
+                    return
+                return await method(self, *args, **kwargs)
+    else:
+        def fail_method(*args, **kwargs):
+            fail(*args, **kwargs)
+
+        if require_connected:
+            def wrapper(self, *args, **kwargs):
+                if not self.connected:
+                    fail(self, *args, **kwargs)
+                    return
+                return method(self, *args, **kwargs)
+        else:
+            def wrapper(self, *args, **kwargs):
+                if self.connected:
+                    fail(self, *args, **kwargs)
+                    return
+                return method(self, *args, **kwargs)
+    functools.update_wrapper(fail_method, method)
+    functools.update_wrapper(wrapper, method)
+    wrapper._guard = (require_connected, method, fail_method)
+    return wrapper
 
 
 def only_connected(action='pass'):
@@ -9,28 +87,10 @@ def only_connected(action='pass'):
     @param action : str/function - Action to take, if condition is not met (default: pass).
         Can be a string 'pass', 'warn', or 'raise', or a function
         that receives the function as a parameter.
+    @remarks Coroutine functions are wrapped with a coroutine function.
     """
-    def fail_action():
-        if action == 'pass':
-            return lambda *args, **kwargs: None
-        if action == 'warn':
-            return lambda *args, **kwargs:\
-                args[0].log("Failed assertion: not connected.", logging.WARN)
-        if action == 'raise':
-            return lambda *args, **kwargs: (_ for _ in ()).\
-                throw(RuntimeError("Failed assertion: not connected."))
-        return lambda *args, **kwargs: action(*args, **kwargs)
-    fail_action = fail_action()
-
-    def wrapped_method(method):
-        def wrapper(*args, **kwargs):
-            if not args[0].connected:
-                fail_action(*args, **kwargs)
-                return
-            else:
-                return method(*args, **kwargs)
-        return wrapper
-    return wrapped_method
+    fail = _fail_action(action, "Failed assertion: not connected.")
+    return lambda method: _guard(method, True, fail)
 
 
 def only_disconnected(action='pass'):
@@ -39,25 +99,107 @@ def only_disconnected(action='pass'):
     @param action : str/function - Action to take, if condition is not met (default: pass).
         Can be a string 'pass', 'warn', or 'raise', or a function
         that receives the function as a parameter.
+    @remarks Coroutine functions are wrapped with a coroutine function.
     """
-    def fail_action():
-        if action == 'pass':
-            return lambda *args, **kwargs: None
-        if action == 'warn':
-            return lambda *args, **kwargs:\
-                args[0].log("Failed assertion: not disconnected.", logging.WARN)
-        if action == 'raise':
-            return lambda *args, **kwargs: (_ for _ in ()).\
-                throw(RuntimeError("Failed assertion: not disconnected."))
-        return lambda *args, **kwargs: action(*args, **kwargs)
-    fail_action = fail_action()
-
-    def wrapped_method(method):
-        def wrapper(*args, **kwargs):
-            if args[0].connected:
-                fail_action(*args, **kwargs)
-                return
-            else:
-                return method(*args, **kwargs)
-        return wrapper
-    return wrapped_method
+    fail = _fail_action(action, "Failed assertion: not disconnected.")
+    return lambda method: _guard(method, False, fail)
+
+
+# Guarded methods by class. Classes are not kept alive by the cache.
+_guards_cache = weakref.WeakKeyDictionary()
+
+
+def guarded_methods(cls):
+    """Returns the guarded methods of a class as a tuple of (name, guard) pairs.
+    The result is cached; call clear_guards_cache() after changing methods of a class.
+    """
+    guards = _guards_cache.get(cls)
+    if guards is None:
+        guards = []
+        for name in dir(cls):
+            guard = getattr(getattr(cls, name, None), '_guard', None)
+            if guard is not None:
+                guards.append((name, guard))
+        guards = _guards_cache[cls] = tuple(guards)
+    return guards
+
+
+def clear_guards_cache(cls=None):
+    """Forgets the cached guarded methods of cls, or of all classes.
+    Instances bound before keep their methods until their connection state changes.
+    """
+    if cls is None:
+        _guards_cache.clear()
+    else:
+        _guards_cache.pop(cls, None)
+
+
+def bind_guards(obj, connected):
+    """Binds the guarded methods of obj directly to either the method or the fail action,
+    according to the connection state, so that calls skip the check in the wrapper.
+    The bound methods are stored in the instance dictionary, which takes precedence over
+    the class. Call this whenever the value of obj.connected changes, and after copying
+    obj, as the bound methods of a copy still refer to the original.
+    Methods that are called for real are passed through obj._instrument(name, method),
+    if it exists.
+    """
+    d = obj.__dict__
+    wrap = getattr(obj, '_instrument', None)
+    for name, (require_connected, method, fail_method) in guarded_methods(type(obj)):
+        bound = types.MethodType(method if connected == require_connected else fail_method,
+                                 obj)
+        if wrap is not None and connected == require_connected:
+            bound = wrap(name, bound)
+        d[name] = bound
+
+
+class lazy(object):
+    """Defers calling func(*args) until the value is formatted, eg. into a log message.
+    Usage example:
+        self.log("Read data: {}", logging.DEBUG, lazy(json.dumps, data))
+    """
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+    def __format__(self, format_spec):
+        return format(self.func(*self.args), format_spec)
+
+
+def lazy_imports(package, attributes, requires=None):
+    """Returns __getattr__ and __dir__ functions for a package that imports its attributes
+    on first access (PEP 562), so that importing the package does not import every module.
+    @param package : str - Name of the package, ie. __name__
+    @param attributes : dict - Attribute names mapped to 'module' or 'module:name', where
+        module is relative to the package, eg. {'SerialReader': '.serialreader:SerialReader'}
+    @param requires : dict - Attribute names mapped to an optional module they need. If
+        the module is not installed, the attribute is None.
+    Usage example:
+        __getattr__, __dir__ = lazy_imports(__name__, {'FooReader': '.fooreader:FooReader'})
+    """
+    namespace = importlib.import_module(package).__dict__
+    requires = requires or {}
+
+    def __getattr__(name):
+        target = attributes.get(name)
+        if target is None:
+            raise AttributeError("module '{}' has no attribute '{}'".format(package, name))
+        if name in requires and importlib.util.find_spec(requires[name]) is None:
+            value = None
+        else:
+            modname, _, attr = target.partition(':')
+            value = importlib.import_module(modname, package)
+            if attr:
+                value = getattr(value, attr)
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(attributes))
+
+    return __getattr__, __dir__
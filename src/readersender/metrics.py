@@ -0,0 +1,398 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Metrics of readers, senders and runners, with Prometheus and JSON exporters.
+
+@file           metrics.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import re
+import json
+import time
+import weakref
+import datetime
+import functools
+import threading
+import collections
+from .helpers import iscoroutinefunction
+
+# Methods of readers and senders that are instrumented
+INSTRUMENTED_METHODS = ('connect', 'disconnect', 'read', 'read_many', 'send', 'send_batch')
+
+# Range of the reported latency buckets, as powers of two nanoseconds (1 us to 17 s)
+MIN_BUCKET = 10
+MAX_BUCKET = 34
+
+REGISTRY = weakref.WeakSet()
+
+
+class Histogram(object):
+    """A latency histogram with buckets of powers of two nanoseconds.
+    A value of n ns falls into bucket n.bit_length(), whose upper bound is 2**bucket ns,
+    so observing a value costs no more than a counter. Buckets from MIN_BUCKET to
+    MAX_BUCKET are reported, and quantiles are estimated as the upper bound of their
+    bucket.
+    @version 1.0
+    """
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * 65
+        self.sum = 0
+
+    def observe(self, value):
+        """Records a value in nanoseconds.
+        """
+        self.counts[value.bit_length()] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def buckets(self):
+        """Returns the reported buckets as (upper bound in seconds, cumulative count) pairs.
+        """
+        counts = list(self.counts)
+        cumulative = sum(counts[:MIN_BUCKET])
+        buckets = []
+        for i in range(MIN_BUCKET, MAX_BUCKET + 1):
+            cumulative += counts[i]
+            buckets.append((2 ** i / 1e9, cumulative))
+        return buckets
+
+    def quantile(self, q):
+        """Returns the estimated q-quantile in seconds, or None if there are no values.
+        Values above the last bucket are estimated as infinity.
+        """
+        return self._quantile(q, self.buckets(), self.count)
+
+    @staticmethod
+    def _quantile(q, buckets, total):
+        if not total:
+            return None
+        rank = q * total
+        for bound, cumulative in buckets:
+            if cumulative >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        """Returns the histogram as a dictionary, in seconds.
+        'buckets' is a list of [upper bound, cumulative count] pairs.
+        """
+        total = self.count
+        total_sum = self.sum
+        buckets = self.buckets()
+        return {
+            'count': total,
+            'sum': total_sum / 1e9,
+            'mean': total_sum / 1e9 / total if total else None,
+            'p50': self._quantile(0.5, buckets, total),
+            'p90': self._quantile(0.9, buckets, total),
+            'p99': self._quantile(0.99, buckets, total),
+            'buckets': [list(bucket) for bucket in buckets],
+        }
+
+
+class Metrics(object):
+    """A set of counters, gauges and latency histograms, eg. of one reader or sender.
+    Counters and histograms are updated without locks, so concurrent updates from many
+    threads may occasionally be lost. Gauges are functions that are called when a
+    snapshot is taken.
+    @version 1.0
+    """
+    _counts = collections.defaultdict(int)
+    _counts_lock = threading.Lock()
+
+    def __init__(self, name, register=True):
+        """Initializes a new Metrics.
+        @param name : str - Name of the metrics, eg. 'SchemeReader'. A running number is
+            appended to make the name unique, eg. 'SchemeReader-1'.
+        @param register : bool - If True, the metrics are included in collect()
+        """
+        with self._counts_lock:
+            Metrics._counts[name] += 1
+            self.name = "{}-{}".format(name, Metrics._counts[name])
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        if register:
+            REGISTRY.add(self)
+
+    def inc(self, name, value=1):
+        """Increments a counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def histogram(self, name):
+        """Returns a histogram by name, creating it if needed.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def gauge(self, name, func):
+        """Registers a gauge.
+        @param name : str - Name of the gauge, or None
+        @param func : function - Returns a number, or a dictionary of numbers that are
+            reported as separate gauges, prefixed by name if it is given
+        """
+        self.gauges[name] = func
+
+    def gauge_values(self):
+        """Returns the current values of the numeric gauges.
+        Failing gauges are skipped, eg. when a reader is not connected.
+        """
+        values = {}
+        for name, func in list(self.gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                continue
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    _add_number(values, key if name is None else "{}_{}".format(name, key),
+                                item)
+            else:
+                _add_number(values, name, value)
+        return values
+
+    def snapshot(self):
+        """Returns all metrics as a dictionary.
+        """
+        return {
+            'counters': dict(self.counters),
+            'gauges': self.gauge_values(),
+            'histograms': {name: histogram.snapshot()
+                           for name, histogram in list(self.histograms.items())},
+        }
+
+
+def _add_number(values, name, value):
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        values[name] = value
+
+
+def instrument(method, metrics, name, timeouts=None, clock=time.perf_counter_ns):
+    """Wraps method so that its latency is recorded in histogram '<name>_seconds', and
+    its exceptions are counted in '<name>_errors'.
+    @param timeouts : bool - If True, calls that return None are counted in
+        '<name>_timeouts', eg. reads that timed out (default: for reads)
+    @remarks Coroutine functions are wrapped with a coroutine function.
+    """
+    histogram = metrics.histogram(name + '_seconds')
+    buckets = histogram.counts
+    counters = metrics.counters
+    errors = name + '_errors'
+    counters.setdefault(errors, 0)
+    if timeouts is None:
+        timeouts = name.startswith('read')
+    timeouts = name + '_timeouts' if timeouts else None
+    if timeouts is not None:
+        counters.setdefault(timeouts, 0)
+
+    if iscoroutinefunction(method):
+        async def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception:
+                counters[errors] += 1
+                raise
+            finally:
+                elapsed = clock() - start
+                buckets[elapsed.bit_length()] += 1
+                histogram.sum += elapsed
+            if result is None and timeouts is not None:
+                counters[timeouts] += 1
+            return result
+    else:
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                counters[errors] += 1
+                raise
+            finally:
+                elapsed = clock() - start
+                buckets[elapsed.bit_length()] += 1
+                histogram.sum += elapsed
+            if result is None and timeouts is not None:
+                counters[timeouts] += 1
+            return result
+    functools.update_wrapper(wrapper, method)
+    return wrapper
+
+
+def collect(registry=None):
+    """Returns the snapshots of all registered metrics by name.
+    """
+    registry = REGISTRY if registry is None else registry
+    return {metrics.name: metrics.snapshot()
+            for metrics in sorted(list(registry), key=lambda m: m.name)}
+
+
+def _metric_name(*parts):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', "_".join(['readersender'] + list(parts)))
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_prometheus(snapshots):
+    """Returns snapshots, as returned by collect(), in the Prometheus text format.
+    Every metric is labelled with the name of its Metrics, eg.
+    readersender_read_seconds_count{instance="SchemeReader-1"} 10
+    """
+    families = collections.OrderedDict()
+
+    def add(name, kind, line):
+        families.setdefault(name, (kind, []))[1].append(line)
+
+    for instance, snapshot in snapshots.items():
+        label = 'instance="{}"'.format(_label(instance))
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = _metric_name(name, 'total')
+            add(metric, 'counter', "{}{{{}}} {}".format(metric, label, value))
+        for name, value in sorted(snapshot['gauges'].items()):
+            metric = _metric_name(name)
+            add(metric, 'gauge', "{}{{{}}} {}".format(metric, label, value))
+        for name, histogram in sorted(snapshot['histograms'].items()):
+            metric = _metric_name(name)
+            for bound, count in histogram['buckets']:
+                add(metric, 'histogram', '{}_bucket{{{},le="{!r}"}} {}'.format(
+                    metric, label, bound, count))
+            add(metric, 'histogram', '{}_bucket{{{},le="+Inf"}} {}'.format(
+                metric, label, histogram['count']))
+            add(metric, 'histogram', "{}_sum{{{}}} {!r}".format(
+                metric, label, histogram['sum']))
+            add(metric, 'histogram', "{}_count{{{}}} {}".format(
+                metric, label, histogram['count']))
+    lines = []
+    for name, (kind, samples) in families.items():
+        lines.append("# TYPE {} {}".format(name, kind))
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer(object):
+    """Serves the registered metrics over HTTP on a background thread.
+    /metrics returns the Prometheus text format and /metrics.json returns JSON.
+    @version 1.0
+    """
+    def __init__(self, port, host='', registry=None):
+        """Initializes a new MetricsServer.
+        @param port : int - Port to listen on, or 0 for any free port
+        @param host : str - Address to listen on (default: all)
+        """
+        # Imported here, as http.server is slow to import and rarely needed
+        import http.server
+
+        self._registry = registry
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                snapshots = collect(server._registry)
+                if self.path.split('?')[0] == '/metrics':
+                    body = format_prometheus(snapshots).encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path.split('?')[0] == '/metrics.json':
+                    body = json.dumps(snapshots).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, int(port)), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        """Returns the (host, port) the server listens on.
+        """
+        return self._server.server_address[:2]
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                            name=self.__class__.__name__)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class MetricsDumper(object):
+    """Writes the registered metrics into a JSON file at intervals on a background thread.
+    The file is replaced atomically, so readers never see a partial file.
+    @version 1.0
+    """
+    def __init__(self, path, interval=60.0, registry=None):
+        """Initializes a new MetricsDumper.
+        @param path : str - File to write
+        @param interval : float - Seconds between writes
+        """
+        self._path = path
+        self._interval = float(interval)
+        self._registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def dump(self):
+        """Writes the metrics now.
+        """
+        data = {
+            'time': datetime.datetime.utcnow().isoformat(),
+            'metrics': collect(self._registry),
+        }
+        tmp = "{}.tmp".format(self._path)
+        with open(tmp, 'w') as fd:
+            json.dump(data, fd)
+        os.replace(tmp, self._path)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            try:
+                self.dump()
+            except OSError:
+                pass
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True,
+                                            name=self.__class__.__name__)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the thread and writes the final metrics.
+        """
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.dump()
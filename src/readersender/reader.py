@@ -7,15 +7,34 @@ Reader classes.
 @author:        Juuso Korhonen (juusokorhonen on github.com)
 @license:       MIT License
 """
+import itertools
+import threading
+import collections
 from . import ReaderSender
 from .helpers import only_connected
+from .sample import Sample, SampleBatch
 
 
 class Reader(ReaderSender):
     """An abstract reader class for easy interfacing.
     Defines methods to be implemented in subclasses.
-    @version 1.4
+    @version 1.6
     """
+    # Sequence numbers are reserved under a lock shared by all readers, so that readers
+    # can still be copied and pickled
+    _seq_lock = threading.Lock()
+
+    def __init__(self, *args, source=None, **kwargs):
+        """Initializes a new Reader.
+        @param source : str - Source id of the samples from read_sample() (default: the
+            name of the metrics, or the class name)
+        """
+        super().__init__(*args, **kwargs)
+        if source is None:
+            source = self.metrics.name if self.metrics is not None else self.__class__.__name__
+        self.source = source
+        self._seq = itertools.count()
+
     @only_connected(action='warn')
     def read(self):
         """Reads data from the reader.
@@ -23,3 +42,38 @@ class Reader(ReaderSender):
         @returns Read data
         """
         return NotImplemented
+
+    @only_connected(action='warn')
+    def read_many(self, n):
+        """Reads n data items from the reader.
+        Subclasses that can produce data in bulk should override this.
+        @returns list -- Read data
+        """
+        return [self.read() for _ in range(n)]
+
+    def read_sample(self, *args, **kwargs):
+        """Reads data and returns it as a Sample, timestamped when the read returned and
+        numbered in sequence. Arguments are passed to read().
+        @returns Sample -- Read data, or None if read() returned None
+        """
+        payload = self.read(*args, **kwargs)
+        if payload is None:
+            return None
+        with self._seq_lock:
+            seq = next(self._seq)
+        return Sample(payload, seq, self.source)
+
+    def read_samples(self, n):
+        """Reads n data items with read_many() and returns them as a SampleBatch. All the
+        samples have the timestamp of when read_many() returned.
+        """
+        payloads = self.read_many(n)
+        if payloads is None:
+            return None
+        if not payloads:
+            return SampleBatch()
+        with self._seq_lock:
+            first_seq = next(self._seq)
+            # Reserve the rest of the sequence numbers
+            collections.deque(itertools.islice(self._seq, len(payloads) - 1), maxlen=0)
+        return SampleBatch.from_payloads(payloads, first_seq, self.source)
@@ -1,18 +1,25 @@
 #!/usr/bin/env python3
 # -*- coding: utf8
-import importlib
+from ..helpers import lazy_imports
 
-from .fooreader import FooReader
-from .schemereader import SchemeReader
-from .randomreader import RandomReader
-if importlib.util.find_spec("serial"):
-    from .serialreader import SerialReader
-else:
-    SerialReader = None
+# Readers are imported on first access. Readers that need pyserial are None without it.
+__getattr__, __dir__ = lazy_imports(__name__, {
+    'FooReader': '.fooreader:FooReader',
+    'SchemeReader': '.schemereader:SchemeReader',
+    'Vectorized': '.schemereader:Vectorized',
+    'RandomReader': '.randomreader:RandomReader',
+    'SerialReader': '.serialreader:SerialReader',
+    'SerialBus': '.serialbus:SerialBus',
+}, requires={
+    'SerialReader': 'serial',
+    'SerialBus': 'serial',
+})
 
 __all__ = [
     'FooReader',
     'SchemeReader',
+    'Vectorized',
     'RandomReader',
-    'SerialReader'
+    'SerialReader',
+    'SerialBus'
 ]
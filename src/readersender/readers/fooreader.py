@@ -34,5 +34,5 @@ class FooReader(Reader):
         if not self._connected:
             raise RuntimeError("{} not connected.".format(self.__class__.__name__))
         data = "foo"
-        self.log("Pretending to read data: {}".format(data), logging.INFO)
+        self.log("Pretending to read data: {}", logging.INFO, data)
         return data
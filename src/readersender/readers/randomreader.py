@@ -9,26 +9,73 @@ Random value reader for testing.
 """
 import random
 import datetime
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
 from ..reader import Reader
-from . import SchemeReader
+from . import SchemeReader, Vectorized
 
 
 class RandomReader(Reader):
     """
     A reader that returns random values according to given scheme.
-    @version 1.0
+    read_many() generates whole batches at once, with NumPy if it is installed, eg. with
+    the 'RandomReader' extra.
+    The timestamps of a batch start from the current time and are 'sample_interval'
+    seconds apart.
+    @version 1.1
     """
-    random_scheme = {
-        'ts': lambda: datetime.datetime.utcnow().isoformat(),
-        'd': {
-            'rnd': lambda: random.random()
-        }
-    }
-
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, seed=None, sample_interval=1.0, **kwargs):
+        """Initializes a new RandomReader.
+        @param seed : int - Seed for reproducible random values
+        @param sample_interval : float - Seconds between the timestamps of read_many()
+        """
         super().__init__(*args, **kwargs)
+        self._random = random.Random(seed)
+        self._rng = np.random.default_rng(seed) if np is not None else None
+        self.sample_interval = float(sample_interval)
+        self.random_scheme = {
+            'ts': Vectorized(self.timestamp, self.timestamps),
+            'd': {
+                'rnd': Vectorized(self._random.random, self.randoms)
+            }
+        }
+        # The reads are instrumented by this reader only
+        kwargs['metrics'] = False
         self.scheme_reader = SchemeReader(scheme=self.random_scheme, *args, **kwargs)
 
+    @staticmethod
+    def timestamp():
+        """Returns the current UTC time as an ISO 8601 string.
+        """
+        return datetime.datetime.utcnow().isoformat()
+
+    def timestamps(self, n):
+        """Returns n ISO 8601 timestamps, starting from the current UTC time.
+        """
+        start = datetime.datetime.utcnow()
+        if np is not None:
+            steps = np.arange(n) * round(self.sample_interval * 1e6)
+            times = np.datetime64(start, 'us') + steps.astype('timedelta64[us]')
+            return np.datetime_as_string(times, unit='us')
+        step = datetime.timedelta(seconds=self.sample_interval)
+        return [(start + i * step).isoformat() for i in range(n)]
+
+    def randoms(self, n):
+        """Returns n random floats in [0, 1).
+        """
+        if self._rng is not None:
+            return self._rng.random(n)
+        rnd = self._random.random
+        return [rnd() for _ in range(n)]
+
+    @property
+    def scheme(self):
+        """Returns the scheme of the random data.
+        """
+        return self.scheme_reader.scheme
+
     @property
     def connected(self):
         return self.scheme_reader.connected
@@ -41,3 +88,10 @@ class RandomReader(Reader):
 
     def read(self):
         return self.scheme_reader.read()
+
+    def read_many(self, n, columnar=False):
+        """Reads n random data items at once.
+        @param columnar : bool - If True, returns the data as columns, see
+            SchemeReader.read_many().
+        """
+        return self.scheme_reader.read_many(n, columnar=columnar)
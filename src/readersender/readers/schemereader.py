@@ -10,6 +10,27 @@ Customizable reader for testing.
 import logging
 import json
 from ..reader import Reader
+from ..helpers import lazy
+
+
+class Vectorized(object):
+    """A scheme function with a bulk variant, used by SchemeReader.read_many().
+    Calling it returns a single value, and many(n) returns a sequence of n values,
+    eg. a NumPy array.
+    @version 1.0
+    """
+    __slots__ = ('func', 'many')
+
+    def __init__(self, func, many):
+        """Initializes a new Vectorized function.
+        @param func : function - Returns a single value
+        @param many : function - Takes a count n and returns a sequence of n values
+        """
+        self.func = func
+        self.many = many
+
+    def __call__(self):
+        return self.func()
 
 
 class SchemeReader(Reader):
@@ -20,35 +41,51 @@ class SchemeReader(Reader):
 
     def __init__(self, scheme, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._scheme = scheme
+        self.scheme = scheme
 
     def connect(self):
         if self._connected:
-            self.log("{} already connected. Skipping.".format(self.__class__.__name__),
-                     logging.INFO)
+            self.log("{} already connected. Skipping.", logging.INFO,
+                     self.__class__.__name__)
             return
-        self.log("Connecting to {}.".format(self.__class__.__name__),
-                 logging.INFO)
+        self.log("Connecting to {}.", logging.INFO, self.__class__.__name__)
         self._connected = True
 
     def disconnect(self):
         if not self._connected:
-            self.log("{} already disconnected. Skipping.".format(self.__class__.__name__),
-                     logging.INFO)
+            self.log("{} already disconnected. Skipping.", logging.INFO,
+                     self.__class__.__name__)
             return
-        self.log("Disconnecting from {}.".format(self.__class__.__name__),
-                 logging.INFO)
+        self.log("Disconnecting from {}.", logging.INFO, self.__class__.__name__)
         self._connected = False
 
     def read(self):
         if not self._connected:
             raise RuntimeError("{} not connected.".format(self.__class__.__name__))
-        data = self._process_scheme(self.scheme)
-        self.log("{} reading data.".format(self.__class__.__name__), logging.INFO)
-        self.log("{} read random data: {}".format(json.dumps(data), self.__class__.__name__),
-                 logging.DEBUG)
+        data = self._plan()
+        self.log("{} reading data.", logging.INFO, self.__class__.__name__)
+        self.log("{} read data: {}", logging.DEBUG, self.__class__.__name__,
+                 lazy(json.dumps, data))
         return data
 
+    def read_many(self, n, columnar=False):
+        """Reads n data items at once.
+        Vectorized functions of the scheme generate their values in bulk, and other
+        functions are called n times.
+        @param n : int - Number of data items
+        @param columnar : bool - If True, returns a single item in the shape of the
+            scheme, with a sequence of n values in place of every function.
+        @returns list/dict -- List of n data items, or the columns
+        """
+        if not self._connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        n = int(n)
+        self.log("{} reading {} data items.", logging.INFO, self.__class__.__name__, n)
+        columns = self._columns_plan(n)
+        if columnar:
+            return columns
+        return self._records_plan(columns, n)
+
     @property
     def scheme(self):
         return self._scheme
@@ -58,28 +95,71 @@ class SchemeReader(Reader):
         """Sets the scheme for the reader.
         Every field of the scheme dictionary should be a func, where func is
         a function that generates the random value.
+        The scheme is compiled here, so an invalid scheme raises AttributeError.
         """
+        self._plan = self.compile_scheme(scheme)
+        self._columns_plan = self.compile_columns(scheme)
+        self._records_plan = self.compile_records(scheme)
         self._scheme = scheme
 
     @classmethod
-    def _process_scheme(cls, scheme):
-        """Processes a 'scheme'.
+    def compile_scheme(cls, scheme):
+        """Compiles a 'scheme' into a function that returns the data.
+        Lists, tuples and dicts are compiled into comprehensions over their compiled
+        items, and functions are used as is, so reading does not walk the scheme.
+        @raises AttributeError if the scheme contains something that is not callable.
+        """
+        if isinstance(scheme, (list, tuple)):
+            funcs = tuple(cls.compile_scheme(item) for item in scheme)
+            return lambda: [func() for func in funcs]
+        elif isinstance(scheme, dict):
+            items = tuple((k, cls.compile_scheme(v)) for k, v in scheme.items())
+            return lambda: {k: func() for k, func in items}
+        elif isinstance(scheme, Vectorized):
+            return scheme.func
+        elif callable(scheme):
+            return scheme
+        else:
+            raise AttributeError("Cannot process scheme for '{}'.".format(str(scheme)))
+
+    @classmethod
+    def compile_columns(cls, scheme):
+        """Compiles a 'scheme' into a function that takes a count n and returns the
+        scheme structure with a sequence of n values in place of every function.
+        """
+        if isinstance(scheme, (list, tuple)):
+            funcs = tuple(cls.compile_columns(item) for item in scheme)
+            return lambda n: [func(n) for func in funcs]
+        elif isinstance(scheme, dict):
+            items = tuple((k, cls.compile_columns(v)) for k, v in scheme.items())
+            return lambda n: {k: func(n) for k, func in items}
+        elif isinstance(scheme, Vectorized):
+            return scheme.many
+        elif callable(scheme):
+            return lambda n: [scheme() for _ in range(n)]
+        else:
+            raise AttributeError("Cannot process scheme for '{}'.".format(str(scheme)))
+
+    @classmethod
+    def compile_records(cls, scheme):
+        """Compiles a 'scheme' into a function that takes the output of
+        compile_columns() and the count n, and returns a list of n data items.
         """
-        if (isinstance(scheme, (list, tuple))):
-            cnt = 0
-            data = []
-            for item in scheme:
-                data.append(cls._process_scheme(item))
-                cnt += 1
-            return data
-        elif (isinstance(scheme, dict)):
-            data = {}
-            for k, v in scheme.items():
-                data[k] = cls._process_scheme(v)
-            return data
+        if isinstance(scheme, (list, tuple)):
+            funcs = tuple(cls.compile_records(item) for item in scheme)
+            if not funcs:
+                return lambda columns, n: [[] for _ in range(n)]
+            return lambda columns, n: [list(row) for row in zip(
+                *(func(column, n) for func, column in zip(funcs, columns)))]
+        elif isinstance(scheme, dict):
+            keys = tuple(scheme.keys())
+            funcs = tuple(cls.compile_records(v) for v in scheme.values())
+            if not funcs:
+                return lambda columns, n: [{} for _ in range(n)]
+            return lambda columns, n: [dict(zip(keys, row)) for row in zip(
+                *(func(columns[k], n) for k, func in zip(keys, funcs)))]
+        elif callable(scheme):
+            # NumPy arrays are converted into lists of Python values
+            return lambda column, n: column.tolist() if hasattr(column, 'tolist') else column
         else:
-            try:
-                val = scheme.__call__()
-                return val
-            except TypeError:
-                raise AttributeError("Cannot process scheme for '{}'.".format(str(scheme)))
+            raise AttributeError("Cannot process scheme for '{}'.".format(str(scheme)))
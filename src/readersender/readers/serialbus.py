@@ -0,0 +1,233 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Shared serial port for many logical readers.
+
+@file           serialbus.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import threading
+import collections
+import concurrent.futures
+import serial
+
+
+class SerialBus(object):
+    """Owns a single serial port and runs transactions on it for many clients.
+    A transaction is a function that receives the open serial.Serial, eg. writes a
+    request and reads the response. Transactions run one at a time on a worker thread,
+    back to back. Clients are served in turns, so that a client with many queued
+    transactions cannot starve the others.
+    Use SerialBus.get() to share one bus per port within the process.
+    @version 1.0
+    """
+    LINE_SETTINGS = ['baudrate', 'bytesize', 'parity', 'stopbits']
+
+    _buses = {}
+    _buses_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, port, serial_config=None, **kwargs):
+        """Returns the bus of port, creating it if needed.
+        A bus stays registered after its last client has detached, so clients that
+        reattach later and new clients share the same bus. A bus without clients takes
+        the serial_config of the caller.
+        @raises AttributeError if the bus is open with different line settings.
+        """
+        with cls._buses_lock:
+            bus = cls._buses.get(port)
+            if bus is None:
+                bus = cls(port, serial_config, **kwargs)
+                cls._buses[port] = bus
+            elif serial_config is not None:
+                with bus._cond:
+                    if not bus._clients:
+                        bus._serial_config = dict(serial_config, port=port)
+                        return bus
+                    for key in cls.LINE_SETTINGS:
+                        if key in serial_config and \
+                                serial_config[key] != bus.serial_config.get(key):
+                            raise AttributeError(
+                                "Serial port '{}' is shared with different '{}'.".format(
+                                    port, key))
+            return bus
+
+    def __init__(self, port, serial_config=None, turnaround=0.0, flush_stale=True):
+        """Initializes a new SerialBus. The port is opened when the first client attaches.
+        @param port : str - Serial port, eg. '/dev/ttyUSB0'
+        @param serial_config : dict - Arguments for serial.Serial
+        @param turnaround : float - Delay between transactions in seconds, eg. for
+            RS-485 devices that need time to release the bus
+        @param flush_stale : bool - If True, unread input is discarded before each
+            transaction, as it belongs to an earlier transaction that timed out
+        """
+        self._serial_config = dict(serial_config or {})
+        self._serial_config['port'] = port
+        self._turnaround = float(turnaround)
+        self._flush_stale = flush_stale
+        self._serial = None
+        self._clients = set()
+        self._pending = collections.OrderedDict()     # client -> deque of transactions
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self.transactions = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.busy_time = 0.0
+
+    @property
+    def port(self):
+        return self._serial_config['port']
+
+    @property
+    def serial_config(self):
+        return self._serial_config
+
+    @property
+    def serial(self):
+        """Returns the serial instance, or None if no client is attached.
+        """
+        return self._serial
+
+    @property
+    def clients(self):
+        return len(self._clients)
+
+    @property
+    def queued(self):
+        """Number of transactions waiting to run.
+        """
+        with self._cond:
+            return sum(len(q) for q in self._pending.values())
+
+    def attached(self, client):
+        """Returns if client is attached to the bus.
+        """
+        return client in self._clients
+
+    def attach(self, client):
+        """Registers a client, opening the port and starting the worker if needed.
+        """
+        with self._cond:
+            if client in self._clients:
+                return
+            if self._serial is None:
+                self._serial = serial.Serial(**self._serial_config)
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, daemon=True,
+                    name="{}-{}".format(self.__class__.__name__, self.port))
+                self._thread.start()
+            self._clients.add(client)
+
+    def detach(self, client):
+        """Unregisters a client and cancels its queued transactions.
+        When the last client detaches, the worker is stopped and the port is closed. The
+        bus remains registered, and is reopened when a client attaches again.
+        """
+        with self._cond:
+            if client not in self._clients:
+                return
+            self._clients.discard(client)
+            for _, _, future in self._pending.pop(client, ()):
+                if future.cancel():
+                    self.cancelled += 1
+            if self._clients:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+            thread, self._thread = self._thread, None
+            port, self._serial = self._serial, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        port.close()
+
+    def submit(self, client, transaction, timeout=None):
+        """Queues a transaction.
+        @param client - An attached client
+        @param transaction : function - Receives the serial instance and returns a result
+        @param timeout : float - Serial read/write timeout during the transaction, or None
+            for the timeout of serial_config
+        @returns concurrent.futures.Future -- Result of the transaction
+        @raises RuntimeError if the client is not attached.
+        """
+        future = concurrent.futures.Future()
+        with self._cond:
+            if client not in self._clients:
+                raise RuntimeError("Client not attached to serial bus '{}'.".format(self.port))
+            self._pending.setdefault(client, collections.deque()).append(
+                (transaction, timeout, future))
+            self._cond.notify()
+        return future
+
+    def transact(self, client, transaction, timeout=None, wait_timeout=None):
+        """Runs a transaction and returns its result.
+        @param wait_timeout : float - Maximum time to wait for the result, including the
+            time spent waiting for other transactions
+        @raises concurrent.futures.TimeoutError if the result is not ready in time. A
+            transaction that has not started yet is cancelled.
+        """
+        future = self.submit(client, transaction, timeout=timeout)
+        try:
+            return future.result(wait_timeout)
+        except concurrent.futures.TimeoutError:
+            if future.cancel():
+                with self._cond:
+                    self.cancelled += 1
+            raise
+
+    def _next(self):
+        """Returns the next transaction, taking clients in turns.
+        """
+        client, queue = next(iter(self._pending.items()))
+        transaction = queue.popleft()
+        del self._pending[client]
+        if queue:
+            # Move the client to the end of the line
+            self._pending[client] = queue
+        return transaction
+
+    def _run(self):
+        """Runs transactions until the last client detaches.
+        """
+        port = self._serial
+        default_timeout = self._serial_config.get('timeout')
+        default_write_timeout = self._serial_config.get('write_timeout')
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                transaction, timeout, future = self._next()
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            try:
+                port.timeout = default_timeout if timeout is None else timeout
+                port.write_timeout = default_write_timeout if timeout is None else timeout
+                if self._flush_stale:
+                    port.reset_input_buffer()
+                future.set_result(transaction(port))
+            except Exception as e:
+                self.errors += 1
+                future.set_exception(e)
+            self.transactions += 1
+            self.busy_time += time.monotonic() - started
+            if self._turnaround > 0:
+                time.sleep(self._turnaround)
+
+    def stats(self):
+        """Returns the bus counters as a dictionary.
+        """
+        return {
+            'clients': self.clients,
+            'queued': self.queued,
+            'transactions': self.transactions,
+            'errors': self.errors,
+            'cancelled': self.cancelled,
+            'busy_time': self.busy_time,
+        }
@@ -7,10 +7,17 @@ Simple reader for serial/uart.
 @author:        Juuso Korhonen (juusokorhonen on github.com)
 @license:       MIT License
 """
+import time
+import queue
+import logging
+import threading
 import serial
 import serial.tools.list_ports
 from ..reader import Reader
+from ..ringbuffer import RingBuffer
+from ..framing import DelimiterFramer, FixedLengthFramer
 from ..helpers import (only_connected, only_disconnected)
+from .serialbus import SerialBus
 
 
 class SerialReader(Reader):
@@ -26,13 +33,23 @@ class SerialReader(Reader):
         dsrdtr=False,
         inter_byte_timeout=None
     )
-    READ_MODES = ['line', 'bytes', 'until']
+    READ_MODES = ['line', 'bytes', 'until', 'frame']
 
     def __init__(self, port, serial_config={}, read_command=None,
                  read_mode='line', max_bytes=1, end_mark='\n',
                  encoding='utf-8', timeout=None,
+                 streaming=False, chunk_size=4096, max_frames=10000,
+                 framer=None, decoder=None, bus=None,
                  **kwargs):
         """Initializes a new SerialReader object.
+        If streaming is True, a background thread reads the serial continuously
+        (see start_streaming()).
+        If encoding is None, data is returned as bytes.
+        In read mode 'frame', data is split into frames by framer (see framing.py),
+        and each frame is returned as decoder(frame) if a decoder is given.
+        If bus is True or a SerialBus, the port is shared with other readers, and each
+        read() is a transaction on the bus (see serialbus.py). Streaming is not
+        available on a shared port.
         """
         super().__init__(**kwargs)
         # Any custom initialization goes here or to subclasses
@@ -45,18 +62,42 @@ class SerialReader(Reader):
             self._serial_config['write_timeout'] = float(timeout)
 
         # NOTE: Opens connection on creation
-        self._serial = serial.Serial(**self._serial_config)
+        if bus:
+            if streaming:
+                raise AttributeError("Streaming is not available on a shared port.")
+            if not isinstance(bus, SerialBus):
+                bus = SerialBus.get(port, self._serial_config)
+            self._bus = bus
+            self._bus.attach(self)
+            self._serial = None
+        else:
+            self._bus = None
+            self._serial = serial.Serial(**self._serial_config)
 
-        self._read_command = str(read_command) if read_command is not None else None
+        self.read_command = read_command
         self._encoding = encoding
 
         if read_mode not in self.READ_MODES:
             raise AttributeError("Read mode unknown '{}'.".format(read_mode))
+        if read_mode == 'frame' and framer is None:
+            raise AttributeError("Read mode 'frame' requires a framer.")
         self._read_mode = read_mode
+        self._framer = framer
+        self._decoder = decoder
 
         self._max_bytes = max(1, int(max_bytes))
 
-        self._end_mark = str(end_mark)
+        self.end_mark = end_mark
+
+        self._chunk_size = max(1, int(chunk_size))
+        self._max_frames = int(max_frames)
+        self._frames = None
+        self._stream_thread = None
+        self._stream_stop = threading.Event()
+        self._streaming = bool(streaming)
+        self.decode_errors = 0
+        if self._streaming:
+            self.start_streaming()
 
     @only_connected(action='warn')
     def read(self, flush=False):
@@ -70,28 +111,83 @@ class SerialReader(Reader):
         Returns
         -------
         str
-            Data read from the serial.
+            Data read from the serial (bytes if encoding is None, or a record if
+            a decoder is set).
 
         Notes
         -----
         Returns None, if a read timeout occurs.
+        In streaming mode, returns the next frame from the stream.
+        """
+        if self.streaming:
+            if flush:
+                self.flush_frames()
+            try:
+                return self._frames.get(timeout=self.serial.timeout)
+            except queue.Empty:
+                return None
+        if self._bus is not None:
+            return self._bus.transact(self, lambda port: self._transaction(port, flush=flush),
+                                      timeout=self._serial_config.get('timeout'))
+        return self._transaction(self.serial, flush=flush)
+
+    def _transaction(self, port, flush=False):
+        """Sends the read command and reads the response from port.
         """
         if flush:
-            self.serial.reset_input_buffer()
+            port.reset_input_buffer()
+            if self._framer is not None:
+                self._framer.reset()
         if self.read_command is not None:
             try:
-                self.serial.write(self.read_command.encode(self.encoding))
+                port.write(self._encode(self.read_command))
             except serial.SerialTimeoutException:
                 pass
         try:
-            return self.serial.readline().decode(self.encoding)\
-                   if self.read_mode == "line"\
-                   else self.serial.read(self.max_bytes).decode(self.encoding)\
-                   if self.read_mode == 'bytes'\
-                   else self.serial.read_until(self.end_mark).decode(self.encoding)
+            if self.read_mode == 'frame':
+                return self._read_frame(port)
+            return self._decode(port.readline()
+                                if self.read_mode == "line"
+                                else port.read(self.max_bytes)
+                                if self.read_mode == 'bytes'
+                                else port.read_until(self._encode(self.end_mark)))
         except serial.SerialTimeoutException:
             return None
 
+    def _encode(self, value):
+        """Converts a str to bytes with the reader encoding.
+        """
+        if isinstance(value, (bytes, bytearray)):
+            return bytes(value)
+        return value.encode(self.encoding or 'utf-8')
+
+    def _decode(self, frame):
+        """Converts a frame to the output format without intermediate copies.
+        """
+        if self._decoder is not None:
+            return self._decoder(frame)
+        if self.encoding is None:
+            return bytes(frame)
+        return str(frame, self.encoding)
+
+    def _read_frame(self, port):
+        """Reads from port directly into the framer buffer until a frame is complete.
+        Returns None, if no frame is completed within the serial timeout.
+        """
+        framer = self._framer
+        timeout = port.timeout
+        endtime = None if timeout is None else time.monotonic() + timeout
+        while True:
+            for frame in framer.frames():
+                return self._decode(frame)
+            if endtime is not None and time.monotonic() > endtime:
+                return None
+            view = framer.writable()
+            count = port.readinto(view[:max(1, min(port.in_waiting, len(view)))])
+            if not count:
+                return None
+            framer.commit(count)
+
     @staticmethod
     def available_ports():
         return list(str(x) for x in serial.tools.list_ports.comports())
@@ -100,26 +196,180 @@ class SerialReader(Reader):
     def connect(self):
         """Connects to serial instance.
         """
+        if self._bus is not None:
+            self._bus.attach(self)
+            return
         self.serial.open()
+        if self._streaming:
+            self.start_streaming()
 
     @only_connected(action='pass')
     def disconnect(self):
         """Disconnects from serial instance.
         """
+        if self._bus is not None:
+            self._bus.detach(self)
+            return
+        self._stop_stream_thread()
         self.serial.close()
 
+    def ping(self):
+        """Checks that the serial port is still there, eg. a USB adapter is plugged in.
+        @returns bool -- False if the port is not open or cannot be queried
+        """
+        try:
+            self.serial.in_waiting
+        except (AttributeError, OSError, serial.SerialException):
+            return False
+        return bool(self.connected)
+
+    # Streaming mode
+    @property
+    def streaming(self):
+        """Returns if the background reader thread is running.
+        """
+        return self._stream_thread is not None
+
+    def start_streaming(self):
+        """Starts reading the serial continuously on a background thread.
+        Incoming data is drained in chunks of up to 'chunk_size' bytes and split into
+        frames according to 'read_mode' and 'end_mark'. At most 'max_frames' frames are
+        buffered; the oldest frames are dropped when the buffer is full.
+        Frames are read with read(), read_nowait() or frames().
+        """
+        if self._bus is not None:
+            raise RuntimeError("Streaming is not available on a shared port.")
+        self._streaming = True
+        if self.streaming or not self.connected:
+            return
+        self._frames = RingBuffer(max(1, self._max_frames), 'drop-oldest')
+        self._stream_framer = self._make_framer()
+        self._stream_stop.clear()
+        self._stream_thread = threading.Thread(
+            target=self._stream, daemon=True,
+            name="{}-{}".format(self.__class__.__name__, self.serial.port))
+        self._stream_thread.start()
+
+    def stop_streaming(self):
+        """Stops the background reader thread. Buffered frames can still be read.
+        """
+        self._streaming = False
+        self._stop_stream_thread()
+
+    def _stop_stream_thread(self):
+        thread = self._stream_thread
+        if thread is None:
+            return
+        self._stream_stop.set()
+        if hasattr(self.serial, 'cancel_read'):
+            self.serial.cancel_read()
+        thread.join()
+        self._stream_thread = None
+        self._frames.close()
+
+    def _make_framer(self):
+        """Returns a framer for the current read mode.
+        """
+        if self.read_mode == 'frame':
+            return self._framer
+        capacity = max(65536, 2 * self._chunk_size)
+        if self.read_mode == 'bytes':
+            return FixedLengthFramer(self.max_bytes, capacity=capacity)
+        mark = b'\n' if self.read_mode == 'line' else self._encode(self.end_mark)
+        return DelimiterFramer(mark, include_delimiter=True, capacity=capacity)
+
+    def _stream(self):
+        """Drains the serial into frames until stopped.
+        Frames that cannot be decoded are logged, counted in decode_errors and dropped.
+        When the thread stops on an error, streaming() turns False and the frame buffer
+        is closed.
+        """
+        framer = self._stream_framer
+        frames = self._frames
+        try:
+            while not self._stream_stop.is_set():
+                view = framer.writable()
+                try:
+                    count = self.serial.readinto(
+                        view[:max(1, min(self.serial.in_waiting, self._chunk_size,
+                                         len(view)))])
+                except (serial.SerialException, TypeError, OSError) as e:
+                    if not self._stream_stop.is_set():
+                        self.log("Streaming stopped. Message: '{}'.", logging.ERROR, e)
+                    return
+                if not count:
+                    continue
+                framer.commit(count)
+                for frame in framer.frames():
+                    try:
+                        item = self._decode(frame)
+                    except Exception as e:
+                        self.decode_errors += 1
+                        self.log("Dropped a frame that could not be decoded. Message: '{}'.",
+                                 logging.WARN, e)
+                        continue
+                    frames.put(item)
+        finally:
+            if self._stream_thread is threading.current_thread():
+                self._stream_thread = None
+                frames.close()
+
+    def read_nowait(self):
+        """Returns the next frame from the stream without waiting.
+        @returns str -- Frame, or None if no frame is available.
+        """
+        if self._frames is None:
+            raise RuntimeError("{} not streaming.".format(self.__class__.__name__))
+        try:
+            return self._frames.get(timeout=0)
+        except queue.Empty:
+            return None
+
+    def frames(self, timeout=None):
+        """Yields frames from the stream as they arrive.
+        Stops when streaming is stopped and all buffered frames have been read, or when
+        no frame arrives within timeout seconds.
+        """
+        if self._frames is None:
+            raise RuntimeError("{} not streaming.".format(self.__class__.__name__))
+        frames = self._frames
+        while True:
+            try:
+                yield frames.get(timeout=timeout)
+            except queue.Empty:
+                return
+
+    def flush_frames(self):
+        """Discards all buffered frames.
+        """
+        if self._frames is None:
+            return
+        while self.read_nowait() is not None:
+            pass
+
     @property
     def connected(self):
         """Returns if serial is connected.
         """
+        if self._bus is not None:
+            return self._bus.attached(self)
         return self.serial.is_open
 
     @property
     def serial(self):
         """Returns the internal serial instance.
+        On a shared port, this is the serial instance of the bus.
         """
+        if self._bus is not None:
+            return self._bus.serial
         return self._serial
 
+    @property
+    def bus(self):
+        """Returns the SerialBus of a shared port, or None.
+        """
+        return self._bus
+
     @property
     def read_command(self):
         """Read command is sent over serial to trigger a data read.
@@ -128,13 +378,16 @@ class SerialReader(Reader):
 
     @read_command.setter
     def read_command(self, read_command):
-        """Sets the read command.
+        """Sets the read command, either as str or bytes.
         """
-        self._read_command = str(read_command) if read_command is not None else None
+        if read_command is not None and not isinstance(read_command, (bytes, bytearray)):
+            read_command = str(read_command)
+        self._read_command = read_command
 
     @property
     def encoding(self):
         """Encoding to use for converting unicode strings to byte strings.
+        If None, data is returned as bytes.
         """
         return self._encoding
 
@@ -147,7 +400,8 @@ class SerialReader(Reader):
     @property
     def read_mode(self):
         """Read mode in use.
-        Currently, either 'line' to read a single line, or 'bytes' to read up to 'max_bytes'.
+        Either 'line' to read a single line, 'bytes' to read up to 'max_bytes',
+        'until' to read until 'end_mark', or 'frame' to read a frame with 'framer'.
         """
         return self._read_mode
 
@@ -179,6 +433,28 @@ class SerialReader(Reader):
 
     @end_mark.setter
     def end_mark(self, value):
-        """Set the end mark value for read mode 'until'.
+        """Set the end mark value for read mode 'until', either as str or bytes.
+        """
+        if not isinstance(value, (bytes, bytearray)):
+            value = str(value)
+        self._end_mark = value
+
+    @property
+    def framer(self):
+        """Framer used in read mode 'frame'.
         """
-        self._end_mark = str(value)
+        return self._framer
+
+    @framer.setter
+    def framer(self, framer):
+        self._framer = framer
+
+    @property
+    def decoder(self):
+        """Function that converts a frame to a record, eg. a StructDecoder.
+        """
+        return self._decoder
+
+    @decoder.setter
+    def decoder(self, decoder):
+        self._decoder = decoder
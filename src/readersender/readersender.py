@@ -9,9 +9,10 @@ ReaderSender abstract base class for readers and senders.
 """
 import abc
 import sys
+import time
 import logging
-import logging.handlers
-from .helpers import only_connected, only_disconnected
+from .helpers import only_connected, only_disconnected, bind_guards, guarded_methods
+from .metrics import Metrics, INSTRUMENTED_METHODS, instrument
 
 
 class ReaderSender(object, metaclass=abc.ABCMeta):
@@ -19,10 +20,16 @@ class ReaderSender(object, metaclass=abc.ABCMeta):
     Takes care of some basic functionality and interfaces.
     @version  1.0
     """
-    def __init__(self, logger=None, loglevel=logging.INFO):
+    def __init__(self, logger=None, loglevel=logging.INFO, log_every=None, log_interval=None,
+                 metrics=True):
         """Initializes a new ReaderSender object.
         After initialization, you can set eg. debug_mode, silent_mode, and log_format
         parameter.
+        @param log_every : int - Log only every Nth occurrence of a repetitive message
+        @param log_interval : float - Minimum seconds between occurrences of a repetitive
+            message in the log
+        @param metrics : bool/str - If True or a name, the latencies, errors and timeouts
+            of connect, disconnect, read and send calls are recorded (see metrics.py)
         """
         if logger is not None:
             self._loggers = [logger.getChild(__class__.__name__)]
@@ -30,8 +37,48 @@ class ReaderSender(object, metaclass=abc.ABCMeta):
             self._loggers = [logging.getLogger(__class__.__name__)]
             self._loggers[0].addHandler(logging.StreamHandler(sys.stdout))
         self._loggers[0].setLevel(loglevel)
+        self._log_every = int(log_every) if log_every else None
+        self._log_interval = float(log_interval) if log_interval else None
+        self._log_counts = {}
 
+        if metrics:
+            self._metrics = Metrics(metrics if isinstance(metrics, str)
+                                    else self.__class__.__name__)
+            if callable(getattr(self, 'stats', None)):
+                self._metrics.gauge(None, self.stats)
         self._connected = False
+        self._bind_methods()
+
+    def _bind_methods(self):
+        """Binds the guarded methods for the connection state, and instruments the other
+        methods in INSTRUMENTED_METHODS into the instance dictionary.
+        """
+        d = self.__dict__
+        if type(self).connected is ReaderSender.connected:
+            bind_guards(self, bool(self._connected_state))
+        if self._metrics is not None:
+            for name in INSTRUMENTED_METHODS:
+                if name not in d and callable(getattr(self, name, None)):
+                    d[name] = self._instrument(name, getattr(self, name))
+
+    def _bound_names(self):
+        """Returns the names of the methods bound by _bind_methods().
+        """
+        return set(INSTRUMENTED_METHODS).union(
+            name for name, _ in guarded_methods(type(self)))
+
+    def __getstate__(self):
+        """Returns the instance dictionary without methods bound to this instance, for
+        copy and pickle.
+        """
+        names = self._bound_names()
+        return {key: value for key, value in self.__dict__.items() if key not in names}
+
+    def __setstate__(self, state):
+        """Restores the state and binds the methods to this instance.
+        """
+        self.__dict__.update(state)
+        self._bind_methods()
 
     @property
     def logger(self):
@@ -52,9 +99,41 @@ class ReaderSender(object, metaclass=abc.ABCMeta):
         """
         return self._loggers
 
+    @property
+    def metrics(self):
+        """Returns the Metrics of the reader/sender, or None if metrics are disabled.
+        """
+        return self._metrics
+
+    _metrics = None
+
+    def _instrument(self, name, method):
+        """Returns method wrapped to record its metrics, if name is instrumented.
+        """
+        if self._metrics is None or name not in INSTRUMENTED_METHODS:
+            return method
+        return instrument(method, self._metrics, name)
+
     @property
     def connected(self):
-        return self._connected
+        return self._connected_state
+
+    # Connection state as set by the implementations
+    _connected_state = False
+
+    @property
+    def _connected(self):
+        return self._connected_state
+
+    @_connected.setter
+    def _connected(self, value):
+        """Sets the connection state.
+        Unless a subclass defines its own 'connected', the guarded methods are rebound
+        for the new state, so that they are called without checking the state.
+        """
+        self._connected_state = value
+        if type(self).connected is ReaderSender.connected:
+            bind_guards(self, bool(value))
 
     @only_disconnected(action='pass')
     def connect(self):
@@ -69,11 +148,71 @@ class ReaderSender(object, metaclass=abc.ABCMeta):
         """
         self._connected = False
 
-    def log(self, msg, loglevel):
+    def ping(self):
+        """Checks that the connection is alive, eg. with a no-op request.
+        Subclasses that can detect a broken connection should override this.
+        @returns bool -- False if the connection is broken, or None if it cannot be checked
+        """
+        return None
+
+    def log_enabled(self, loglevel):
+        """Returns if a message with given loglevel would be logged by any logger.
+        Uses the level caches of the loggers.
+        """
+        for logger in self._loggers:
+            if logger.isEnabledFor(loglevel):
+                return True
+        return False
+
+    def log(self, msg, loglevel, *args):
         """Logs to all loggers a msg with given loglevel.
+        If args are given, the msg is formatted with msg.format(*args), but only when
+        the message is actually logged. Wrap costly args in helpers.lazy() to defer
+        computing them as well.
+        With log_every or log_interval set, repetitive messages (same msg and loglevel)
+        are sampled, and the number of suppressed messages is added to the next one.
+        """
+        for logger in self._loggers:
+            if logger.isEnabledFor(loglevel):
+                break
+        else:
+            return
+        if self._log_every is not None or self._log_interval is not None:
+            suppressed = self._log_suppressed(msg, loglevel)
+            if suppressed is None:
+                return
+        else:
+            suppressed = 0
+        if args:
+            msg = msg.format(*args)
+        if suppressed:
+            msg = "{} ({} similar messages suppressed)".format(msg, suppressed)
+        for logger in self._loggers:
+            logger.log(loglevel, msg)
+
+    def _log_suppressed(self, msg, loglevel):
+        """Counts an occurrence of a message.
+        @returns int -- Number of suppressed messages since the previous logged one, or
+            None if this message should be suppressed.
         """
-        for logger in self.loggers:
-            logger.log(loglevel, "{}".format(msg))
+        key = (msg, loglevel)
+        counts = self._log_counts.get(key)
+        now = time.monotonic()
+        if counts is None:
+            if len(self._log_counts) >= 1000:
+                # Messages are not repetitive, eg. preformatted strings
+                self._log_counts.clear()
+            self._log_counts[key] = [1, now, 0]
+            return 0
+        counts[0] += 1
+        if (self._log_every is not None and (counts[0] - 1) % self._log_every != 0) or \
+                (self._log_interval is not None and now - counts[1] < self._log_interval):
+            counts[2] += 1
+            return None
+        suppressed = counts[2]
+        counts[1] = now
+        counts[2] = 0
+        return suppressed
 
     # Context Manager implementation
     def __enter__(self):
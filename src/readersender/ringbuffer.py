@@ -0,0 +1,139 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Bounded, thread-safe ring buffer with overflow policies.
+
+@file           ringbuffer.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import queue
+import threading
+import collections
+
+
+class RingBuffer(object):
+    """A bounded FIFO buffer between a producer and a consumer thread.
+    When the buffer is full, the overflow policy decides what happens on put:
+        'block' -- the producer waits until there is space (or a timeout expires).
+        'drop-oldest' -- the oldest item is discarded to make space.
+        'drop-newest' -- the new item is discarded.
+    @version 1.0
+    """
+    OVERFLOW_POLICIES = ['block', 'drop-oldest', 'drop-newest']
+
+    def __init__(self, maxsize=1000, overflow_policy='block'):
+        """Initializes a new RingBuffer.
+        @param maxsize : int - Maximum number of items in the buffer
+        @param overflow_policy : str - One of OVERFLOW_POLICIES
+        """
+        maxsize = int(maxsize)
+        if maxsize < 1:
+            raise ValueError("Buffer size must be positive, got '{}'.".format(maxsize))
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise AttributeError("Overflow policy unknown '{}'.".format(overflow_policy))
+        self._maxsize = maxsize
+        self._overflow_policy = overflow_policy
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._closed = False
+        self.enqueued = 0
+        self.dequeued = 0
+        self.dropped = 0
+        self.high_watermark = 0
+
+    @property
+    def maxsize(self):
+        """Maximum number of items in the buffer.
+        """
+        return self._maxsize
+
+    @property
+    def overflow_policy(self):
+        """Policy used when the buffer is full.
+        """
+        return self._overflow_policy
+
+    @property
+    def closed(self):
+        """Returns if the buffer has been closed for new items.
+        """
+        return self._closed
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item, timeout=None):
+        """Adds an item to the buffer.
+        @param timeout : float - Maximum time to wait for space with the 'block' policy
+        @returns bool -- True if the item was added, False if it was dropped.
+        @raises RuntimeError if the buffer is closed.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Buffer is closed.")
+            if len(self._items) >= self._maxsize:
+                if self._overflow_policy == 'drop-newest':
+                    self.dropped += 1
+                    return False
+                elif self._overflow_policy == 'drop-oldest':
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    endtime = None if timeout is None else time.monotonic() + timeout
+                    while len(self._items) >= self._maxsize and not self._closed:
+                        remaining = None if endtime is None else endtime - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._not_full.wait(remaining)
+                    if self._closed:
+                        raise RuntimeError("Buffer is closed.")
+            self._items.append(item)
+            self.enqueued += 1
+            self.high_watermark = max(self.high_watermark, len(self._items))
+            self._not_empty.notify()
+            return True
+
+    def get(self, timeout=None):
+        """Removes and returns the oldest item in the buffer.
+        @param timeout : float - Maximum time to wait for an item
+        @raises queue.Empty if no item is available in time, or the buffer is
+            closed and empty.
+        """
+        with self._lock:
+            endtime = None if timeout is None else time.monotonic() + timeout
+            while not self._items:
+                if self._closed:
+                    raise queue.Empty
+                remaining = None if endtime is None else endtime - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._not_empty.wait(remaining)
+            item = self._items.popleft()
+            self.dequeued += 1
+            self._not_full.notify()
+            return item
+
+    def close(self):
+        """Closes the buffer for new items and wakes up all waiting threads.
+        Items already in the buffer can still be read.
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def stats(self):
+        """Returns the buffer counters as a dictionary.
+        """
+        return {
+            'queued': len(self._items),
+            'enqueued': self.enqueued,
+            'dequeued': self.dequeued,
+            'dropped': self.dropped,
+            'high_watermark': self.high_watermark,
+        }
@@ -0,0 +1,188 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Timestamped samples of read data.
+
+@file           sample.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import array
+import datetime
+
+
+class SampleClock(object):
+    """A wall clock that advances with the monotonic clock.
+    Timestamps are taken from the monotonic clock and converted to wall time with an
+    anchor pair, so they never jump backwards between resyncs. The anchor is resynced
+    with the wall clock every 'resync_interval' seconds.
+    @version 1.0
+    """
+    def __init__(self, resync_interval=60.0):
+        self._resync_interval = int(resync_interval * 1e9)
+        self.resync()
+
+    def resync(self):
+        """Anchors the clock to the current wall time.
+        """
+        self._monotonic = time.monotonic_ns()
+        self._offset = time.time_ns() - self._monotonic
+
+    def now(self):
+        """Returns the current (wall time, monotonic time) in integer nanoseconds.
+        """
+        monotonic = time.monotonic_ns()
+        if monotonic - self._monotonic > self._resync_interval:
+            self.resync()
+        return monotonic + self._offset, monotonic
+
+
+CLOCK = SampleClock()
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def isoformat(time_ns):
+    """Returns a wall time in nanoseconds as an ISO 8601 string in UTC, as
+    datetime.utcnow().isoformat() would.
+    """
+    return (_EPOCH + datetime.timedelta(microseconds=time_ns // 1000)).isoformat()
+
+
+class Sample(object):
+    """A data item with its capture time, sequence number and source.
+    The timestamps are integers, and are only formatted when needed, eg. in as_dict().
+    @version 1.0
+    """
+    __slots__ = ('time_ns', 'monotonic_ns', 'seq', 'source', 'payload')
+
+    def __init__(self, payload, seq=0, source=None, time_ns=None, monotonic_ns=None):
+        """Initializes a new Sample.
+        @param payload - Read data
+        @param seq : int - Sequence number of the sample from its source
+        @param source : str - Source id, eg. the name of the reader
+        @param time_ns : int - Wall time of capture in nanoseconds since the epoch
+            (default: now)
+        @param monotonic_ns : int - Monotonic time of capture in nanoseconds
+        """
+        if time_ns is None:
+            time_ns, monotonic_ns = CLOCK.now()
+        self.time_ns = time_ns
+        self.monotonic_ns = monotonic_ns
+        self.seq = seq
+        self.source = source
+        self.payload = payload
+
+    @property
+    def timestamp(self):
+        """Wall time of capture in seconds since the epoch.
+        """
+        return self.time_ns / 1e9
+
+    def isoformat(self):
+        """Returns the wall time of capture as an ISO 8601 string in UTC.
+        """
+        return isoformat(self.time_ns)
+
+    def as_dict(self):
+        """Returns the sample as a dictionary, eg. for JSON.
+        """
+        return {'ts': self.isoformat(), 'seq': self.seq, 'source': self.source,
+                'd': self.payload}
+
+    def __eq__(self, other):
+        if not isinstance(other, Sample):
+            return NotImplemented
+        return (self.time_ns, self.monotonic_ns, self.seq, self.source, self.payload) == \
+            (other.time_ns, other.monotonic_ns, other.seq, other.source, other.payload)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Sample({!r}, seq={}, source={!r}, ts='{}')".format(
+            self.payload, self.seq, self.source, self.isoformat())
+
+
+def sample_default(value):
+    """Converts a Sample for json.dumps(), eg. json.dumps(data, default=sample_default).
+    """
+    if isinstance(value, Sample):
+        return value.as_dict()
+    raise TypeError("Object of type {} is not serializable.".format(type(value).__name__))
+
+
+class SampleBatch(object):
+    """A columnar batch of samples.
+    Timestamps and sequence numbers are stored in arrays of 64-bit integers instead of
+    a Sample object per item. Indexing and iterating create Sample objects on the fly.
+    @version 1.0
+    """
+    __slots__ = ('time_ns', 'monotonic_ns', 'seq', 'sources', 'payloads')
+
+    def __init__(self, samples=()):
+        """Initializes a new SampleBatch.
+        @param samples : iterable - Samples to add
+        """
+        self.time_ns = array.array('q')
+        self.monotonic_ns = array.array('q')
+        self.seq = array.array('q')
+        self.sources = []
+        self.payloads = []
+        self.extend(samples)
+
+    @classmethod
+    def from_payloads(cls, payloads, first_seq=0, source=None, time_ns=None,
+                      monotonic_ns=None):
+        """Returns a batch of payloads captured at the same time with consecutive sequence
+        numbers.
+        """
+        if time_ns is None:
+            time_ns, monotonic_ns = CLOCK.now()
+        batch = cls()
+        n = len(payloads)
+        batch.time_ns = array.array('q', [time_ns]) * n
+        batch.monotonic_ns = array.array('q', [monotonic_ns or 0]) * n
+        batch.seq = array.array('q', range(first_seq, first_seq + n))
+        batch.sources = [source] * n
+        batch.payloads = list(payloads)
+        return batch
+
+    def append(self, sample):
+        """Adds a sample to the batch.
+        """
+        self.time_ns.append(sample.time_ns)
+        self.monotonic_ns.append(sample.monotonic_ns or 0)
+        self.seq.append(sample.seq)
+        self.sources.append(sample.source)
+        self.payloads.append(sample.payload)
+
+    def extend(self, samples):
+        for sample in samples:
+            self.append(sample)
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            batch = SampleBatch()
+            batch.time_ns = self.time_ns[index]
+            batch.monotonic_ns = self.monotonic_ns[index]
+            batch.seq = self.seq[index]
+            batch.sources = self.sources[index]
+            batch.payloads = self.payloads[index]
+            return batch
+        return Sample(self.payloads[index], self.seq[index], self.sources[index],
+                      self.time_ns[index], self.monotonic_ns[index])
+
+    def __iter__(self):
+        for i in range(len(self.payloads)):
+            yield self[i]
+
+    def as_dicts(self):
+        """Returns the samples as a list of dictionaries, see Sample.as_dict().
+        """
+        return [{'ts': isoformat(t), 'seq': seq, 'source': source, 'd': payload}
+                for t, seq, source, payload in zip(self.time_ns, self.seq, self.sources,
+                                                   self.payloads)]
@@ -0,0 +1,171 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Interval scheduler with absolute deadlines on a monotonic clock.
+
+@file           scheduler.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import asyncio
+
+
+class SchedulerStats(object):
+    """Per-tick lateness statistics of an IntervalScheduler.
+    Lateness is the time between a deadline and the moment the tick was released.
+    @version 1.0
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Resets all statistics.
+        """
+        self.ticks = 0
+        self.overruns = 0
+        self.missed = 0
+        self.last_lateness = 0.0
+        self.min_lateness = None
+        self.max_lateness = None
+        self.total_lateness = 0.0
+
+    @property
+    def mean_lateness(self):
+        """Mean lateness over all ticks in seconds.
+        """
+        return self.total_lateness / self.ticks if self.ticks else 0.0
+
+    def record(self, lateness):
+        """Records the lateness of a released tick.
+        """
+        self.ticks += 1
+        self.last_lateness = lateness
+        self.total_lateness += lateness
+        if self.min_lateness is None or lateness < self.min_lateness:
+            self.min_lateness = lateness
+        if self.max_lateness is None or lateness > self.max_lateness:
+            self.max_lateness = lateness
+
+    def as_dict(self):
+        """Returns the statistics as a dictionary.
+        """
+        return {
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'missed': self.missed,
+            'last_lateness': self.last_lateness,
+            'min_lateness': self.min_lateness,
+            'max_lateness': self.max_lateness,
+            'mean_lateness': self.mean_lateness,
+        }
+
+
+class IntervalScheduler(object):
+    """Releases ticks at fixed intervals without drift.
+    Deadlines are absolute points on a monotonic clock, start + n * interval, so the
+    time spent between ticks does not accumulate, and wall-clock adjustments have no
+    effect. When a tick is released after the following deadline has already passed
+    (an overrun), the overrun policy decides what happens:
+        'skip' -- missed deadlines are dropped and the next tick waits for the grid.
+        'catch-up' -- missed ticks are released back-to-back until on time again.
+        'coalesce' -- missed ticks are released as a single immediate tick.
+    @version 1.0
+    """
+    OVERRUN_POLICIES = ['skip', 'catch-up', 'coalesce']
+
+    def __init__(self, interval, overrun_policy='skip', clock=time.monotonic, sleep=time.sleep):
+        """Initializes a new IntervalScheduler.
+        @param interval : float - Interval between ticks in seconds
+        @param overrun_policy : str - One of OVERRUN_POLICIES
+        @param clock : function - Monotonic clock returning seconds
+        @param sleep : function - Blocking sleep used by wait()
+        """
+        self.interval = interval
+        self.overrun_policy = overrun_policy
+        self._clock = clock
+        self._sleep = sleep
+        self._deadline = None
+        self.stats = SchedulerStats()
+
+    @property
+    def interval(self):
+        """Interval between ticks in seconds.
+        """
+        return self._interval
+
+    @interval.setter
+    def interval(self, value):
+        value = float(value)
+        if value <= 0:
+            raise ValueError("Interval must be positive, got '{}'.".format(value))
+        self._interval = value
+
+    @property
+    def overrun_policy(self):
+        """Policy for handling missed deadlines.
+        """
+        return self._overrun_policy
+
+    @overrun_policy.setter
+    def overrun_policy(self, value):
+        if value not in self.OVERRUN_POLICIES:
+            raise AttributeError("Overrun policy unknown '{}'.".format(value))
+        self._overrun_policy = value
+
+    @property
+    def next_deadline(self):
+        """Clock time of the next tick, or None if not started.
+        """
+        return self._deadline
+
+    def start(self, now=None):
+        """(Re)starts the schedule so that the first tick is due at now.
+        """
+        self._deadline = self._clock() if now is None else now
+
+    def _next_delay(self):
+        """Applies the overrun policy and returns the time to wait for the next deadline.
+        """
+        if self._deadline is None:
+            self.start()
+        now = self._clock()
+        behind = now - self._deadline
+        if behind >= self._interval:
+            # The following deadline has passed already
+            missed = int(behind // self._interval)
+            self.stats.overruns += 1
+            if self._overrun_policy == 'skip':
+                self.stats.missed += missed + 1
+                self._deadline += (missed + 1) * self._interval
+            elif self._overrun_policy == 'coalesce':
+                self.stats.missed += missed
+                self._deadline += missed * self._interval
+        return self._deadline - now
+
+    def _release(self):
+        """Records the released tick and advances to the next deadline.
+        @returns float -- Lateness of the released tick in seconds.
+        """
+        lateness = max(0.0, self._clock() - self._deadline)
+        self.stats.record(lateness)
+        self._deadline += self._interval
+        return lateness
+
+    def wait(self):
+        """Blocks until the next tick is due.
+        @returns float -- Lateness of the tick in seconds.
+        """
+        delay = self._next_delay()
+        if delay > 0:
+            self._sleep(delay)
+        return self._release()
+
+    async def wait_async(self):
+        """Waits on the running event loop until the next tick is due.
+        @returns float -- Lateness of the tick in seconds.
+        """
+        delay = self._next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._release()
@@ -13,8 +13,37 @@ from .helpers import only_connected
 
 class Sender(ReaderSender):
     """An abstract class that takes care of data processing and sending.
-    @version 1.3
+    @version 1.4
     """
+    def __init__(self, *args, codec=None, **kwargs):
+        """Initializes a new Sender.
+        @param codec : str/Codec - Codec for encoding data, eg. 'json' (see serialization.py).
+            Without a codec, each sender encodes data in its own way.
+        """
+        super().__init__(*args, **kwargs)
+        self.codec = codec
+
+    @property
+    def codec(self):
+        """Returns the codec used for encoding data, or None.
+        """
+        return self._codec
+
+    @codec.setter
+    def codec(self, codec):
+        if codec is not None:
+            # Imported here, so that the codec modules are only imported when used
+            from .serialization import get_codec
+            codec = get_codec(codec)
+        self._codec = codec
+
+    def encode(self, data):
+        """Encodes data with the codec, or returns it as is without a codec.
+        """
+        if self._codec is None:
+            return data
+        return self._codec.encode(data)
+
     @only_connected(action='warn')
     def send(self, data):
         """Send data.
@@ -24,3 +53,50 @@ class Sender(ReaderSender):
                       No return value
         """
         pass
+
+    @only_connected(action='warn')
+    def send_batch(self, batch, **kwargs):
+        """Send many data items at once.
+        @param[in]    batch   - List of data items to send
+        @remarks      Override this in subclass, if the target supports
+                      bulk transport. By default, sends items one by one.
+        """
+        for data in batch:
+            self.send(data, **kwargs)
+
+
+class SenderWrapper(Sender):
+    """An abstract sender that passes data on to another sender.
+    Subclasses add processing, eg. queueing or batching, in front of any sender.
+    @version 1.0
+    """
+    def __init__(self, sender, **kwargs):
+        """Initializes a new SenderWrapper.
+        @param sender - Sender instance to pass data to
+        """
+        kwargs.setdefault('logger', sender.logger)
+        kwargs.setdefault('loglevel', sender.logger.level)
+        super().__init__(**kwargs)
+        self._sender = sender
+
+    @property
+    def sender(self):
+        """Returns the wrapped sender.
+        """
+        return self._sender
+
+    @property
+    def connected(self):
+        return self._sender.connected
+
+    def connect(self):
+        self._sender.connect()
+
+    def disconnect(self):
+        self._sender.disconnect()
+
+    def send(self, data, **kwargs):
+        return self._sender.send(data, **kwargs)
+
+    def send_batch(self, batch, **kwargs):
+        return self._sender.send_batch(batch, **kwargs)
@@ -1,14 +1,28 @@
 #!/usr/bin/env python3
 # -*- coding: utf8
-import importlib
+from ..helpers import lazy_imports
 
-from .foosender import FooSender
-if importlib.util.find_spec("paho-mqtt"):
-    from .mqttsender import MqttSender
-else:
-    MQTTSender = None
+# Senders are imported on first access
+__getattr__, __dir__ = lazy_imports(__name__, {
+    'FooSender': '.foosender:FooSender',
+    'QueuedSender': '.queuedsender:QueuedSender',
+    'BatchingSender': '.batchingsender:BatchingSender',
+    'SpoolingSender': '.spoolingsender:SpoolingSender',
+    'TransformSender': '.transformsender:TransformSender',
+    'MultiSender': '.multisender:MultiSender',
+    'AggregatingSender': '.aggregatingsender:AggregatingSender',
+    'DeadbandSender': '.deadbandsender:DeadbandSender',
+    'MqttSender': '.mqttsender:MqttSender',
+})
 
 __all__ = [
     'FooSender',
+    'QueuedSender',
+    'BatchingSender',
+    'SpoolingSender',
+    'TransformSender',
+    'MultiSender',
+    'AggregatingSender',
+    'DeadbandSender',
     'MqttSender'
 ]
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Aggregating sender that sends window statistics instead of every data item.
+
+@file           aggregatingsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import threading
+from ..sender import SenderWrapper
+from ..aggregation import WindowAggregator
+
+
+class AggregatingSender(SenderWrapper):
+    """A sender that aggregates the numeric fields of data items over time windows, and
+    sends a record of statistics per window to another sender. See WindowAggregator for
+    the windows and the records. A window is sent when the first item after its end
+    arrives, and the current window is sent on disconnect.
+    Data items are timed by their capture time if they are Samples, and by 'clock'
+    otherwise.
+    @version 1.0
+    """
+    def __init__(self, sender, size, step=None, fields=None, statistics=None,
+                 clock=time.time, **kwargs):
+        """Initializes a new AggregatingSender.
+        @param sender - Sender instance to pass window records to
+        @param size : float - Window size in seconds
+        @param step : float - Seconds between sliding windows (default: size, ie. tumbling)
+        @param fields : list - Fields to aggregate as dotted paths (default: all numeric)
+        @param statistics : list - Statistics to send, see aggregation.STATISTICS
+        @param clock : function - Wall clock in seconds since the epoch
+        """
+        super().__init__(sender, **kwargs)
+        self._aggregator = WindowAggregator(size, step, fields, statistics)
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def aggregator(self):
+        return self._aggregator
+
+    def disconnect(self):
+        """Sends the current window and disconnects the wrapped sender.
+        """
+        try:
+            self.flush()
+        finally:
+            self._sender.disconnect()
+
+    def send(self, data, **kwargs):
+        """Adds data to the current window, and sends the windows that have ended.
+        """
+        if not self.connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        with self._lock:
+            windows = self._aggregator.add(data, self._time(data))
+        for window in windows:
+            self._sender.send(window, **kwargs)
+
+    def send_batch(self, batch, **kwargs):
+        """Adds many data items, and sends the windows that have ended as a batch.
+        """
+        if not self.connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        windows = []
+        with self._lock:
+            for data in batch:
+                windows.extend(self._aggregator.add(data, self._time(data)))
+        if windows:
+            self._sender.send_batch(windows, **kwargs)
+
+    def flush(self):
+        """Sends the current window, if it has data.
+        """
+        with self._lock:
+            windows = self._aggregator.flush()
+        for window in windows:
+            self._sender.send(window)
+
+    def _time(self, data):
+        # Samples are timed by the aggregator
+        return None if hasattr(data, 'time_ns') else self._clock()
+
+    def stats(self):
+        """Returns the numbers of received data items and sent windows.
+        """
+        return {'received': self._aggregator.received, 'windows': self._aggregator.emitted}
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Batching sender that coalesces data items into batches.
+
+@file           batchingsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import logging
+import threading
+from ..sender import SenderWrapper
+
+
+def default_sizeof(data):
+    """Estimates the size of a data item in bytes.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode('utf-8'))
+    return len(str(data))
+
+
+class BatchingSender(SenderWrapper):
+    """A sender that collects data items and sends them with send_batch() of another sender.
+    A batch is flushed when it has max_count items, when it reaches max_bytes, or when
+    its oldest item is max_age seconds old. Any remaining data is flushed on disconnect.
+    @version 1.0
+    """
+    def __init__(self, sender, max_count=100, max_bytes=None, max_age=None,
+                 sizeof=default_sizeof, **kwargs):
+        """Initializes a new BatchingSender.
+        @param sender - Sender instance to pass batches to
+        @param max_count : int - Maximum number of items in a batch
+        @param max_bytes : int - Maximum size of a batch in bytes (default: no limit)
+        @param max_age : float - Maximum age of a batch in seconds (default: no limit)
+        @param sizeof : function - Returns the size of a data item in bytes
+        """
+        super().__init__(sender, **kwargs)
+        if max_count is not None and int(max_count) < 1:
+            raise ValueError("Batch size must be positive, got '{}'.".format(max_count))
+        self._max_count = int(max_count) if max_count is not None else None
+        self._max_bytes = int(max_bytes) if max_bytes is not None else None
+        self._max_age = float(max_age) if max_age is not None else None
+        self._sizeof = sizeof
+        self._lock = threading.RLock()
+        self._batch = []
+        self._batch_kwargs = {}
+        self._batch_bytes = 0
+        self._batch_started = None
+        self._timer = None
+        self.batches = 0
+        if self.metrics is not None:
+            self.metrics.gauge('batched', self.__len__)
+            self.metrics.gauge('batches', lambda: self.batches)
+
+    def __len__(self):
+        """Returns the number of items waiting in the current batch.
+        """
+        return len(self._batch)
+
+    @property
+    def batch_age(self):
+        """Age of the current batch in seconds, or None if the batch is empty.
+        """
+        if self._batch_started is None:
+            return None
+        return time.monotonic() - self._batch_started
+
+    def disconnect(self):
+        """Flushes the current batch and disconnects the wrapped sender.
+        """
+        try:
+            self.flush()
+        finally:
+            self._sender.disconnect()
+
+    def send(self, data, **kwargs):
+        """Adds data to the current batch and flushes the batch if it is full.
+        """
+        if not self.connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        with self._lock:
+            if self._batch and kwargs != self._batch_kwargs:
+                self.flush()
+            if not self._batch:
+                self._batch_kwargs = kwargs
+                self._batch_started = time.monotonic()
+                if self._max_age is not None:
+                    self._timer = threading.Timer(self._max_age, self._flush_on_timer,
+                                                  args=(self._batch_started,))
+                    self._timer.daemon = True
+                    self._timer.start()
+            self._batch.append(data)
+            if self._max_bytes is not None:
+                self._batch_bytes += self._sizeof(data)
+            if (self._max_count is not None and len(self._batch) >= self._max_count) or \
+                    (self._max_bytes is not None and self._batch_bytes >= self._max_bytes):
+                self.flush()
+
+    def send_batch(self, batch, **kwargs):
+        """Adds many data items to the batch.
+        """
+        for data in batch:
+            self.send(data, **kwargs)
+
+    def flush(self):
+        """Sends the current batch, if any.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._batch:
+                return
+            batch, kwargs = self._batch, self._batch_kwargs
+            self._batch = []
+            self._batch_kwargs = {}
+            self._batch_bytes = 0
+            self._batch_started = None
+            self._sender.send_batch(batch, **kwargs)
+            self.batches += 1
+
+    def _flush_on_timer(self, batch_started):
+        """Flushes the batch when it has reached max_age.
+        """
+        try:
+            with self._lock:
+                # The batch may have been flushed while waiting for the lock
+                if self._batch_started == batch_started:
+                    self.flush()
+        except Exception as e:
+            self.log("Flushing batch failed. Message: '{}'.", logging.ERROR, e)
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Deadband sender that drops data items that have not changed.
+
+@file           deadbandsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import threading
+from ..sender import SenderWrapper
+from ..deadband import Deadband, DEFAULT_IGNORE
+
+
+class DeadbandSender(SenderWrapper):
+    """A sender that passes data items to another sender only when they have changed by
+    more than a deadband, or when the heartbeat is due. See Deadband for the comparison.
+    The heartbeat is checked when data arrives, so it is only as accurate as the
+    interval of the data. Data that the wrapped sender fails to send is not remembered
+    as sent, so it is passed again.
+    @version 1.0
+    """
+    def __init__(self, sender, absolute=0.0, relative=0.0, fields=None,
+                 ignore=DEFAULT_IGNORE, heartbeat=None, clock=time.monotonic, **kwargs):
+        """Initializes a new DeadbandSender.
+        @param sender - Sender instance to pass changed data to
+        @param absolute : float - Default absolute deadband of numeric fields
+        @param relative : float - Default relative deadband of numeric fields
+        @param fields : dict - Deadbands of fields by dotted path, see Deadband
+        @param ignore : list - Fields that are not compared as dotted paths
+        @param heartbeat : float - Maximum time between sent data items in seconds
+            (default: no heartbeat)
+        @param clock : function - Monotonic clock in seconds
+        """
+        super().__init__(sender, **kwargs)
+        self._deadband = Deadband(absolute, relative, fields, ignore, heartbeat, clock)
+        self._lock = threading.Lock()
+
+    @property
+    def deadband(self):
+        return self._deadband
+
+    def send(self, data, source=None, **kwargs):
+        """Sends data if it has changed.
+        @param source - Source of data, if it is not a Sample (default: one source)
+        @returns bool -- True if data was sent
+        """
+        if not self.connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        with self._lock:
+            saved = self._deadband.save()
+            changed = self._deadband.check(data, source)
+        if changed:
+            try:
+                self._sender.send(data, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._deadband.restore(saved)
+                raise
+        return changed
+
+    def send_batch(self, batch, source=None, **kwargs):
+        """Sends the data items of batch that have changed as a batch.
+        @returns int -- Number of data items sent
+        """
+        if not self.connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        with self._lock:
+            saved = self._deadband.save()
+            changed = [data for data in batch if self._deadband.check(data, source)]
+        if changed:
+            try:
+                self._sender.send_batch(changed, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._deadband.restore(saved)
+                raise
+        return len(changed)
+
+    def stats(self):
+        """Returns the numbers of sent, suppressed and heartbeat data items.
+        """
+        return self._deadband.stats()
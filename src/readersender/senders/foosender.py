@@ -18,18 +18,18 @@ class FooSender(Sender):
     """
     def connect(self):
         if self._connected:
-            self.log("{} already connected. Skipping.".
-                     format(self.__class__.__name__), logging.INFO)
+            self.log("{} already connected. Skipping.", logging.INFO,
+                     self.__class__.__name__)
             return
-        self.log("Connecting {}.".format(self.__class__.__name__), logging.INFO)
+        self.log("Connecting {}.", logging.INFO, self.__class__.__name__)
         self._connected = True
 
     def disconnect(self):
         if not self._connected:
-            self.log("{} already disconnected. Skipping.".
-                     format(self.__class__.__name__), logging.INFO)
+            self.log("{} already disconnected. Skipping.", logging.INFO,
+                     self.__class__.__name__)
             return
-        self.log("Disconnecting {}.".format(self.__class__.__name__), logging.INFO)
+        self.log("Disconnecting {}.", logging.INFO, self.__class__.__name__)
         self._connected = False
 
     def send(self, data):
@@ -37,5 +37,21 @@ class FooSender(Sender):
         """
         if not self._connected:
             raise RuntimeError("{} not connected.".format(self.__class__.__name__))
-        self.log("{} sending data.".format(self.__class__.__name__), logging.INFO)
-        sys.stdout.write(str(data) + "\n")
+        self.log("{} sending data.", logging.INFO, self.__class__.__name__)
+        sys.stdout.write(self._text(data) + "\n")
+
+    def send_batch(self, batch):
+        """Sends many data items to sys.stdout with a single write.
+        """
+        if not self._connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        self.log("{} sending {} items.", logging.INFO, self.__class__.__name__, len(batch))
+        sys.stdout.write("".join(self._text(data) + "\n" for data in batch))
+
+    def _text(self, data):
+        """Returns data as text, encoded with the codec if there is one.
+        """
+        if self.codec is None:
+            return str(data)
+        payload = self.encode(data)
+        return payload.decode('utf-8') if self.codec.text else repr(payload)
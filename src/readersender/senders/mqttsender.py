@@ -7,6 +7,9 @@ MQTTSender class.
 @author:        Juuso Korhonen (juusokorhonen on github.com)
 @license:       MIT License
 """
+import json
+import logging
+import threading
 try:
     import paho.mqtt.client as mqtt
 except ModuleNotFoundError:
@@ -15,73 +18,255 @@ except ModuleNotFoundError:
                   ImportWarning)
     mqtt = None
 from ..sender import Sender
-from ..helpers import (only_connected, only_disconnected)
-
-
-if mqtt is not None:
-    class MqttSender(Sender):
-        MQTT_DEFAULT_CONFIG = {
-            'host': 'localhost',
-            'port': 1883,
-            'keepalive': 60,
-            'bind_address': '',
-            'sync': False
-        }
-
-        def __init__(self, config=None, *args, **kwargs):
-            """Initializes a new MQTTSender.
-            """
-            super().__init__(*args, **kwargs)
-            # Any custom initialization goes here or to subclasses
-            self.config = self.MQTT_DEFAULT_CONFIG.copy()
-            if config is not None:
-                self.config.update(config)
-            self.connected = False
-            self.client = mqtt.Client()
-
-        @only_disconnected()
-        def connect(self):
-            """Connects to the MQTT instance.
-            """
-            if not self.client:
-                raise RuntimeError("Client is not initialized")
-
-            try:
-                self.client.on_connect = self.on_connect
-                conn_fun = self.client.connect if self.config.sync \
-                    else self.client.connect_async
-                conn_fun(
-                    self.config.get('host'),
-                    self.config.get('port'),
-                    self.config.get('keepalive'),
-                    self.config.get('bind_address'))
-            except ConnectionRefusedError as e:
-                raise RuntimeError("Connection refused: {}".format(e))
-
-        def on_connect(self):
-            """This method is called when successfully connected to client.
-            """
-            self.connected = True
-
-        @only_connected()
-        def disconnect(self):
-            """Disconnects the MQTT instance.
-            """
-            if not self.client:
-                raise RuntimeError("Client is not initialized")
-
-            if self.connected:
-                self.client.on_disconnect = self.on_disconnect
-                self.client.disconnect()
-
-        def on_disconnect(self):
-            self.connected = False
-
-        @only_connected(action='warn')
-        def send(self, data):
-            """
-            Data to be sent.
-            @param[in]    data - String-like data to send
-            @remarks      Functionality not implemented
-            """
+from ..sample import Sample, sample_default
+
+MQTT_ERR_SUCCESS = 0
+MQTT_ERR_NO_CONN = 4
+
+
+class MqttSender(Sender):
+    """A sender that publishes data to an MQTT broker.
+    Network I/O runs on the background thread of the paho client, and send()
+    returns without waiting for the broker. At most 'max_inflight' messages can
+    be unacknowledged at a time; send() blocks (up to 'inflight_timeout') when
+    the window is full. QoS 0 messages still in flight when the connection is lost are
+    discarded by the client, and their slots are released then.
+    @version 2.0
+    """
+    MQTT_DEFAULT_CONFIG = {
+        'host': 'localhost',
+        'port': 1883,
+        'keepalive': 60,
+        'bind_address': '',
+        'client_id': '',
+        'sync': False,
+        'connect_timeout': 10.0,
+        'topic': 'readersender',
+        'qos': 0,
+        'retain': False,
+        'max_inflight': 100,
+        'inflight_timeout': 10.0,
+        'drain_timeout': 10.0,
+        'batch_as_array': False,
+    }
+
+    def __init__(self, config=None, client=None, *args, **kwargs):
+        """Initializes a new MQTTSender.
+        @param config : dict - Configuration, see MQTT_DEFAULT_CONFIG
+        @param client - MQTT client to use instead of a new paho.mqtt.client.Client
+        @remarks The topic may be a template, eg. 'sensors/{id}', which is filled
+            from the keys of dict data and the 'topic_args' of send().
+        """
+        super().__init__(*args, **kwargs)
+        # Any custom initialization goes here or to subclasses
+        self.config = self.MQTT_DEFAULT_CONFIG.copy()
+        if config is not None:
+            self.config.update(config)
+        if client is None:
+            if mqtt is None:
+                raise RuntimeError("Cannot create MQTT client without 'paho.mqtt' module.")
+            if hasattr(mqtt, 'CallbackAPIVersion'):
+                client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1,
+                                     client_id=self.config.get('client_id'))
+            else:
+                client = mqtt.Client(client_id=self.config.get('client_id'))
+        self.client = client
+        if self.config.get('qos') > 0 and hasattr(self.client, 'max_inflight_messages_set'):
+            self.client.max_inflight_messages_set(self.config.get('max_inflight'))
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
+        self.client.on_publish = self.on_publish
+
+        self._loop_started = False
+        self._connect_event = threading.Event()
+        self._completion = threading.Condition()
+        self._window = threading.BoundedSemaphore(self.config.get('max_inflight'))
+        self._inflight = {}             # mid -> qos of the messages in flight
+        self._published_mids = set()   # Published before publish() returned their mid
+        self.sent = 0
+        self.published = 0
+        self.discarded = 0
+
+    @property
+    def pending(self):
+        """Number of messages sent, but not yet published or discarded.
+        """
+        return self.sent - self.published - self.discarded
+
+    def connect(self):
+        """Connects to the MQTT instance and starts the network loop.
+        With config 'sync', waits until the connection has been established.
+        """
+        if self._loop_started:
+            return
+        if not self.client:
+            raise RuntimeError("Client is not initialized")
+
+        self._connect_event.clear()
+        try:
+            conn_fun = self.client.connect if self.config.get('sync') \
+                else self.client.connect_async
+            conn_fun(
+                self.config.get('host'),
+                self.config.get('port'),
+                self.config.get('keepalive'),
+                self.config.get('bind_address'))
+        except ConnectionRefusedError as e:
+            raise RuntimeError("Connection refused: {}".format(e))
+        self.client.loop_start()
+        self._loop_started = True
+
+        if self.config.get('sync') and \
+                not self._connect_event.wait(self.config.get('connect_timeout')):
+            self.disconnect()
+            raise RuntimeError("Connection timed out.")
+
+    def on_connect(self, client, userdata, flags, rc, *args):
+        """This method is called when the connection attempt has finished.
+        """
+        if rc == MQTT_ERR_SUCCESS:
+            self._connected = True
+            self._connect_event.set()
+        else:
+            self.log("Connection failed with code {}.", logging.ERROR, rc)
+
+    def disconnect(self):
+        """Waits for pending messages, disconnects and stops the network loop.
+        """
+        if not self._loop_started:
             return
+        if not self.client:
+            raise RuntimeError("Client is not initialized")
+
+        if self._connected and not self.wait_for_publish(self.config.get('drain_timeout')):
+            self.log("{} messages left unpublished.", logging.WARN, self.pending)
+        self.client.disconnect()
+        self.client.loop_stop()
+        self._loop_started = False
+        self._connected = False
+        with self._completion:
+            self._window = threading.BoundedSemaphore(self.config.get('max_inflight'))
+            self._inflight.clear()
+            self._published_mids.clear()
+            self.sent = self.published = self.discarded = 0
+            self._completion.notify_all()
+
+    def on_disconnect(self, client, userdata, rc, *args):
+        """This method is called when the connection is closed or lost.
+        The network loop reconnects automatically after an unexpected disconnect.
+        """
+        self._connected = False
+        if rc != MQTT_ERR_SUCCESS:
+            self.log("Unexpected disconnect with code {}.", logging.WARN, rc)
+        # The client resends QoS 1 and 2 messages after reconnecting, but not QoS 0
+        with self._completion:
+            for mid in [mid for mid, qos in self._inflight.items() if qos == 0]:
+                del self._inflight[mid]
+                self.discarded += 1
+                self._release()
+            self._completion.notify_all()
+
+    def on_publish(self, client, userdata, mid, *args):
+        """This method is called when a message has been published.
+        """
+        with self._completion:
+            if self._inflight.pop(mid, None) is None:
+                self._published_mids.add(mid)
+            self.published += 1
+            self._release()
+            self._completion.notify_all()
+
+    def _release(self):
+        try:
+            self._window.release()
+        except ValueError:
+            pass
+
+    def wait_for_publish(self, timeout=None):
+        """Waits until all sent messages have been published.
+        @returns bool -- True if no messages are pending.
+        """
+        with self._completion:
+            return self._completion.wait_for(lambda: self.pending <= 0, timeout)
+
+    def topic(self, data=None, topic_args=None):
+        """Returns the topic for data, filling in the topic template.
+        """
+        topic = self.config.get('topic')
+        if '{' not in topic:
+            return topic
+        if isinstance(data, Sample):
+            fields = {'source': data.source}
+            data = data.payload
+        else:
+            fields = {}
+        if isinstance(data, dict):
+            fields.update(data)
+        fields.update(topic_args or {})
+        return topic.format(**fields)
+
+    def encode(self, data):
+        """Encodes data into a message payload with the codec.
+        Without a codec, strings and bytes are sent as is, and other data as JSON,
+        with Samples as dictionaries.
+        """
+        if self.codec is not None:
+            return self.codec.encode(data)
+        if isinstance(data, (bytes, bytearray, str)):
+            return data
+        return json.dumps(data, default=sample_default)
+
+    def publish(self, topic, payload, qos=None, retain=None):
+        """Publishes a payload without waiting for the broker.
+        @returns MQTTMessageInfo -- Handle for tracking the message, eg. with wait_for_publish()
+        @raises RuntimeError if not connected, or the in-flight window stays full
+        """
+        if not self._loop_started:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        qos = self.config.get('qos') if qos is None else qos
+        retain = self.config.get('retain') if retain is None else retain
+
+        if not self._window.acquire(timeout=self.config.get('inflight_timeout')):
+            raise RuntimeError("Too many messages in flight.")
+        with self._completion:
+            self.sent += 1
+        info = self.client.publish(topic, payload, qos=qos, retain=retain)
+        if info.rc != MQTT_ERR_SUCCESS and not (info.rc == MQTT_ERR_NO_CONN and qos > 0):
+            # The message was not queued, so it will never be published
+            with self._completion:
+                self.sent -= 1
+                self._window.release()
+                self._completion.notify_all()
+            raise RuntimeError("Publish failed with code {}.".format(info.rc))
+        with self._completion:
+            if info.mid in self._published_mids:
+                self._published_mids.discard(info.mid)
+            else:
+                self._inflight[info.mid] = qos
+        return info
+
+    def send(self, data, topic_args=None, qos=None, retain=None):
+        """
+        Data to be sent.
+        @param[in]    data - Data to send, encoded with encode()
+        @param[in]    topic_args - Additional fields for the topic template
+        @returns      MQTTMessageInfo handle of the message
+        """
+        if not self._loop_started:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        return self.publish(self.topic(data, topic_args), self.encode(data),
+                            qos=qos, retain=retain)
+
+    def send_batch(self, batch, topic_args=None, qos=None, retain=None):
+        """Sends many data items.
+        With config 'batch_as_array', the whole batch is sent as a single array
+        to the topic of the first item. Otherwise, every item is a separate message.
+        @returns list -- MQTTMessageInfo handles of the messages
+        """
+        if self.config.get('batch_as_array'):
+            if not batch:
+                return []
+            return [self.publish(self.topic(batch[0], topic_args), self.encode(list(batch)),
+                                 qos=qos, retain=retain)]
+        return [self.send(data, topic_args=topic_args, qos=qos, retain=retain)
+                for data in batch]
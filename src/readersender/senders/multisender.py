@@ -0,0 +1,280 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Sender that dispatches data to many senders in parallel.
+
+@file           multisender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import logging
+import threading
+import concurrent.futures
+from ..sender import Sender
+from ..metrics import Histogram
+
+
+class Sink(object):
+    """A sender of a MultiSender, with its own worker thread and statistics.
+    @version 1.0
+    """
+    def __init__(self, sender, name, timeout=None, max_pending=None, histogram=None):
+        self.sender = sender
+        self.name = name
+        self.timeout = float(timeout) if timeout is not None else None
+        self.max_pending = int(max_pending) if max_pending is not None else None
+        self.histogram = histogram if histogram is not None else Histogram()
+        self.executor = None
+        self.pending = 0
+        self.sent = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.retry_at = None
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def stats(self):
+        """Returns the counters and latencies of the sink as a dictionary.
+        """
+        histogram = self.histogram.snapshot()
+        return {
+            'pending': self.pending,
+            'sent': self.sent,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'dropped': self.dropped,
+            'reconnects': self.reconnects,
+            'latency_mean': histogram['mean'],
+            'latency_p50': histogram['p50'],
+            'latency_p99': histogram['p99'],
+        }
+
+
+# Default maximum time to wait for a sender in seconds
+DEFAULT_TIMEOUT = 5.0
+
+
+class MultiSender(Sender):
+    """A sender that sends the same data to many senders at once.
+    Every sender has its own worker thread, so a slow or failing sender does not delay
+    the others. send() waits until every sender has finished or its 'timeout' has
+    passed; a sender that times out keeps sending in the background, and data for it
+    is dropped while it has 'max_pending' sends unfinished. Failures of a sender are
+    logged and counted, and only raised if every sender fails. A sender that is not
+    connected is reconnected by its sends, waiting 'retry_delay' seconds after a failed
+    attempt, doubled after every further failure up to 'max_retry_delay'; sends in the
+    meantime fail for that sender. A sender that connects in the background, eg.
+    MqttSender, is not failed while it is connecting, but data for it is dropped.
+    @version 1.0
+    """
+    def __init__(self, senders, timeout=DEFAULT_TIMEOUT, max_pending=100, wait=True,
+                 retry_delay=1.0, max_retry_delay=60.0, **kwargs):
+        """Initializes a new MultiSender.
+        @param senders : list - Sender instances
+        @param timeout : float/list - Maximum time to wait for a sender in seconds, or a
+            list with a timeout for each sender. None waits until the sender is done.
+        @param max_pending : int - Maximum number of unfinished sends per sender
+            (None: no limit)
+        @param wait : bool - If False, send() returns without waiting for the senders
+        @param retry_delay : float - Delay after the first failed reconnection in seconds
+        @param max_retry_delay : float - Upper limit for the reconnection delay
+        """
+        senders = list(senders)
+        if not senders:
+            raise AttributeError("MultiSender needs at least one sender.")
+        kwargs.setdefault('logger', senders[0].logger)
+        kwargs.setdefault('loglevel', senders[0].logger.level)
+        super().__init__(**kwargs)
+        timeouts = list(timeout) if isinstance(timeout, (list, tuple)) \
+            else [timeout] * len(senders)
+        if len(timeouts) != len(senders):
+            raise ValueError("Expected {} timeouts, got {}.".format(len(senders),
+                                                                    len(timeouts)))
+        self._sinks = []
+        for i, (sender, sink_timeout) in enumerate(zip(senders, timeouts)):
+            name = sender.metrics.name if sender.metrics is not None \
+                else "{}-{}".format(sender.__class__.__name__, i)
+            histogram = self.metrics.histogram("sink{}_send_seconds".format(i)) \
+                if self.metrics is not None else None
+            sink = Sink(sender, name, sink_timeout, max_pending, histogram)
+            self._sinks.append(sink)
+            if self.metrics is not None:
+                self.metrics.gauge("sink{}".format(i), sink.stats)
+        self._wait = wait
+        self._retry_delay = float(retry_delay)
+        self._max_retry_delay = float(max_retry_delay)
+
+    @property
+    def senders(self):
+        """Returns the wrapped senders.
+        """
+        return [sink.sender for sink in self._sinks]
+
+    @property
+    def sinks(self):
+        return list(self._sinks)
+
+    @property
+    def connected(self):
+        return self._connected
+
+    def connect(self):
+        """Connects the senders and starts their worker threads.
+        A sender that fails to connect is logged and reconnected by its sends.
+        @raises RuntimeError if no sender could be connected.
+        """
+        if self._connected:
+            return
+        failures = 0
+        for sink in self._sinks:
+            sink.executor = concurrent.futures.ThreadPoolExecutor(
+                1, thread_name_prefix="{}-{}".format(self.__class__.__name__, sink.name))
+            sink.failures, sink.retry_at = 0, None
+            if self._reconnect(sink) is False:
+                failures += 1
+                sink.errors += 1
+        if failures == len(self._sinks):
+            self._shutdown()
+            raise RuntimeError("No sender of {} could be connected.".format(
+                self.__class__.__name__))
+        self._connected = True
+
+    def disconnect(self):
+        """Waits for unfinished sends, and disconnects the senders.
+        """
+        if not self._connected:
+            return
+        self._connected = False
+        self._shutdown()
+        for sink in self._sinks:
+            try:
+                if sink.sender.connected:
+                    sink.sender.disconnect()
+            except Exception as e:
+                self.log("Disconnecting {} failed. Message: '{}'.", logging.ERROR,
+                         sink.name, e)
+
+    def _shutdown(self):
+        for sink in self._sinks:
+            if sink.executor is not None:
+                sink.executor.shutdown(wait=True)
+                sink.executor = None
+
+    def send(self, data, **kwargs):
+        """Sends data to every sender.
+        @returns list -- Senders that did not finish successfully in time
+        @raises RuntimeError if every sender failed.
+        """
+        return self._dispatch('send', data, kwargs)
+
+    def send_batch(self, batch, **kwargs):
+        """Sends a batch to every sender with their send_batch().
+        """
+        return self._dispatch('send_batch', list(batch), kwargs)
+
+    def _dispatch(self, method, data, kwargs):
+        if not self._connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        futures = []
+        for sink in self._sinks:
+            with sink._lock:
+                if sink.max_pending is not None and sink.pending >= sink.max_pending:
+                    sink.dropped += 1
+                    futures.append(None)
+                    continue
+                sink.pending += 1
+            futures.append(sink.executor.submit(self._send, sink, method, data, kwargs))
+        if not self._wait:
+            return []
+
+        failed = []
+        started = time.monotonic()
+        for sink, future in zip(self._sinks, futures):
+            if future is None:
+                failed.append(sink.name)
+                continue
+            timeout = None
+            if sink.timeout is not None:
+                timeout = max(0.0, sink.timeout - (time.monotonic() - started))
+            try:
+                if not future.result(timeout):
+                    failed.append(sink.name)
+            except concurrent.futures.TimeoutError:
+                sink.timeouts += 1
+                failed.append(sink.name)
+                self.log("{} did not finish in {} s.", logging.WARN, sink.name, sink.timeout)
+        if len(failed) == len(self._sinks):
+            raise RuntimeError("Sending failed for every sender of {}.".format(
+                self.__class__.__name__))
+        return failed
+
+    def _send(self, sink, method, data, kwargs):
+        """Sends data with one sender. Runs on the worker thread of the sink.
+        @returns bool -- True if the send succeeded
+        """
+        start = time.perf_counter_ns()
+        try:
+            if not sink.sender.connected:
+                connected = self._reconnect(sink)
+                if connected is None:
+                    sink.dropped += 1
+                    return False
+                if not connected:
+                    sink.errors += 1
+                    return False
+            getattr(sink.sender, method)(data, **kwargs)
+            sink.sent += 1
+            return True
+        except Exception as e:
+            sink.errors += 1
+            self.log("Sending with {} failed. Message: '{}'.", logging.ERROR, sink.name, e)
+            return False
+        finally:
+            sink.histogram.observe(time.perf_counter_ns() - start)
+            with sink._lock:
+                sink.pending -= 1
+
+    def _reconnect(self, sink):
+        """Connects the sender of a sink, unless a failed attempt was made too recently.
+        @returns bool -- True if the sender is connected, None if it is still connecting
+            in the background, or False if the attempt failed
+        """
+        now = time.monotonic()
+        if sink.retry_at is not None and now < sink.retry_at:
+            return False
+        try:
+            sink.sender.connect()
+        except Exception as e:
+            self.log("Connecting {} failed. Message: '{}'.", logging.ERROR, sink.name, e)
+        else:
+            if not sink.sender.connected:
+                # Connecting asynchronously, eg. MqttSender
+                return None
+        if sink.sender.connected:
+            if sink.failures:
+                sink.reconnects += 1
+            sink.failures, sink.retry_at = 0, None
+            return True
+        sink.retry_at = now + min(self._retry_delay * 2 ** sink.failures,
+                                  self._max_retry_delay)
+        sink.failures += 1
+        return False
+
+    def stats(self):
+        """Returns the totals of the senders as a dictionary. See sink_stats() for the
+        statistics of each sender.
+        """
+        totals = {'sent': 0, 'errors': 0, 'timeouts': 0, 'dropped': 0, 'pending': 0,
+                  'reconnects': 0}
+        for sink in self._sinks:
+            for key in totals:
+                totals[key] += getattr(sink, key)
+        return totals
+
+    def sink_stats(self):
+        """Returns the statistics of each sender by name.
+        """
+        return {sink.name: sink.stats() for sink in self._sinks}
@@ -0,0 +1,140 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Queued sender that decouples reading from sending.
+
+@file           queuedsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import queue
+import logging
+import threading
+from ..sender import SenderWrapper
+from ..ringbuffer import RingBuffer
+
+
+class QueuedSender(SenderWrapper):
+    """A sender that puts data in a bounded buffer and sends it on a background thread.
+    send() returns immediately, so a slow or unreachable target does not delay reading.
+    When the buffer is full, the overflow policy of RingBuffer decides what is dropped.
+    Items whose send fails are dropped and counted as 'errors'.
+    @version 1.0
+    """
+    def __init__(self, sender, maxsize=1000, overflow_policy='block', block_timeout=None,
+                 retry_delay=1.0, drain_timeout=10.0, **kwargs):
+        """Initializes a new QueuedSender.
+        @param sender - Sender instance to pass data to
+        @param maxsize : int - Maximum number of queued items
+        @param overflow_policy : str - 'block', 'drop-oldest' or 'drop-newest'
+        @param block_timeout : float - Maximum time send() blocks with the 'block' policy
+        @param retry_delay : float - Delay after a failed send before the next one
+        @param drain_timeout : float - Maximum time to send queued items on disconnect
+        """
+        super().__init__(sender, **kwargs)
+        self._maxsize = maxsize
+        self._overflow_policy = overflow_policy
+        self._block_timeout = block_timeout
+        self._retry_delay = float(retry_delay)
+        self._drain_timeout = drain_timeout
+        self._buffer = RingBuffer(maxsize, overflow_policy)
+        self._thread = None
+        self._stop = None
+        self.sent = 0
+        self.errors = 0
+
+    @property
+    def connected(self):
+        """Returns if the queue is accepting data.
+        The wrapped sender is (re)connected by the background thread.
+        """
+        return self._connected
+
+    @property
+    def buffer(self):
+        """Returns the internal buffer.
+        """
+        return self._buffer
+
+    def connect(self):
+        """Connects the wrapped sender and starts the sending thread.
+        """
+        if self._connected:
+            return
+        self._sender.connect()
+        if self._buffer.closed:
+            # Items left unsent by a disconnect that timed out are sent first. The thread
+            # that left them takes no more items.
+            old, self._buffer = self._buffer, RingBuffer(self._maxsize, self._overflow_policy)
+            while True:
+                try:
+                    self._buffer.put(old.get(timeout=0), timeout=0)
+                except queue.Empty:
+                    break
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._buffer, self._stop),
+                                        daemon=True,
+                                        name="{}-{}".format(self.__class__.__name__, id(self)))
+        self._thread.start()
+        self._connected = True
+
+    def disconnect(self):
+        """Sends the queued data, stops the sending thread and disconnects the wrapped sender.
+        If the data is not sent in drain_timeout, the thread is stopped after its current
+        send, and it disconnects the wrapped sender then. The unsent data is sent after
+        the next connect.
+        """
+        if not self._connected:
+            return
+        self._connected = False
+        self._buffer.close()
+        thread, self._thread = self._thread, None
+        thread.join(self._drain_timeout)
+        if thread.is_alive():
+            self._stop.set()
+            self.log("{} items left unsent, the sending thread is stopped after its current "
+                     "send.", logging.WARN, len(self._buffer))
+            return
+        if self._sender.connected:
+            self._sender.disconnect()
+
+    def send(self, data, **kwargs):
+        """Queues data for sending.
+        @returns bool -- True if the data was queued, False if it was dropped.
+        """
+        if not self._connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        return self._buffer.put((data, kwargs), timeout=self._block_timeout)
+
+    def _run(self, buffer, stop):
+        """Sends queued data until the buffer is closed and empty, or stop is set.
+        """
+        while True:
+            try:
+                data, kwargs = buffer.get()
+            except queue.Empty:
+                return
+            try:
+                if not self._sender.connected:
+                    self._sender.connect()
+                self._sender.send(data, **kwargs)
+                self.sent += 1
+            except Exception as e:
+                self.errors += 1
+                self.log("Sending failed. Message: '{}'.", logging.ERROR, e)
+                if not buffer.closed:
+                    time.sleep(self._retry_delay)
+            if stop.is_set():
+                # Disconnect timed out, so the wrapped sender is disconnected here, unless
+                # the queue has been connected again
+                if not self._connected and self._sender.connected:
+                    self._sender.disconnect()
+                return
+
+    def stats(self):
+        """Returns the queue counters as a dictionary.
+        """
+        stats = self._buffer.stats()
+        stats.update(sent=self.sent, errors=self.errors)
+        return stats
@@ -0,0 +1,172 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Store-and-forward sender that spools data on disk during outages.
+
+@file           spoolingsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import pickle
+import logging
+import threading
+from ..sender import SenderWrapper
+from ..spool import Spool
+
+
+class SpoolingSender(SenderWrapper):
+    """A sender that stores data in an on-disk Spool when the wrapped sender fails.
+    While the wrapped sender is connected and nothing is spooled, data is sent directly.
+    Otherwise data is appended to the spool, and a background thread reconnects the
+    wrapped sender and replays the spool in order, at most 'replay_rate' items per second.
+    Spooled data survives restarts. Data is spooled with the keyword arguments of send(),
+    eg. the topic arguments of MqttSender, as a (data, kwargs) pair that is serialized with
+    pickle by default. Consecutive items with the same arguments are replayed together.
+    Delivery is at-least-once: a replay batch that fails part-way is replayed again.
+    @version 1.0
+    """
+    def __init__(self, sender, spool, replay_batch=100, replay_rate=None, retry_delay=5.0,
+                 encode=pickle.dumps, decode=pickle.loads, **kwargs):
+        """Initializes a new SpoolingSender.
+        @param sender - Sender instance to pass data to
+        @param spool : Spool/str/dict - Spool, spool directory or arguments for Spool
+        @param replay_batch : int - Maximum number of items replayed with one send_batch()
+        @param replay_rate : float - Maximum number of replayed items per second
+        @param retry_delay : float - Delay between reconnection attempts in seconds
+        @param encode : function - Serializes a (data, kwargs) pair into bytes
+        @param decode : function - Deserializes bytes into a (data, kwargs) pair
+        """
+        super().__init__(sender, **kwargs)
+        if isinstance(spool, str):
+            spool = Spool(spool)
+        elif isinstance(spool, dict):
+            spool = Spool(**spool)
+        self._spool = spool
+        self._replay_batch = max(1, int(replay_batch))
+        self._replay_rate = float(replay_rate) if replay_rate is not None else None
+        self._retry_delay = float(retry_delay)
+        self._encode = encode
+        self._decode = decode
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.sent = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.errors = 0
+
+    @property
+    def spool(self):
+        """Returns the spool.
+        """
+        return self._spool
+
+    @property
+    def connected(self):
+        """Returns if data is being accepted.
+        The wrapped sender is (re)connected by the background thread.
+        """
+        return self._connected
+
+    def connect(self):
+        """Starts the replay thread. A failed connection of the wrapped sender is retried
+        in the background.
+        """
+        if self._connected:
+            return
+        try:
+            self._sender.connect()
+        except Exception as e:
+            self.log("Connection failed, spooling data. Message: '{}'.", logging.WARN, e)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="{}-{}".format(self.__class__.__name__, id(self)))
+        self._thread.start()
+        self._connected = True
+
+    def disconnect(self):
+        """Stops the replay thread, writes the spool to disk and disconnects.
+        Data left in the spool is replayed on the next connect.
+        """
+        if not self._connected:
+            return
+        self._connected = False
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self._spool.close()
+        if self._sender.connected:
+            self._sender.disconnect()
+
+    def send(self, data, **kwargs):
+        """Sends data, or spools it if that is not possible right now.
+        """
+        if not self._connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        if self._spool.empty and self._sender.connected:
+            try:
+                self._sender.send(data, **kwargs)
+                self.sent += 1
+                return
+            except Exception as e:
+                self.errors += 1
+                self.log("Sending failed, spooling data. Message: '{}'.", logging.WARN, e)
+        if self._spool.append(self._encode((data, kwargs))):
+            self.spooled += 1
+        self._wakeup.set()
+
+    def _run(self):
+        """Reconnects the wrapped sender and replays the spool.
+        """
+        while not self._stopping.is_set():
+            if self._spool.empty:
+                self._wakeup.wait(self._retry_delay)
+                self._wakeup.clear()
+                continue
+            try:
+                if not self._sender.connected:
+                    self._sender.connect()
+                if not self._sender.connected:
+                    self._stopping.wait(self._retry_delay)
+                    continue
+                started = time.monotonic()
+                records = self._spool.peek(self._replay_batch)
+                if not records:
+                    # Nothing readable yet, eg. records still buffered in memory
+                    self._wakeup.wait(self._retry_delay)
+                    self._wakeup.clear()
+                    continue
+                self._replay([self._decode(record) for record in records])
+                self._spool.consume(len(records))
+                self.replayed += len(records)
+                if self._replay_rate is not None:
+                    self._stopping.wait(len(records) / self._replay_rate -
+                                        (time.monotonic() - started))
+            except Exception as e:
+                self.errors += 1
+                self.log("Replay failed. Message: '{}'.", logging.ERROR, e)
+                self._stopping.wait(self._retry_delay)
+
+    def _replay(self, items):
+        """Sends (data, kwargs) pairs in batches of consecutive items with the same kwargs.
+        """
+        start = 0
+        for i in range(1, len(items) + 1):
+            if i == len(items) or items[i][1] != items[start][1]:
+                self._sender.send_batch([data for data, _ in items[start:i]],
+                                        **items[start][1])
+                start = i
+
+    def stats(self):
+        """Returns the counters as a dictionary.
+        """
+        return {
+            'sent': self.sent,
+            'spooled': self.spooled,
+            'replayed': self.replayed,
+            'errors': self.errors,
+            'dropped': self._spool.dropped,
+            'pending_bytes': self._spool.pending_bytes,
+        }
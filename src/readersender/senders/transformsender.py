@@ -0,0 +1,280 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Transforming sender that processes data in a pool of worker processes or threads.
+
+@file           transformsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import queue
+import logging
+import threading
+import concurrent.futures
+from multiprocessing import shared_memory
+from ..sender import SenderWrapper
+
+
+class SharedPayload(object):
+    """A reference to a bytes payload in shared memory, passed to a worker process
+    instead of the payload itself.
+    @version 1.0
+    """
+    __slots__ = ('name', 'size')
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def __getstate__(self):
+        return (self.name, self.size)
+
+    def __setstate__(self, state):
+        self.name, self.size = state
+
+    def load(self):
+        """Returns a copy of the payload.
+        """
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(shm.buf[:self.size])
+        finally:
+            shm.close()
+
+
+def apply_transform(transform, items):
+    """Applies transform to every item of a task. Runs in the worker.
+    """
+    return [transform(item.load() if isinstance(item, SharedPayload) else item)
+            for item in items]
+
+
+class TransformSender(SenderWrapper):
+    """A sender that applies a transform function to data in a pool of workers before
+    passing the results on to another sender.
+    With executor 'process', the transform runs in a ProcessPoolExecutor, so CPU-bound
+    work scales across cores; the transform must then be picklable, ie. a module-level
+    function. With 'thread', a ThreadPoolExecutor is used for I/O-bound work.
+    Items are grouped into tasks of 'batch_size' items to amortize the cost of passing
+    them to the workers. A partial task is submitted after 'linger' seconds, or on
+    flush() and disconnect(). Results are passed on in the order of the data if
+    'ordered', otherwise as soon as they are ready. A transform returning None drops
+    the item. bytes payloads of at least 'shared_memory_threshold' bytes are passed to
+    worker processes through shared memory instead of a pipe.
+    @version 1.0
+    """
+    EXECUTORS = ['process', 'thread']
+
+    def __init__(self, sender, transform, executor='process', max_workers=None,
+                 batch_size=1, linger=None, ordered=True, max_pending=None,
+                 shared_memory_threshold=None, **kwargs):
+        """Initializes a new TransformSender.
+        @param sender - Sender instance to pass results to
+        @param transform : function - Receives a data item and returns the result
+        @param executor : str/Executor - 'process', 'thread' or a concurrent.futures
+            Executor, which is not shut down on disconnect
+        @param max_workers : int - Number of workers (default: as in the Executor)
+        @param batch_size : int - Number of items per task
+        @param linger : float - Maximum seconds a partial task waits for more items
+        @param ordered : bool - If True, results are passed on in the order of the data
+        @param max_pending : int - Maximum number of unfinished tasks, send() blocks
+            when it is reached (default: twice the number of workers)
+        @param shared_memory_threshold : int - Minimum size of bytes payloads passed
+            through shared memory (default: never)
+        """
+        super().__init__(sender, **kwargs)
+        if not isinstance(executor, concurrent.futures.Executor) and \
+                executor not in self.EXECUTORS:
+            raise AttributeError("Executor unknown '{}'.".format(executor))
+        if int(batch_size) < 1:
+            raise ValueError("Batch size must be positive, got '{}'.".format(batch_size))
+        self._transform = transform
+        self._executor_type = executor
+        self._max_workers = max_workers
+        self._batch_size = int(batch_size)
+        self._linger = float(linger) if linger is not None else None
+        self._ordered = ordered
+        self._max_pending = int(max_pending) if max_pending is not None \
+            else 2 * (max_workers or 4)
+        self._shared_memory_threshold = shared_memory_threshold \
+            if executor == 'process' else None
+        self._lock = threading.RLock()
+        self._batch = []
+        self._timer = None
+        self._executor = None
+        self._slots = None
+        self._results = None
+        self._thread = None
+        self.submitted = 0
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+
+    @property
+    def connected(self):
+        """Returns if data is being accepted.
+        """
+        return self._connected
+
+    def connect(self):
+        """Connects the wrapped sender and starts the workers.
+        """
+        if self._connected:
+            return
+        self._sender.connect()
+        if self._executor_type == 'process':
+            self._executor = concurrent.futures.ProcessPoolExecutor(self._max_workers)
+        elif self._executor_type == 'thread':
+            self._executor = concurrent.futures.ThreadPoolExecutor(self._max_workers)
+        else:
+            self._executor = self._executor_type
+        self._slots = threading.BoundedSemaphore(self._max_pending)
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="{}-{}".format(self.__class__.__name__, id(self)))
+        self._thread.start()
+        self._connected = True
+
+    def disconnect(self):
+        """Transforms and sends the remaining data, stops the workers and disconnects
+        the wrapped sender.
+        """
+        if not self._connected:
+            return
+        self.flush()
+        self._connected = False
+        # Wait until the results of all tasks have been passed on
+        for _ in range(self._max_pending):
+            self._slots.acquire()
+        self._results.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._executor is not self._executor_type:
+            self._executor.shutdown()
+        self._executor = None
+        if self._sender.connected:
+            self._sender.disconnect()
+
+    def send(self, data, **kwargs):
+        """Adds data to the current task and submits the task if it is full.
+        """
+        if not self._connected:
+            raise RuntimeError("{} not connected.".format(self.__class__.__name__))
+        with self._lock:
+            self._batch.append((data, kwargs))
+            if len(self._batch) >= self._batch_size:
+                self._submit()
+            elif self._linger is not None and self._timer is None:
+                self._timer = threading.Timer(self._linger, self._flush_batch, [self._batch])
+                self._timer.daemon = True
+                self._timer.start()
+
+    def send_batch(self, batch, **kwargs):
+        """Adds many data items to the current task.
+        """
+        for data in batch:
+            self.send(data, **kwargs)
+
+    def flush(self):
+        """Submits the current partial task.
+        """
+        with self._lock:
+            if self._batch:
+                self._submit()
+
+    def _flush_batch(self, batch):
+        """Submits the partial task started with batch, unless it was submitted already.
+        """
+        with self._lock:
+            if self._batch is batch and self._batch:
+                self._submit()
+
+    def _submit(self):
+        """Submits the current task to the executor.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        items = []
+        shared = []
+        for data, _ in batch:
+            if self._shared_memory_threshold is not None and \
+                    isinstance(data, (bytes, bytearray, memoryview)) and \
+                    len(data) >= self._shared_memory_threshold:
+                shm = shared_memory.SharedMemory(create=True, size=len(data))
+                shm.buf[:len(data)] = data
+                shared.append(shm)
+                data = SharedPayload(shm.name, len(data))
+            items.append(data)
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(apply_transform, self._transform, items)
+        except Exception:
+            self._slots.release()
+            self._release_shared(shared)
+            raise
+        self.submitted += len(batch)
+        task = (future, [kwargs for _, kwargs in batch], shared)
+        if self._ordered:
+            self._results.put(task)
+        else:
+            future.add_done_callback(lambda _: self._results.put(task))
+
+    @staticmethod
+    def _release_shared(shared):
+        for shm in shared:
+            shm.close()
+            shm.unlink()
+
+    def _run(self):
+        """Passes the results of finished tasks on to the wrapped sender.
+        """
+        while True:
+            task = self._results.get()
+            if task is None:
+                return
+            future, kwargs_list, shared = task
+            try:
+                results = future.result()
+            except Exception as e:
+                self.errors += 1
+                self.dropped += len(kwargs_list)
+                self.log("Transform failed. Message: '{}'.", logging.ERROR, e)
+                results = None
+            finally:
+                self._release_shared(shared)
+            if results is not None:
+                self._deliver(results, kwargs_list)
+            self._slots.release()
+
+    def _deliver(self, results, kwargs_list):
+        """Sends the results of a task, dropping None results.
+        """
+        try:
+            if not any(kwargs_list):
+                batch = [result for result in results if result is not None]
+                self.dropped += len(results) - len(batch)
+                if batch:
+                    self._sender.send_batch(batch)
+                    self.sent += len(batch)
+                return
+            for result, kwargs in zip(results, kwargs_list):
+                if result is None:
+                    self.dropped += 1
+                    continue
+                self._sender.send(result, **kwargs)
+                self.sent += 1
+        except Exception as e:
+            self.errors += 1
+            self.log("Sending failed. Message: '{}'.", logging.ERROR, e)
+
+    def stats(self):
+        """Returns the counters as a dictionary.
+        """
+        return {
+            'submitted': self.submitted,
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
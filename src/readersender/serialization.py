@@ -0,0 +1,302 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Codecs that serialize data for senders.
+
+@file           serialization.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import json
+import math
+import json.encoder
+from .sample import Sample
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+try:
+    import msgpack
+except ModuleNotFoundError:
+    msgpack = None
+try:
+    import cbor2
+except ModuleNotFoundError:
+    cbor2 = None
+
+
+def _default(value):
+    """Converts values that JSON does not support, eg. NumPy arrays and scalars, and
+    Samples.
+    """
+    if isinstance(value, Sample):
+        return value.as_dict()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode('latin-1')
+    raise TypeError("Object of type {} is not serializable.".format(type(value).__name__))
+
+
+class Codec(object):
+    """An abstract codec that encodes data into bytes and back.
+    @version 1.0
+    """
+    name = None
+    text = True         # If True, the encoded data is UTF-8 text
+    separator = b'\n'   # Separates items in encode_batch()
+    scheme_aware = False
+    module = True       # Module required by the codec, or None if it is not installed
+
+    def __init__(self):
+        if self.module is None:
+            raise RuntimeError("Codec '{}' is not available.".format(self.name))
+        self._buffer = bytearray()
+
+    @classmethod
+    def available(cls):
+        """Returns if the modules required by the codec are installed.
+        """
+        return cls.module is not None
+
+    def encode(self, data):
+        """Encodes data into bytes.
+        Implement this in subclass.
+        """
+        raise NotImplementedError
+
+    def decode(self, payload):
+        """Decodes bytes into data.
+        Implement this in subclass.
+        """
+        raise NotImplementedError
+
+    def encode_batch(self, batch):
+        """Encodes many data items into a single payload, eg. JSON lines.
+        The items are collected in a reusable buffer.
+        """
+        buffer = self._buffer
+        del buffer[:]
+        separator = self.separator
+        for data in batch:
+            buffer += self.encode(data)
+            buffer += separator
+        return bytes(buffer)
+
+
+class StrCodec(Codec):
+    """Encodes data with str(), as FooSender has always done. Cannot decode.
+    """
+    name = 'str'
+
+    def encode(self, data):
+        if isinstance(data, (bytes, bytearray)):
+            return bytes(data)
+        return str(data).encode('utf-8')
+
+    def decode(self, payload):
+        return bytes(payload).decode('utf-8')
+
+
+class JsonCodec(Codec):
+    """Encodes data as compact JSON with the standard library.
+    """
+    name = 'json'
+
+    def __init__(self):
+        super().__init__()
+        self._encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+    def encode(self, data):
+        return self._encoder.encode(data).encode('utf-8')
+
+    def decode(self, payload):
+        return json.loads(payload)
+
+
+class OrjsonCodec(Codec):
+    """Encodes data as JSON with orjson, including NumPy arrays.
+    Unlike the standard library, NaN and infinity are encoded as null.
+    """
+    name = 'orjson'
+    module = orjson
+
+    def __init__(self):
+        super().__init__()
+        self._option = orjson.OPT_SERIALIZE_NUMPY
+
+    def encode(self, data):
+        return orjson.dumps(data, default=_default, option=self._option)
+
+    def decode(self, payload):
+        return orjson.loads(payload)
+
+
+class MsgpackCodec(Codec):
+    """Encodes data as MessagePack. Batches are a stream of concatenated messages.
+    """
+    name = 'msgpack'
+    text = False
+    separator = b''
+    module = msgpack
+
+    def __init__(self):
+        super().__init__()
+        self._packer = msgpack.Packer(use_bin_type=True, default=_default)
+        self._batch_packer = msgpack.Packer(use_bin_type=True, default=_default,
+                                            autoreset=False)
+
+    def encode(self, data):
+        return self._packer.pack(data)
+
+    def decode(self, payload):
+        return msgpack.unpackb(payload, raw=False)
+
+    def encode_batch(self, batch):
+        packer = self._batch_packer
+        try:
+            for data in batch:
+                packer.pack(data)
+            return packer.bytes()
+        finally:
+            packer.reset()
+
+
+class CborCodec(Codec):
+    """Encodes data as CBOR. Batches are a sequence of concatenated items.
+    """
+    name = 'cbor'
+    text = False
+    separator = b''
+    module = cbor2
+
+    def encode(self, data):
+        return cbor2.dumps(data, default=lambda encoder, value: encoder.encode(_default(value)))
+
+    def decode(self, payload):
+        return cbor2.loads(payload)
+
+
+def _encode_float(value):
+    if math.isfinite(value):
+        return float.__repr__(value)
+    return 'NaN' if value != value else ('Infinity' if value > 0 else '-Infinity')
+
+
+class SchemaJsonCodec(JsonCodec):
+    """Encodes records that have the shape of a SchemeReader scheme as compact JSON.
+    The scheme is compiled into a template with the keys already in place, so only
+    the values are encoded for each record. The output is the same as with the 'json'
+    codec. Records that do not fit the scheme, eg. with missing or extra keys or list
+    items, fall back to the 'json' codec.
+    """
+    name = 'schema-json'
+    scheme_aware = True
+
+    _SCALARS = {
+        str: json.encoder.encode_basestring_ascii,
+        float: _encode_float,
+        int: int.__repr__,
+        bool: lambda value: 'true' if value else 'false',
+        type(None): lambda value: 'null',
+    }
+
+    def __init__(self, scheme):
+        """Initializes a new SchemaJsonCodec.
+        @param scheme : dict/list - Scheme of the records, eg. SchemeReader.scheme
+        @raises AttributeError if the scheme has keys that are not strings.
+        """
+        super().__init__()
+        template, paths, sizes = self._compile(scheme, '')
+        scalars = self._SCALARS
+        encoder = self._encoder
+
+        def value(v, get=scalars.get, fallback=encoder.encode):
+            return get(type(v), fallback)(v)
+
+        args = ", ".join("value(data{})".format(path) for path in paths)
+        # Records with the keys of the scheme and more are detected by their sizes
+        fits = " and ".join("len(data{}) == {}".format(path, size) for path, size in sizes)
+        # The keys are rendered with repr(), so the source only contains literals
+        source = "lambda data: {!r} % ({}{}) if {} else None".format(
+            template, args, "," if paths else "", fits or "True")
+        self._template = eval(source, {'value': value})
+
+    @classmethod
+    def _compile(cls, scheme, path):
+        """Returns the %-template of scheme, the item paths of its values, and the
+        (path, size) pairs of its dictionaries and lists.
+        """
+        if isinstance(scheme, dict):
+            parts = []
+            paths = []
+            sizes = [(path, len(scheme))]
+            for key, item in scheme.items():
+                if not isinstance(key, str):
+                    raise AttributeError("Cannot encode key '{}' as JSON.".format(key))
+                template, item_paths, item_sizes = cls._compile(
+                    item, "{}[{!r}]".format(path, key))
+                parts.append(json.encoder.encode_basestring_ascii(key).replace('%', '%%') +
+                             ':' + template)
+                paths.extend(item_paths)
+                sizes.extend(item_sizes)
+            return '{' + ','.join(parts) + '}', paths, sizes
+        if isinstance(scheme, (list, tuple)):
+            parts = []
+            paths = []
+            sizes = [(path, len(scheme))]
+            for i, item in enumerate(scheme):
+                template, item_paths, item_sizes = cls._compile(
+                    item, "{}[{}]".format(path, i))
+                parts.append(template)
+                paths.extend(item_paths)
+                sizes.extend(item_sizes)
+            return '[' + ','.join(parts) + ']', paths, sizes
+        return '%s', [path], []
+
+    def encode(self, data):
+        try:
+            text = self._template(data)
+        except (KeyError, IndexError, TypeError):
+            text = None
+        if text is None:
+            return super().encode(data)
+        return text.encode('utf-8')
+
+
+CODECS = {}
+
+
+def register_codec(codec_class, name=None):
+    """Registers a codec class by its name.
+    """
+    CODECS[name or codec_class.name] = codec_class
+
+
+def available_codecs():
+    """Returns the names of the codecs that can be used.
+    """
+    return [name for name, codec_class in CODECS.items() if codec_class.available()]
+
+
+def get_codec(name, scheme=None):
+    """Returns a new codec by name. A Codec instance is returned as is.
+    @param scheme : dict/list - Scheme of the records for scheme-aware codecs
+    @raises AttributeError if the codec is unknown, or needs a scheme.
+    @raises RuntimeError if the codec is not installed.
+    """
+    if isinstance(name, Codec):
+        return name
+    codec_class = CODECS.get(name)
+    if codec_class is None:
+        raise AttributeError("Codec unknown '{}'.".format(name))
+    if codec_class.scheme_aware:
+        if scheme is None:
+            raise AttributeError("Codec '{}' requires a scheme.".format(name))
+        return codec_class(scheme)
+    return codec_class()
+
+
+for _codec_class in (StrCodec, JsonCodec, OrjsonCodec, MsgpackCodec, CborCodec,
+                     SchemaJsonCodec):
+    register_codec(_codec_class)
@@ -0,0 +1,291 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Persistent, append-only spool of records on local disk.
+
+@file           spool.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import time
+import zlib
+import struct
+import threading
+
+
+class Spool(object):
+    """An on-disk FIFO of byte records, stored in append-only segment files.
+    Records are buffered in memory and written in batches of 'write_batch' records.
+    When to fsync is decided by the fsync policy:
+        'always' -- after every write.
+        'interval' -- at most every 'fsync_interval' seconds.
+        'never' -- leave it to the operating system.
+    Records are read in order with peek() and removed with consume(). The read position
+    is stored on disk, so unconsumed records are replayed after a restart. When the
+    spool grows beyond 'max_bytes', the eviction policy decides what is dropped:
+        'drop-oldest' -- the oldest segment is deleted.
+        'drop-newest' -- new records are refused.
+    @version 1.0
+    """
+    FSYNC_POLICIES = ['always', 'interval', 'never']
+    EVICTION_POLICIES = ['drop-oldest', 'drop-newest']
+    RECORD_HEADER = struct.Struct('>II')    # length, crc32
+    SEGMENT_SUFFIX = '.seg'
+    POSITION_FILE = 'position'
+
+    def __init__(self, directory, segment_bytes=16 * 2**20, max_bytes=1024 * 2**20,
+                 write_batch=100, fsync='interval', fsync_interval=1.0,
+                 eviction='drop-oldest'):
+        """Initializes a new Spool, recovering any existing segments in directory.
+        @param directory : str - Directory for segment files
+        @param segment_bytes : int - Size after which a new segment file is started
+        @param max_bytes : int - Maximum total size of the spool
+        @param write_batch : int - Number of records buffered before writing
+        @param fsync : str - One of FSYNC_POLICIES
+        @param fsync_interval : float - Seconds between fsyncs with the 'interval' policy
+        @param eviction : str - One of EVICTION_POLICIES
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            raise AttributeError("Fsync policy unknown '{}'.".format(fsync))
+        if eviction not in self.EVICTION_POLICIES:
+            raise AttributeError("Eviction policy unknown '{}'.".format(eviction))
+        self._directory = directory
+        self._segment_bytes = int(segment_bytes)
+        self._max_bytes = int(max_bytes)
+        self._write_batch = max(1, int(write_batch))
+        self._fsync = fsync
+        self._fsync_interval = float(fsync_interval)
+        self._eviction = eviction
+        self._lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._sizes = {}
+        for name in os.listdir(directory):
+            if name.endswith(self.SEGMENT_SUFFIX):
+                seq = int(name[:-len(self.SEGMENT_SUFFIX)])
+                self._sizes[seq] = os.path.getsize(self._segment_path(seq))
+        self._read_seq, self._read_offset = self._load_position()
+        # Never append to a segment of an earlier run, it may end in a partial record
+        self._write_seq = max(self._sizes) + 1 if self._sizes else 0
+        self._write_file = None
+        self._unwritten = []
+        self._unwritten_bytes = 0
+        self._last_fsync = time.monotonic()
+        self._last_position_fsync = self._last_fsync
+        self._peeked = []
+        self.appended = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.evicted_segments = 0
+        self.corrupt_segments = 0
+
+    @property
+    def directory(self):
+        """Directory of the segment files.
+        """
+        return self._directory
+
+    @property
+    def total_bytes(self):
+        """Total size of the spool in bytes, including consumed parts of segments.
+        """
+        return sum(self._sizes.values()) + self._unwritten_bytes
+
+    @property
+    def pending_bytes(self):
+        """Size of unconsumed records in bytes.
+        """
+        with self._lock:
+            return sum(size for seq, size in self._sizes.items() if seq >= self._read_seq) \
+                - (self._read_offset if self._read_seq in self._sizes else 0) \
+                + self._unwritten_bytes
+
+    @property
+    def empty(self):
+        """Returns if there are no unconsumed records.
+        """
+        return self.pending_bytes <= 0
+
+    def _segment_path(self, seq):
+        return os.path.join(self._directory, "{:020d}{}".format(seq, self.SEGMENT_SUFFIX))
+
+    def _load_position(self):
+        """Loads the read position, or starts from the oldest segment.
+        """
+        try:
+            with open(os.path.join(self._directory, self.POSITION_FILE), 'r') as f:
+                seq, offset = (int(x) for x in f.read().split())
+            if seq in self._sizes:
+                return seq, offset
+        except (OSError, ValueError):
+            pass
+        return (min(self._sizes) if self._sizes else 0), 0
+
+    def _save_position(self, fsync=False):
+        """Atomically stores the read position, and fsyncs it by the fsync policy.
+        """
+        path = os.path.join(self._directory, self.POSITION_FILE)
+        with open(path + '.tmp', 'w') as f:
+            f.write("{} {}\n".format(self._read_seq, self._read_offset))
+            if self._fsync != 'never' and \
+                    (fsync or self._fsync == 'always' or
+                     time.monotonic() - self._last_position_fsync >= self._fsync_interval):
+                f.flush()
+                os.fsync(f.fileno())
+                self._last_position_fsync = time.monotonic()
+        os.replace(path + '.tmp', path)
+
+    def append(self, payload):
+        """Appends a record to the spool.
+        @param payload : bytes - Record to append
+        @returns bool -- True if the record was added, False if it was dropped.
+        """
+        record = self.RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            if self._eviction == 'drop-newest' and \
+                    self.total_bytes + len(record) > self._max_bytes:
+                self.dropped += 1
+                return False
+            self._unwritten.append(record)
+            self._unwritten_bytes += len(record)
+            self.appended += 1
+            if len(self._unwritten) >= self._write_batch:
+                self._write()
+            return True
+
+    def _write(self, fsync=False):
+        """Writes buffered records to the current segment.
+        """
+        if self._unwritten:
+            if self._write_file is not None and \
+                    self._sizes[self._write_seq] >= self._segment_bytes:
+                self._close_segment()
+            if self._write_file is None:
+                if self._write_seq in self._sizes:
+                    self._write_seq += 1
+                self._write_file = open(self._segment_path(self._write_seq), 'ab')
+                self._sizes[self._write_seq] = 0
+            self._write_file.write(b"".join(self._unwritten))
+            self._write_file.flush()
+            self._sizes[self._write_seq] += self._unwritten_bytes
+            self._unwritten = []
+            self._unwritten_bytes = 0
+            self._evict()
+        if self._write_file is not None and self._fsync != 'never' and \
+                (fsync or self._fsync == 'always' or
+                 time.monotonic() - self._last_fsync >= self._fsync_interval):
+            os.fsync(self._write_file.fileno())
+            self._last_fsync = time.monotonic()
+
+    def _close_segment(self):
+        if self._fsync != 'never':
+            os.fsync(self._write_file.fileno())
+        self._write_file.close()
+        self._write_file = None
+
+    def _evict(self):
+        """Deletes the oldest segments while the spool is too large.
+        """
+        if self._eviction != 'drop-oldest':
+            return
+        while self.total_bytes > self._max_bytes and len(self._sizes) > 1:
+            seq = min(self._sizes)
+            self._delete_segment(seq)
+            self.evicted_segments += 1
+            if seq >= self._read_seq:
+                self._read_seq, self._read_offset = min(self._sizes), 0
+                self._peeked = []
+
+    def _delete_segment(self, seq):
+        del self._sizes[seq]
+        try:
+            os.remove(self._segment_path(seq))
+        except FileNotFoundError:
+            pass
+
+    def flush(self):
+        """Writes and fsyncs all buffered records.
+        """
+        with self._lock:
+            self._write(fsync=True)
+
+    def peek(self, max_items=100):
+        """Returns the oldest unconsumed records without removing them.
+        A partial or corrupt record, eg. after a crash, and the rest of its segment are
+        skipped, and the read position is moved past them.
+        @param max_items : int - Maximum number of records to return
+        @returns list -- Records as bytes, in order.
+        """
+        with self._lock:
+            self._write()
+            records = []
+            positions = []
+            for seq in sorted(s for s in self._sizes if s >= self._read_seq):
+                offset = self._read_offset if seq == self._read_seq else 0
+                corrupt = False
+                with open(self._segment_path(seq), 'rb') as f:
+                    f.seek(offset)
+                    while len(records) < max_items:
+                        header = f.read(self.RECORD_HEADER.size)
+                        if not header:
+                            break
+                        if len(header) < self.RECORD_HEADER.size:
+                            corrupt = True
+                            break
+                        length, crc = self.RECORD_HEADER.unpack(header)
+                        payload = f.read(length)
+                        if len(payload) < length or zlib.crc32(payload) != crc:
+                            corrupt = True
+                            break
+                        offset += self.RECORD_HEADER.size + length
+                        records.append(payload)
+                        positions.append((seq, offset))
+                if corrupt:
+                    if records:
+                        # Skipped by the next peek, when these records have been consumed
+                        break
+                    self.corrupt_segments += 1
+                    self._advance(seq, self._sizes[seq])
+                if len(records) >= max_items:
+                    break
+            self._peeked = positions
+            return records
+
+    def consume(self, count):
+        """Removes records returned by the latest peek().
+        Records that have been evicted since the peek are ignored.
+        @param count : int - Number of records to remove
+        """
+        with self._lock:
+            count = min(count, len(self._peeked))
+            if count <= 0:
+                return
+            seq, offset = self._peeked[count - 1]
+            self._peeked = self._peeked[count:]
+            self.consumed += count
+            self._advance(seq, offset)
+
+    def _advance(self, seq, offset):
+        """Moves the read position, deletes segments that have been read completely and
+        stores the position.
+        """
+        self._read_seq, self._read_offset = seq, offset
+        for seq in sorted(self._sizes):
+            if seq > self._read_seq or (seq == self._read_seq and
+                                        (seq == self._write_seq or
+                                         self._read_offset < self._sizes[seq])):
+                break
+            self._delete_segment(seq)
+            if seq == self._read_seq:
+                self._read_seq, self._read_offset = seq + 1, 0
+        self._save_position()
+
+    def close(self):
+        """Writes buffered records and closes the current segment.
+        """
+        with self._lock:
+            self._write(fsync=True)
+            if self._write_file is not None:
+                self._close_segment()
+            self._save_position(fsync=True)
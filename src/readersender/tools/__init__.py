@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf8
+from ..helpers import lazy_imports
 
-from .interval_readersender import interval_readersender
-from .read_scripts import read_value
+# Tools are imported on first access, so that each command only imports what it uses
+__getattr__, __dir__ = lazy_imports(__name__, {
+    'interval_readersender': '.interval_readersender:interval_readersender',
+    'read_value': '.read_scripts:read_value',
+    'async_main_loop': '.async_interval_readersender:async_main_loop',
+    'async_run_pairs': '.async_interval_readersender:async_run_pairs',
+    'supervisor': '.supervisor:supervisor',
+    'value_daemon': '.value_daemon:value_daemon',
+})
 
 
 __all__ = [
     'interval_readersender',
-    'read_value'
+    'read_value',
+    'async_main_loop',
+    'async_run_pairs',
+    'supervisor',
+    'value_daemon'
 ]
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Asyncio variant of the interval reader-sender loop.
+
+@file           async_interval_readersender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import asyncio
+import traceback
+import logging
+from ..asyncreader import as_async_reader
+from ..asyncsender import as_async_sender
+from ..scheduler import IntervalScheduler
+
+
+async def async_main_loop(reader, sender,
+                          read_args=None, send_args=None,
+                          run_interval=10, scheduler=None,
+                          disconnect_after_read=False, disconnect_after_send=False,
+                          logger=None):
+    """Runs a reader/sender pair at set intervals on the running event loop.
+    Synchronous readers and senders are wrapped so that their blocking calls are run
+    in a thread. Many loops can run concurrently, eg. with asyncio.gather().
+    @param reader - Reader or AsyncReader instance
+    @param sender - Sender or AsyncSender instance
+    @param read_args : dict - Additional key-value arguments for read command
+    @param send_args : dict - Additional key-value arguments for send command
+    @param run_interval : float - Run interval in seconds
+    @param scheduler : IntervalScheduler - Scheduler to use instead of run_interval
+    @returns When an exception occurs in the loop.
+    """
+    logger = logger if logger is not None else logging.getLogger('readersender')
+    read_args = read_args or {}
+    send_args = send_args or {}
+    reader = as_async_reader(reader)
+    sender = as_async_sender(sender)
+    if scheduler is None:
+        scheduler = IntervalScheduler(run_interval)
+
+    try:
+        logger.debug("Connecting to reader")
+        await reader.connect()
+        logger.debug("Connecting to sender")
+        await sender.connect()
+
+        while True:
+            # Wait for the next interval
+            await scheduler.wait_async()
+
+            # Get data
+            if not reader.connected:
+                await reader.connect()
+            data = await reader.read(**read_args)
+            if disconnect_after_read:
+                await reader.disconnect()
+
+            # Send data
+            if not sender.connected:
+                await sender.connect()
+            await sender.send(data, **send_args)
+            if disconnect_after_send:
+                await sender.disconnect()
+            logger.debug("Data sent: {}".format(data))
+
+    except Exception as e:
+        # Catch all exceptions and return
+        logger.error("Caught exception: {}".format(e))
+        logger.debug(traceback.format_exc())
+    finally:
+        for rs in (reader, sender):
+            if rs.connected:
+                try:
+                    await rs.disconnect()
+                except Exception as e:
+                    logger.error("Disconnect failed. Message: '{}'.".format(e))
+
+
+async def async_run_pairs(pairs, run_interval=10, logger=None):
+    """Runs many reader/sender pairs concurrently on the running event loop.
+    @param pairs - Iterable of (reader, sender) tuples
+    @param run_interval : float - Run interval in seconds
+    @remarks On cancellation, waits for every loop to disconnect before returning.
+    """
+    await asyncio.gather(*(async_main_loop(reader, sender, run_interval=run_interval,
+                                           logger=logger)
+                           for reader, sender in pairs),
+                         return_exceptions=True)
@@ -16,31 +16,43 @@ import traceback
 import json
 import logging
 import logging.handlers
-import importlib
 sys.path.insert(0, os.path.abspath('../readersender/'))
+from .loaders import load_reader_class, load_sender_class, load_function    # noqa: E402
+from .supervisor import RestartPolicy    # noqa: E402
+from ..scheduler import IntervalScheduler    # noqa: E402
+from ..ringbuffer import RingBuffer    # noqa: E402
+from ..connection import ConnectionManager    # noqa: E402
+from ..serialization import CODECS, get_codec    # noqa: E402
+from ..metrics import Metrics, MetricsServer, MetricsDumper    # noqa: E402
+from ..senders import (QueuedSender, SpoolingSender, TransformSender,    # noqa: E402
+                       MultiSender, AggregatingSender, DeadbandSender)
+from ..senders.multisender import DEFAULT_TIMEOUT as MULTISENDER_TIMEOUT    # noqa: E402
 
 
 def main_loop(readername, sendername,
               readerargs=None, senderargs=None,
-              run_interval=10, logger=None, loglevel=logging.INFO):
+              run_interval=10, overrun_policy='skip',
+              logger=None, loglevel=logging.INFO, metrics=None):
     """Runs a reader/sender program at set intervals.
+    @param run_interval : float - Run interval in seconds
+    @param overrun_policy : str - What to do with missed intervals, see IntervalScheduler
+    @param metrics : Metrics - Metrics of the program, kept over restarts of the loop
     """
+    scheduler = IntervalScheduler(run_interval, overrun_policy=overrun_policy)
 
     # Set up reader
     logger.debug("Initializing a reader")
-    rmodname = readername.lower() + "reader"
     try:
-        readermodule = importlib.import_module("." + rmodname, package='readersender.readers')
-    except ImportError as e:
-        logger.error("Could not import module: {}. Message: '{}'.".format(rmodname, e))
+        Reader = load_reader_class(readername)
+    except (ImportError, AttributeError) as e:
+        logger.error("Could not load reader: {}. Message: '{}'.".format(readername, e))
         sys.exit(1)
 
-    rclassname = readername[0].upper() + readername[1:] + "Reader"
     try:
-        Reader = getattr(readermodule, rclassname)
         reader = Reader(logger=logger, loglevel=loglevel, **readerargs.get('init'))
     except Exception as e:
-        logger.error("Could not create reader class: {}. Message: '{}'.".format(rclassname, e))
+        logger.error("Could not create reader class: {}. Message: '{}'.".format(
+            Reader.__name__, e))
         sys.exit(1)
 
     # Try connection to reader
@@ -51,22 +63,81 @@ def main_loop(readername, sendername,
         logger.error("Connection to reader failed. Message: '{}'.".format(e))
         sys.exit(1)
 
-    # Set up sender
+    # Set up senders, eg. 'mqtt,foo' for many
     logger.debug("Initializing a sender")
-    smodname = sendername.lower() + "sender"
-    try:
-        sendermodule = importlib.import_module("." + smodname, 'readersender.senders')
-    except ImportError as e:
-        logger.error("Could not import module: {}. Message: '{}'.".format(smodname, e))
+    sendernames = sendername.split(',')
+    senderinits = senderargs.get('init')
+    if not isinstance(senderinits, list):
+        senderinits = [senderinits] * len(sendernames)
+    elif len(senderinits) != len(sendernames):
+        logger.error("Expected sender init arguments for {} senders, got {}.".format(
+            len(sendernames), len(senderinits)))
         sys.exit(1)
 
-    sclassname = sendername[0].upper() + sendername[1:] + "Sender"
-    try:
-        Sender = getattr(sendermodule, sclassname)
-        sender = Sender(logger=logger, loglevel=loglevel, **senderargs.get('init'))
-    except Exception as e:
-        logger.error("Could not create sender class: {}. Message: '{}'.".format(sclassname, e))
-        sys.exit(1)
+    senders = []
+    for name, init in zip(sendernames, senderinits):
+        try:
+            Sender = load_sender_class(name)
+        except (ImportError, AttributeError) as e:
+            logger.error("Could not load sender: {}. Message: '{}'.".format(name, e))
+            sys.exit(1)
+
+        senderinit = dict(init or {})
+        if senderargs.get('codec'):
+            try:
+                senderinit['codec'] = get_codec(senderargs.get('codec'),
+                                                scheme=getattr(reader, 'scheme', None))
+            except (AttributeError, RuntimeError) as e:
+                logger.error("Could not create codec: {}. Message: '{}'.".format(
+                    senderargs.get('codec'), e))
+                sys.exit(1)
+
+        try:
+            senders.append(Sender(logger=logger, loglevel=loglevel, **senderinit))
+        except Exception as e:
+            logger.error("Could not create sender class: {}. Message: '{}'.".format(
+                Sender.__name__, e))
+            sys.exit(1)
+
+    if len(senders) > 1:
+        logger.debug("Sending data with {} senders".format(len(senders)))
+        sender = MultiSender(senders, timeout=senderargs.get('sender_timeout'))
+    else:
+        sender = senders[0]
+
+    if senderargs.get('spool_dir'):
+        logger.debug("Spooling data for the sender")
+        sender = SpoolingSender(sender, spool=senderargs.get('spool_dir'))
+
+    if senderargs.get('deadband') is not None or senderargs.get('deadband_relative') or \
+            senderargs.get('heartbeat'):
+        logger.debug("Sending only changed data")
+        sender = DeadbandSender(sender, absolute=senderargs.get('deadband'),
+                                relative=senderargs.get('deadband_relative'),
+                                heartbeat=senderargs.get('heartbeat'))
+
+    if senderargs.get('aggregate_window'):
+        logger.debug("Aggregating data for the sender")
+        sender = AggregatingSender(sender, senderargs.get('aggregate_window'),
+                                   step=senderargs.get('aggregate_step'),
+                                   fields=senderargs.get('aggregate_fields'))
+
+    if senderargs.get('transform'):
+        logger.debug("Transforming data for the sender")
+        try:
+            transform = load_function(senderargs.get('transform'))
+        except (ImportError, AttributeError, ValueError) as e:
+            logger.error("Could not load transform: {}. Message: '{}'.".format(
+                senderargs.get('transform'), e))
+            sys.exit(1)
+        sender = TransformSender(sender, transform,
+                                 executor=senderargs.get('transform_executor', 'process'),
+                                 max_workers=senderargs.get('transform_workers'))
+
+    if senderargs.get('queue_size'):
+        logger.debug("Queueing data for the sender")
+        sender = QueuedSender(sender, maxsize=senderargs.get('queue_size'),
+                              overflow_policy=senderargs.get('queue_policy', 'block'))
 
     logger.debug("Testing connection to sender")
     try:
@@ -75,57 +146,54 @@ def main_loop(readername, sendername,
         logger.error("Connection to sender failed. Message: '{}'.".format(e))
         sys.exit(1)
 
-    # Auxillary functions
-    def read_data(disconnect_after_read=True, **kwargs):
-        # Connect to the reader
-        if not reader.connected:
-            reader.connect()
-
-        # Read data
-        data = reader.read(**kwargs)
-
-        # Disconnect from reader
-        if (disconnect_after_read):
-            reader.disconnect()
-
-        return data
-
-    def send_data(data, disconnect_after_send=True, **kwargs):
-        # Connect to the sender
-        if not sender.connected:
-            sender.connect()
-
-        # Send data
-        sender.send(data, **kwargs)   # NOTE: Dismisses result
-
-        # Disconnect
-        if (disconnect_after_send):
-            sender.disconnect()
+    # Keep the connections open between intervals, unless asked to disconnect
+    reader_connection = ConnectionManager(
+        reader,
+        idle_timeout=0 if readerargs.get('disconnect_after_read')
+        else readerargs.get('idle_timeout'),
+        keepalive_interval=readerargs.get('keepalive_interval'))
+    sender_connection = ConnectionManager(
+        sender,
+        idle_timeout=0 if senderargs.get('disconnect_after_send', True)
+        else senderargs.get('idle_timeout'),
+        keepalive_interval=senderargs.get('keepalive_interval'))
+
+    if metrics is None:
+        metrics = Metrics('interval_readersender')
+    metrics.gauge('scheduler', scheduler.stats.as_dict)
+    metrics.gauge('reader_connection', reader_connection.stats)
+    metrics.gauge('sender_connection', sender_connection.stats)
 
     # Run the loop
     try:
         while True:
-            runtime = time.time()
+            # Wait for the next interval
+            lateness = scheduler.wait()
+            logger.debug("Interval started {:.3f} s late.".format(lateness))
+            metrics.inc('intervals')
+
             # Get data
-            data = read_data(disconnect_after_read=readerargs.get('disconnect_after_read'),
-                             **readerargs.get('read'))
+            data = reader_connection.call('read', **readerargs.get('read'))
+            if data is None:
+                metrics.inc('empty_reads')
 
             # Send data
-            send_data(data, disconnect_after_send=senderargs.get('disconnect_after_send', True),
-                      **senderargs.get('send'))
+            # NOTE: Dismisses result
+            sender_connection.call('send', data, **senderargs.get('send'))
             # Log output to debug
             logger.debug("Data sent: {}".format(data))
 
-            # Make a delay
-            delay = run_interval - (time.time() - runtime)
-            if (delay > 0):
-                logger.debug("Waiting for {:.2f} s.".format(delay))
-                time.sleep(delay)
-
     except Exception as e:
         # Catch all exceptions and carry on
+        metrics.inc('errors')
         logger.error("Caught exception: {}".format(e))
         logger.debug(traceback.format_exc())
+        logger.debug("Scheduler statistics: {}".format(scheduler.stats.as_dict()))
+        logger.debug("Reader connection statistics: {}".format(reader_connection.stats()))
+        logger.debug("Sender connection statistics: {}".format(sender_connection.stats()))
+    finally:
+        reader_connection.close()
+        sender_connection.close()
 
 
 def interval_readersender():
@@ -134,12 +202,72 @@ def interval_readersender():
     """
     parser = argparse.ArgumentParser()
     parser.add_argument('reader', help="reader class to use")
-    parser.add_argument('sender', help="sender class to use")
-    parser.add_argument('interval', help="run interval in seconds", type=int)
+    parser.add_argument('sender', help="sender class to use, or many separated by commas")
+    parser.add_argument('interval', help="run interval in seconds", type=float)
+    parser.add_argument('--overrun_policy',
+                        help="what to do when an interval is missed (default: skip)",
+                        choices=IntervalScheduler.OVERRUN_POLICIES, default='skip')
     parser.add_argument('--debug', help="run in debug mode (default: no)",
                         action='store_true')
     parser.add_argument('--stdout', help="direct logs to stdout (default: no)",
                         action='store_true')
+    parser.add_argument('--queue_size',
+                        help="send data from a queue of this size on a separate thread " +
+                        "(default: no queue)", type=int)
+    parser.add_argument('--queue_policy',
+                        help="what to do when the queue is full (default: block)",
+                        choices=RingBuffer.OVERFLOW_POLICIES, default='block')
+    parser.add_argument('--spool_dir',
+                        help="store data in this directory while the sender is unavailable " +
+                        "(default: no spool)")
+    parser.add_argument('--deadband',
+                        help="send only data whose numeric fields changed by more than " +
+                        "this, or whose other fields changed (default: send all data)",
+                        type=float)
+    parser.add_argument('--deadband_relative',
+                        help="relative deadband of numeric fields, eg. 0.01 for 1 %% " +
+                        "(default: none)", type=float)
+    parser.add_argument('--heartbeat',
+                        help="with a deadband, send unchanged data after this many " +
+                        "seconds of silence (default: never)", type=float)
+    parser.add_argument('--aggregate_window',
+                        help="send statistics of numeric fields over windows of this " +
+                        "many seconds instead of every value (default: no aggregation)",
+                        type=float)
+    parser.add_argument('--aggregate_step',
+                        help="seconds between sliding windows (default: window size)",
+                        type=float)
+    parser.add_argument('--aggregate_fields',
+                        help="comma-separated fields to aggregate, eg. 'd.rnd' " +
+                        "(default: all numeric fields)",
+                        type=lambda value: value.split(','))
+    parser.add_argument('--transform',
+                        help="transform data with this function before sending, " +
+                        "eg. 'mypackage.parsers:parse' (default: no transform)")
+    parser.add_argument('--transform_executor',
+                        help="run the transform in worker processes or threads " +
+                        "(default: process)",
+                        choices=TransformSender.EXECUTORS, default='process')
+    parser.add_argument('--transform_workers',
+                        help="number of transform workers (default: number of CPUs)",
+                        type=int)
+    parser.add_argument('--codec',
+                        help="encode data with this codec before sending " +
+                        "(default: sender specific)", choices=sorted(CODECS))
+    parser.add_argument('--idle_timeout',
+                        help="disconnect the reader and sender after this many idle " +
+                        "seconds (default: stay connected)", type=float)
+    parser.add_argument('--keepalive_interval',
+                        help="check idle connections every this many seconds, if the " +
+                        "reader or sender can check them (default: no checks)", type=float)
+    parser.add_argument('--metrics_port',
+                        help="serve metrics in the Prometheus format on this port " +
+                        "(default: no server)", type=int)
+    parser.add_argument('--metrics_file',
+                        help="write metrics as JSON into this file (default: no file)")
+    parser.add_argument('--metrics_interval',
+                        help="seconds between writes of the metrics file (default: 60)",
+                        type=float, default=60.0)
     parser.add_argument('--reader_init_args',
                         help="Additional key-value arguments for reader initialization",
                         type=json.loads)
@@ -147,8 +275,13 @@ def interval_readersender():
                         help="Additional key-value arguments for read command",
                         type=json.loads)
     parser.add_argument('--sender_init_args',
-                        help="Additional key-value arguments for sender initialization",
+                        help="Additional key-value arguments for sender initialization, " +
+                        "or a list of them for many senders",
                         type=json.loads)
+    parser.add_argument('--sender_timeout',
+                        help="maximum time to wait for each of many senders in seconds " +
+                        "(default: {})".format(MULTISENDER_TIMEOUT), type=float,
+                        default=MULTISENDER_TIMEOUT)
     parser.add_argument('--send_args',
                         help="Additional key-value arguments for send command",
                         type=json.loads)
@@ -159,6 +292,8 @@ def interval_readersender():
     readerargs = {
         'init': {},
         'read': {},
+        'idle_timeout': args.idle_timeout,
+        'keepalive_interval': args.keepalive_interval,
     }
     readerargs['init'].update(args.reader_init_args or {})
     readerargs['read'].update(args.read_args or {})
@@ -167,8 +302,27 @@ def interval_readersender():
         'init': {},
         'send': {},
         'disconnect_after_send': False,
+        'idle_timeout': args.idle_timeout,
+        'keepalive_interval': args.keepalive_interval,
+        'queue_size': args.queue_size,
+        'queue_policy': args.queue_policy,
+        'spool_dir': args.spool_dir,
+        'deadband': args.deadband,
+        'deadband_relative': args.deadband_relative,
+        'heartbeat': args.heartbeat,
+        'aggregate_window': args.aggregate_window,
+        'aggregate_step': args.aggregate_step,
+        'aggregate_fields': args.aggregate_fields,
+        'transform': args.transform,
+        'transform_executor': args.transform_executor,
+        'transform_workers': args.transform_workers,
+        'codec': args.codec,
+        'sender_timeout': args.sender_timeout,
     }
-    senderargs['init'].update(args.sender_init_args or {})
+    if isinstance(args.sender_init_args, list):
+        senderargs['init'] = args.sender_init_args
+    else:
+        senderargs['init'].update(args.sender_init_args or {})
     senderargs['send'].update(args.send_args or {})
 
     # Set up logger
@@ -197,11 +351,22 @@ def interval_readersender():
         loglevel = logging.DEBUG
         logger.setLevel(loglevel)
 
+    # Export metrics
+    metrics = Metrics('interval_readersender')
+    if args.metrics_port is not None:
+        MetricsServer(args.metrics_port).start()
+        logger.info("Serving metrics on port {}".format(args.metrics_port))
+    dumper = None
+    if args.metrics_file:
+        dumper = MetricsDumper(args.metrics_file, interval=args.metrics_interval).start()
+
     def exit_gracefully(signal, frame):
         """
         Exits from the program gracefully.
         """
         logger.info("Exiting...")
+        if dumper is not None:
+            dumper.stop()
         sys.exit(0)
 
     # Make a signal catcher
@@ -209,21 +374,19 @@ def interval_readersender():
     signal.signal(signal.SIGTERM, exit_gracefully)
 
     # Run the main loop
-    restart_delay = 60
-    max_restarts = 20
-    restarts = 0
+    restart_policy = RestartPolicy(restart_delay=60, max_restarts=20)
     while True:
         logger.info("Starting main loop")
         main_loop(reader, sender,
                   readerargs, senderargs,
-                  run_interval=args.interval,
-                  logger=logger, loglevel=loglevel)
+                  run_interval=args.interval, overrun_policy=args.overrun_policy,
+                  logger=logger, loglevel=loglevel, metrics=metrics)
 
         # Main loop exited
-        restarts += 1
-        if restarts > max_restarts:
+        restart_delay = restart_policy.next_delay()
+        if restart_delay is None:
             logger.error("Maximum number of restarts ({}) reached. Exiting."
-                         .format(max_restarts))
+                         .format(restart_policy.max_restarts))
             sys.exit(1)
 
         logger.info("Restarting main thread in {}s.".format(restart_delay))
@@ -0,0 +1,97 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Loading of reader and sender classes by name.
+
+@file           loaders.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import functools
+import importlib
+
+READER_GROUP = 'readersender.readers'
+SENDER_GROUP = 'readersender.senders'
+
+# The built-in readers and senders, as declared in the entry points of setup.cfg. They are
+# loaded without scanning the installed packages for entry points, which is slow.
+BUILTIN_READERS = {
+    'foo': 'readersender.readers.fooreader:FooReader',
+    'scheme': 'readersender.readers.schemereader:SchemeReader',
+    'random': 'readersender.readers.randomreader:RandomReader',
+    'serial': 'readersender.readers.serialreader:SerialReader',
+}
+BUILTIN_SENDERS = {
+    'foo': 'readersender.senders.foosender:FooSender',
+    'mqtt': 'readersender.senders.mqttsender:MqttSender',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def entry_points(group):
+    """Returns the entry points of a group as a dictionary by lowercase name.
+    """
+    from importlib import metadata
+    eps = metadata.entry_points()
+    if hasattr(eps, 'select'):
+        eps = eps.select(group=group)
+    else:
+        eps = eps.get(group, [])
+    return {ep.name.lower(): ep for ep in eps}
+
+
+def _load_class(name, group, builtins, kind):
+    """Returns a reader or sender class by its short name.
+    The name is looked up in the built-in classes, then in the entry points of group,
+    and finally in the package of the group by the naming convention, eg. 'serial' for
+    readersender.readers.serialreader.SerialReader.
+    """
+    target = builtins.get(name.lower())
+    if target is not None:
+        return load_function(target)
+    ep = entry_points(group).get(name.lower())
+    if ep is not None:
+        return ep.load()
+    module = importlib.import_module("." + name.lower() + kind.lower(), package=group)
+    return getattr(module, name[0].upper() + name[1:] + kind)
+
+
+def load_reader_class(readername):
+    """Returns a reader class by its short name, eg. 'serial' for SerialReader.
+    Other packages can provide readers with entry points in group 'readersender.readers'.
+    @raises ImportError if the reader module cannot be imported.
+    @raises AttributeError if the reader class is not found.
+    """
+    return _load_class(readername, READER_GROUP, BUILTIN_READERS, 'Reader')
+
+
+def load_sender_class(sendername):
+    """Returns a sender class by its short name, eg. 'mqtt' for MqttSender.
+    Other packages can provide senders with entry points in group 'readersender.senders'.
+    @raises ImportError if the sender module cannot be imported.
+    @raises AttributeError if the sender class is not found.
+    """
+    return _load_class(sendername, SENDER_GROUP, BUILTIN_SENDERS, 'Sender')
+
+
+def reader_names():
+    """Returns the short names of the built-in readers and the readers of entry points.
+    """
+    return sorted(set(BUILTIN_READERS) | set(entry_points(READER_GROUP)))
+
+
+def sender_names():
+    """Returns the short names of the built-in senders and the senders of entry points.
+    """
+    return sorted(set(BUILTIN_SENDERS) | set(entry_points(SENDER_GROUP)))
+
+
+def load_function(path):
+    """Returns a function by its import path, eg. 'mypackage.parsers:parse'.
+    @raises ImportError if the module cannot be imported.
+    @raises AttributeError if the function is not found.
+    """
+    modname, _, funcname = path.partition(':')
+    if not funcname:
+        modname, _, funcname = path.rpartition('.')
+    return getattr(importlib.import_module(modname), funcname)
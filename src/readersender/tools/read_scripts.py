@@ -16,52 +16,69 @@ import traceback
 import json
 import logging
 import logging.handlers
-import importlib
 sys.path.insert(0, os.path.abspath('../readersender/'))
+from .loaders import load_reader_class    # noqa: E402
+from ..connection import ConnectionManager    # noqa: E402
+from .value_daemon import request_value, default_socket_path    # noqa: E402
+
+# Connections kept open between calls of read_from_reader
+_reader_connections = {}
 
 
 def read_from_reader(readername,
                      readerargs=None,
-                     logger=None, loglevel=logging.INFO):
+                     logger=None, loglevel=logging.INFO,
+                     idle_timeout=0):
     """Reads a single value from reader.
+    @param idle_timeout : float - If non-zero, the reader stays connected for this many
+        idle seconds (None: until close_readers()), and is reused by later calls with
+        the same reader and init arguments.
     """
+    if idle_timeout != 0:
+        key = (readername, json.dumps(readerargs.get('init'), sort_keys=True))
+        connection = _reader_connections.get(key)
+        if connection is not None:
+            return _read(connection, readerargs, logger)
+
     # Set up reader
     logger.debug("Initializing a reader")
-    rmodname = readername.lower() + "reader"
     try:
-        readermodule = importlib.import_module("." + rmodname, package='readersender.readers')
-    except ImportError as e:
-        logger.error("Could not import module: {}. Message: '{}'.".format(rmodname, e))
+        Reader = load_reader_class(readername)
+    except (ImportError, AttributeError) as e:
+        logger.error("Could not load reader: {}. Message: '{}'.".format(readername, e))
         sys.exit(1)
 
-    rclassname = readername[0].upper() + readername[1:] + "Reader"
     try:
-        Reader = getattr(readermodule, rclassname)
         reader = Reader(logger=logger, loglevel=loglevel, **readerargs.get('init'))
     except Exception as e:
-        logger.error("Could not create reader class: {}. Message: '{}'.".format(rclassname, e))
+        logger.error("Could not create reader class: {}. Message: '{}'.".format(
+            Reader.__name__, e))
         sys.exit(1)
 
     # Try connection to reader
     logger.debug("Connecting to reader")
+    connection = ConnectionManager(reader, idle_timeout=idle_timeout)
     try:
-        reader.connect()
+        connection.acquire()
     except Exception as e:
         logger.error("Connection to reader failed. Message: '{}'.".format(e))
         sys.exit(1)
+    if idle_timeout != 0:
+        _reader_connections[key] = connection
 
-    def read_data(**kwargs):
-        # Connect to the reader
-        if not reader.connected:
-            reader.connect()
-        data = reader.read(**kwargs)
-        reader.disconnect()
-        return data
+    try:
+        return _read(connection, readerargs, logger)
+    finally:
+        connection.release()
 
+
+def _read(connection, readerargs, logger):
+    """Reads a single value through a connection manager.
+    """
     try:
         start_time = time.time()
         # Get data
-        data = read_data(**readerargs.get('read'))
+        data = connection.call('read', **readerargs.get('read'))
         runtime = time.time() - start_time
         logger.debug("Read data in {:.3f} seconds.".format(runtime))
     except Exception as e:
@@ -73,8 +90,17 @@ def read_from_reader(readername,
     return data
 
 
+def close_readers():
+    """Disconnects the readers kept open by read_from_reader.
+    """
+    while _reader_connections:
+        _, connection = _reader_connections.popitem()
+        connection.close()
+
+
 def read_value():
-    """Sets up a reader and prints a single value.
+    """Prints a single value, from a running value_daemon if there is one, or else from a
+    reader set up for this call.
     """
     parser = argparse.ArgumentParser()
     parser.add_argument('reader', help="reader class to use")
@@ -86,6 +112,14 @@ def read_value():
     parser.add_argument('--read_args',
                         help="Additional key-value arguments for read command",
                         type=json.loads)
+    parser.add_argument('--socket',
+                        help="UNIX socket of a read_value_daemon (default: {})".format(
+                            default_socket_path()))
+    parser.add_argument('--max_age',
+                        help="maximum age of a value cached by the daemon in seconds " +
+                        "(default: the ttl of the daemon)", type=float)
+    parser.add_argument('--direct', help="read directly, without a daemon (default: no)",
+                        action='store_true')
     args = parser.parse_args()
 
     # Some application-specifig setup code
@@ -127,12 +161,27 @@ def read_value():
     signal.signal(signal.SIGINT, exit_gracefully)
     signal.signal(signal.SIGTERM, exit_gracefully)
 
-    logger.debug("Starting to read value")
-    data = read_from_reader(reader,
-                            readerargs,
-                            logger=logger, loglevel=loglevel)
+    data = None
+    from_daemon = False
+    if not args.direct:
+        try:
+            data = request_value(reader, readerargs, socket_path=args.socket,
+                                 max_age=args.max_age)
+            from_daemon = True
+        except OSError as e:
+            logger.debug("No daemon available, reading directly. Message: '{}'.".format(e))
+        except RuntimeError as e:
+            # Also a timeout: the daemon may be holding the port, so do not read directly
+            logger.error("Daemon could not read value. Message: '{}'.".format(e))
+            sys.exit(1)
+
+    if not from_daemon:
+        logger.debug("Starting to read value")
+        data = read_from_reader(reader,
+                                readerargs,
+                                logger=logger, loglevel=loglevel)
     logger.debug("Read finished.")
-    sys.stdout.write(data)
+    sys.stdout.write(data if isinstance(data, str) else json.dumps(data))
     sys.stdout.flush()
     sys.exit(0)
 
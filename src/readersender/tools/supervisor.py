@@ -0,0 +1,276 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Supervisor that runs many reader-sender pipelines in one process.
+
+@file           supervisor.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import sys
+import signal
+import asyncio
+import argparse
+import json
+import logging
+import logging.handlers
+from .loaders import load_reader_class, load_sender_class, load_function
+from .async_interval_readersender import async_main_loop
+from ..scheduler import IntervalScheduler
+from ..senders import QueuedSender, SpoolingSender, TransformSender
+
+
+class RestartPolicy(object):
+    """Decides if and when a failed pipeline is restarted.
+    @version 1.0
+    """
+    def __init__(self, restart_delay=60, max_restarts=20, backoff=1.0, max_restart_delay=None):
+        """Initializes a new RestartPolicy.
+        @param restart_delay : float - Delay before the first restart in seconds
+        @param max_restarts : int - Maximum number of restarts, or None for no limit
+        @param backoff : float - Multiplier applied to the delay after each restart
+        @param max_restart_delay : float - Upper limit for the delay, or None for no limit
+        """
+        self.restart_delay = float(restart_delay)
+        self.max_restarts = int(max_restarts) if max_restarts is not None else None
+        self.backoff = float(backoff)
+        self.max_restart_delay = float(max_restart_delay) \
+            if max_restart_delay is not None else None
+        self.restarts = 0
+
+    def next_delay(self):
+        """Registers a restart and returns the delay to wait before it.
+        @returns float -- Delay in seconds, or None if no more restarts are allowed.
+        """
+        if self.max_restarts is not None and self.restarts >= self.max_restarts:
+            return None
+        delay = self.restart_delay * self.backoff ** self.restarts
+        if self.max_restart_delay is not None:
+            delay = min(delay, self.max_restart_delay)
+        self.restarts += 1
+        return delay
+
+    def reset(self):
+        """Resets the restart counter.
+        """
+        self.restarts = 0
+
+
+class Pipeline(object):
+    """A reader-sender pair with its own interval and restart policy.
+    @version 1.0
+    """
+    def __init__(self, name, reader, sender, interval=10, overrun_policy='skip',
+                 reader_init_args=None, read_args=None,
+                 sender_init_args=None, send_args=None,
+                 disconnect_after_read=False, disconnect_after_send=False,
+                 queue_size=None, queue_policy='block', spool=None,
+                 transform=None, transform_args=None,
+                 restart_policy=None, logger=None, loglevel=logging.INFO):
+        """Initializes a new Pipeline.
+        @param name : str - Name of the pipeline, used in logs
+        @param reader : str - Reader class to use, eg. 'serial'
+        @param sender : str - Sender class to use, eg. 'mqtt'
+        @param interval : float - Run interval in seconds
+        @param overrun_policy : str - What to do with missed intervals, see IntervalScheduler
+        @param queue_size : int - If set, data is sent from a QueuedSender of this size
+        @param queue_policy : str - Overflow policy of the queue
+        @param spool : str/dict - If set, spool directory or arguments for Spool
+        @param transform : str - If set, import path of a function that transforms the
+            data in a TransformSender, eg. 'mypackage.parsers:parse'
+        @param transform_args : dict - Additional arguments for TransformSender
+        @param restart_policy : dict/RestartPolicy - Arguments for RestartPolicy
+        """
+        self.name = str(name)
+        self.reader = reader
+        self.sender = sender
+        self.scheduler = IntervalScheduler(interval, overrun_policy=overrun_policy)
+        self.reader_init_args = reader_init_args or {}
+        self.read_args = read_args or {}
+        self.sender_init_args = sender_init_args or {}
+        self.send_args = send_args or {}
+        self.disconnect_after_read = disconnect_after_read
+        self.disconnect_after_send = disconnect_after_send
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self.spool = spool
+        self.transform = transform
+        self.transform_args = transform_args or {}
+        if not isinstance(restart_policy, RestartPolicy):
+            restart_policy = RestartPolicy(**(restart_policy or {}))
+        self.restart_policy = restart_policy
+        logger = logger if logger is not None else logging.getLogger('readersender')
+        self.logger = logger.getChild(self.name)
+        self.loglevel = loglevel
+
+    @classmethod
+    def from_config(cls, config, defaults=None, logger=None, loglevel=logging.INFO):
+        """Creates a Pipeline from a configuration dictionary.
+        @param config : dict - Pipeline configuration
+        @param defaults : dict - Default values for missing configuration keys
+        """
+        kwargs = dict(defaults or {})
+        kwargs.update(config)
+        return cls(logger=logger, loglevel=loglevel, **kwargs)
+
+    @property
+    def interval(self):
+        """Run interval in seconds.
+        """
+        return self.scheduler.interval
+
+    @property
+    def stats(self):
+        """Returns the lateness statistics of the pipeline's scheduler.
+        """
+        return self.scheduler.stats
+
+    def create_reader(self):
+        """Creates a new reader instance.
+        """
+        Reader = load_reader_class(self.reader)
+        return Reader(logger=self.logger, loglevel=self.loglevel, **self.reader_init_args)
+
+    def create_sender(self):
+        """Creates a new sender instance.
+        """
+        Sender = load_sender_class(self.sender)
+        sender = Sender(logger=self.logger, loglevel=self.loglevel, **self.sender_init_args)
+        if self.spool:
+            sender = SpoolingSender(sender, spool=self.spool)
+        if self.transform:
+            sender = TransformSender(sender, load_function(self.transform),
+                                     **self.transform_args)
+        if self.queue_size:
+            sender = QueuedSender(sender, maxsize=self.queue_size,
+                                  overflow_policy=self.queue_policy)
+        return sender
+
+    async def run_once(self):
+        """Creates the reader and sender, and runs them until the loop fails.
+        """
+        loop = asyncio.get_running_loop()
+        reader = await loop.run_in_executor(None, self.create_reader)
+        sender = await loop.run_in_executor(None, self.create_sender)
+        self.scheduler.start()
+        await async_main_loop(reader, sender,
+                              read_args=self.read_args, send_args=self.send_args,
+                              scheduler=self.scheduler,
+                              disconnect_after_read=self.disconnect_after_read,
+                              disconnect_after_send=self.disconnect_after_send,
+                              logger=self.logger)
+
+    async def run(self):
+        """Runs the pipeline, restarting it according to the restart policy.
+        Failures are contained to this pipeline.
+        """
+        while True:
+            self.logger.info("Starting pipeline")
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.logger.error("Pipeline failed. Message: '{}'.".format(e))
+
+            delay = self.restart_policy.next_delay()
+            if delay is None:
+                self.logger.error("Maximum number of restarts ({}) reached. Stopping pipeline."
+                                  .format(self.restart_policy.max_restarts))
+                return
+            self.logger.info("Restarting pipeline in {:.2f}s.".format(delay))
+            await asyncio.sleep(delay)
+
+
+def load_config(config_file):
+    """Loads a supervisor configuration from a JSON file.
+    The file contains a list 'pipelines' of Pipeline arguments, and optionally
+    'defaults' applied to every pipeline.
+    """
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    if 'pipelines' not in config:
+        raise ValueError("Configuration has no 'pipelines'.")
+    return config
+
+
+def create_pipelines(config, logger=None, loglevel=logging.INFO):
+    """Creates Pipeline objects from a supervisor configuration.
+    """
+    defaults = config.get('defaults', {})
+    pipelines = []
+    for i, pconfig in enumerate(config['pipelines']):
+        pconfig = dict(pconfig)
+        pconfig.setdefault('name', "pipeline{}".format(i))
+        pipelines.append(Pipeline.from_config(pconfig, defaults=defaults,
+                                              logger=logger, loglevel=loglevel))
+    names = [p.name for p in pipelines]
+    if len(set(names)) != len(names):
+        raise ValueError("Pipeline names must be unique.")
+    return pipelines
+
+
+async def supervise(pipelines):
+    """Runs all pipelines concurrently until they have all stopped.
+    """
+    await asyncio.gather(*(p.run() for p in pipelines), return_exceptions=True)
+
+
+def supervisor():
+    """Runs reader-sender pipelines described in a configuration file.
+    @notes Reads command line arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('config', help="pipeline configuration file (JSON)")
+    parser.add_argument('--debug', help="run in debug mode (default: no)",
+                        action='store_true')
+    parser.add_argument('--stdout', help="direct logs to stdout (default: no)",
+                        action='store_true')
+    args = parser.parse_args()
+
+    # Set up logger
+    logname = 'readersender'
+    loglevel = logging.INFO
+    logger = logging.getLogger(logname)
+    logger.setLevel(loglevel)
+
+    if (not args.stdout):
+        logfile = 'readersender.log'
+        # Set up the handler to rotate logs every midnight and keep 3 copies
+        handler = logging.handlers.TimedRotatingFileHandler(logfile, when="midnight",
+                                                            backupCount=3)
+    else:
+        handler = logging.StreamHandler()
+
+    # Format for the logs
+    formatter = logging.Formatter('%(asctime)s [%(name)s] %(levelname)-8s %(message)s')
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+
+    if (args.debug):
+        logger.info("Enabled debug mode")
+        loglevel = logging.DEBUG
+        logger.setLevel(loglevel)
+
+    try:
+        pipelines = create_pipelines(load_config(args.config), logger=logger,
+                                     loglevel=loglevel)
+    except Exception as e:
+        logger.error("Could not load configuration. Message: '{}'.".format(e))
+        sys.exit(1)
+
+    async def main():
+        task = asyncio.ensure_future(supervise(pipelines))
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, task.cancel)
+        try:
+            await task
+        except asyncio.CancelledError:
+            logger.info("Exiting...")
+
+    logger.info("Starting {} pipelines".format(len(pipelines)))
+    asyncio.run(main())
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    supervisor()
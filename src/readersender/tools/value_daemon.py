@@ -0,0 +1,377 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Daemon that keeps readers open and serves cached values to read_value.
+
+@file           value_daemon.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import json
+import time
+import stat
+import errno
+import signal
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import socketserver
+from .loaders import load_reader_class
+from ..connection import ConnectionManager
+
+
+def default_socket_path():
+    """Returns the socket path from environment variable READERSENDER_SOCKET, or a path
+    in the runtime directory of the user ($XDG_RUNTIME_DIR), or in a private per-user
+    directory in the temporary directory.
+    """
+    if os.environ.get('READERSENDER_SOCKET'):
+        return os.environ['READERSENDER_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], "readersender.sock")
+    return os.path.join(_user_directory(), "value_daemon.sock")
+
+
+def _user_directory():
+    return os.path.join(tempfile.gettempdir(), "readersender-{}".format(os.getuid()))
+
+
+def _private_directory(path):
+    """Creates directory path with mode 0700 if needed, and checks that no other user
+    owns or can write to it.
+    @raises PermissionError if the directory is not private.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise PermissionError(errno.EPERM, "Directory is not private to the user", path)
+
+
+def _check_owner(path):
+    """Checks that path, eg. a socket, is owned by the user.
+    @raises PermissionError if another user owns path.
+    @raises FileNotFoundError if path does not exist.
+    """
+    if os.lstat(path).st_uid != os.getuid():
+        raise PermissionError(errno.EPERM, "Socket is owned by another user", path)
+
+
+class ValueCache(object):
+    """A last-value cache whose entries expire after 'ttl' seconds. It is thread-safe.
+    @version 1.0
+    """
+    def __init__(self, ttl=1.0, clock=time.monotonic):
+        """Initializes a new ValueCache.
+        @param ttl : float - Maximum age of a cached value in seconds
+        @param clock : function - Monotonic clock in seconds
+        """
+        self._ttl = float(ttl)
+        self._clock = clock
+        self._values = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    def get(self, key, max_age=None):
+        """Returns (value, age in seconds) of key, or None if there is no fresh value.
+        @param max_age : float - Maximum age of the value, at most the ttl
+        """
+        max_age = self._ttl if max_age is None else min(float(max_age), self._ttl)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is not None:
+                age = self._clock() - entry[0]
+                if age <= max_age:
+                    self.hits += 1
+                    return entry[1], age
+                if age > self._ttl:
+                    del self._values[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._values[key] = (self._clock(), value)
+
+    def __len__(self):
+        return len(self._values)
+
+
+class ValueDaemon(object):
+    """Owns readers and serves their values over a UNIX domain socket.
+    A read is only made when the cache has no value that is fresh enough, and concurrent
+    requests for the same value share a single read. Reads of the same reader run one at
+    a time, even with different read arguments. Readers are kept connected until they
+    have been idle for 'idle_timeout' seconds.
+    The protocol is one JSON object per line in both directions. A request is
+    {"reader": "serial", "init": {...}, "read": {...}, "max_age": 0.5}, where all but
+    "reader" are optional, and the response is {"ok": true, "value": ..., "age": ...,
+    "cached": ...} or {"ok": false, "error": "..."}.
+    @version 1.0
+    """
+    def __init__(self, socket_path=None, ttl=1.0, idle_timeout=None,
+                 logger=None, loglevel=logging.INFO):
+        """Initializes a new ValueDaemon.
+        @param socket_path : str - Path of the socket (default: default_socket_path())
+        @param ttl : float - Maximum age of a cached value in seconds
+        @param idle_timeout : float - Seconds before an idle reader is disconnected
+            (default: never)
+        """
+        self._socket_path = socket_path or default_socket_path()
+        self._cache = ValueCache(ttl)
+        self._idle_timeout = idle_timeout
+        self._logger = logger if logger is not None else logging.getLogger('value_daemon')
+        self._loglevel = loglevel
+        self._lock = threading.Lock()
+        self._connections = {}     # reader key -> (ConnectionManager, lock)
+        self._server = None
+        self._thread = None
+        self.requests = 0
+        self.reads = 0
+        self.errors = 0
+
+    @property
+    def socket_path(self):
+        return self._socket_path
+
+    @property
+    def cache(self):
+        return self._cache
+
+    def read(self, readername, readerargs=None, max_age=None):
+        """Returns a value from the cache, or reads it.
+        @returns tuple -- (value, age in seconds, cached)
+        """
+        readerargs = readerargs or {}
+        init = readerargs.get('init') or {}
+        read_args = readerargs.get('read') or {}
+        reader_key = (readername, json.dumps(init, sort_keys=True))
+        key = reader_key + (json.dumps(read_args, sort_keys=True),)
+        hit = self._cache.get(key, max_age)
+        if hit is not None:
+            return hit[0], hit[1], True
+        connection, reader_lock = self._connection(reader_key, readername, init)
+        with reader_lock:
+            # Another request may have read the value while this one waited
+            hit = self._cache.get(key, max_age)
+            if hit is not None:
+                return hit[0], hit[1], True
+            value = connection.call('read', **read_args)
+            self.reads += 1
+            if value is not None:
+                self._cache.put(key, value)
+            return value, 0.0, False
+
+    def _connection(self, reader_key, readername, init):
+        """Returns the connection of a reader and the lock that serializes its reads.
+        """
+        with self._lock:
+            entry = self._connections.get(reader_key)
+            if entry is None:
+                Reader = load_reader_class(readername)
+                reader = Reader(logger=self._logger, loglevel=self._loglevel, **init)
+                entry = (ConnectionManager(reader, idle_timeout=self._idle_timeout),
+                         threading.Lock())
+                self._connections[reader_key] = entry
+            return entry
+
+    def handle(self, request):
+        """Returns the response to a request dictionary.
+        """
+        self.requests += 1
+        try:
+            if request.get('stats'):
+                return {'ok': True, 'value': self.stats()}
+            value, age, cached = self.read(request['reader'],
+                                           {'init': request.get('init'),
+                                            'read': request.get('read')},
+                                           max_age=request.get('max_age'))
+            return {'ok': True, 'value': value, 'age': age, 'cached': cached}
+        except Exception as e:
+            self.errors += 1
+            self._logger.error("Request failed: {}. Message: '{}'.".format(request, e))
+            return {'ok': False, 'error': "{}: {}".format(e.__class__.__name__, e)}
+
+    def _bind(self):
+        """Creates the server, replacing a stale socket of a daemon that is not running.
+        The socket is created in a private directory, unless its path is given, and is
+        only accessible by the user.
+        @raises RuntimeError if another daemon is serving the socket.
+        @raises PermissionError if the socket or its directory belongs to another user.
+        """
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        response = {'ok': False, 'error': "Invalid request: {}".format(e)}
+                    else:
+                        response = daemon.handle(request)
+                    self.wfile.write(json.dumps(response, default=str).encode('utf-8') +
+                                     b"\n")
+
+        if os.path.dirname(self._socket_path) == _user_directory():
+            _private_directory(_user_directory())
+        if os.path.lexists(self._socket_path):
+            _check_owner(self._socket_path)
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    s.connect(self._socket_path)
+            except OSError:
+                os.unlink(self._socket_path)
+            else:
+                raise RuntimeError("A daemon is already serving '{}'.".format(
+                    self._socket_path))
+        # The socket is created without permissions for others, instead of a chmod later
+        umask = os.umask(0o177)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(self._socket_path, Handler)
+        finally:
+            os.umask(umask)
+        server.daemon_threads = True
+        return server
+
+    def start(self):
+        """Starts serving on a background thread.
+        """
+        if self._server is None:
+            self._server = self._bind()
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                            name=self.__class__.__name__)
+            self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves until shutdown() is called from another thread or a signal handler.
+        """
+        self.start()
+        self._thread.join()
+
+    def shutdown(self):
+        """Stops serving, removes the socket and disconnects the readers.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            try:
+                os.unlink(self._socket_path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for connection, _ in connections:
+            connection.close()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'reads': self.reads,
+            'errors': self.errors,
+            'cached': len(self._cache),
+            'cache_hits': self._cache.hits,
+            'cache_misses': self._cache.misses,
+            'readers': len(self._connections),
+        }
+
+
+def request_value(readername, readerargs=None, socket_path=None, max_age=None,
+                  timeout=10.0):
+    """Requests a value from a running daemon.
+    @returns The value
+    @raises OSError if no daemon is running, eg. FileNotFoundError or ConnectionError,
+        or PermissionError if the socket is owned by another user.
+    @raises RuntimeError if the daemon could not read the value, or did not answer in
+        timeout seconds.
+    """
+    readerargs = readerargs or {}
+    request = {'reader': readername}
+    for key in ('init', 'read'):
+        if readerargs.get(key):
+            request[key] = readerargs[key]
+    if max_age is not None:
+        request['max_age'] = max_age
+    socket_path = socket_path or default_socket_path()
+    _check_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        try:
+            s.connect(socket_path)
+            s.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            with s.makefile('rb') as f:
+                line = f.readline()
+        except socket.timeout:
+            # The daemon is running but busy, eg. still holding the port
+            raise RuntimeError("Daemon did not answer in {} s.".format(timeout))
+    if not line:
+        raise ConnectionError(errno.ECONNRESET, "Daemon closed the connection.")
+    response = json.loads(line)
+    if not response.get('ok'):
+        raise RuntimeError(response.get('error'))
+    return response.get('value')
+
+
+def value_daemon():
+    """Runs a daemon that serves read_value requests.
+    @notes Reads command line arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Keeps readers open and serves their values to read_value")
+    parser.add_argument('--socket', help="path of the UNIX socket (default: {})".format(
+                        default_socket_path()))
+    parser.add_argument('--ttl', help="maximum age of cached values in seconds (default: 1)",
+                        type=float, default=1.0)
+    parser.add_argument('--idle_timeout',
+                        help="disconnect readers after this many idle seconds " +
+                        "(default: stay connected)", type=float)
+    parser.add_argument('--debug', help="run in debug mode (default: no)",
+                        action='store_true')
+    args = parser.parse_args()
+
+    loglevel = logging.DEBUG if args.debug else logging.INFO
+    logger = logging.getLogger('value_daemon')
+    logger.setLevel(loglevel)
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter('%(asctime)s [%(name)s] %(levelname)-8s %(message)s'))
+    logger.addHandler(handler)
+
+    daemon = ValueDaemon(args.socket, ttl=args.ttl, idle_timeout=args.idle_timeout,
+                         logger=logger, loglevel=loglevel)
+
+    def exit_gracefully(signal, frame):
+        """
+        Exits from the program gracefully.
+        """
+        logger.info("Exiting...")
+        threading.Thread(target=daemon.shutdown).start()
+
+    signal.signal(signal.SIGINT, exit_gracefully)
+    signal.signal(signal.SIGTERM, exit_gracefully)
+
+    try:
+        daemon.start()
+    except (RuntimeError, OSError) as e:
+        logger.error("Could not start daemon. Message: '{}'.".format(e))
+        sys.exit(1)
+    logger.info("Serving on {}".format(daemon.socket_path))
+    daemon.serve_forever()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    value_daemon()
@@ -10,9 +10,41 @@ Unit tests using the pytest framework.
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', "src")))
+import time    # noqa: E402
+import threading    # noqa: E402
 import readersender    # noqa: E402
 
 
+def collecting_sender(delay=0.0, fail=False):
+    """Returns a sender that collects sent data into list 'data' and the batches of
+    send_batch() into list 'batches'.
+    @param delay : float - Seconds to sleep in every send
+    @param fail : bool - If True, every send raises IOError
+    """
+    class CollectingSender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.data = []
+            self.batches = []
+            self.threads = set()
+
+        def send(self, data):
+            self.threads.add(threading.current_thread().name)
+            if delay:
+                time.sleep(delay)
+            if fail:
+                raise IOError("Sending failed.")
+            self.data.append(data)
+
+        def send_batch(self, batch):
+            self.batches.append(list(batch))
+            for data in batch:
+                self.send(data)
+
+    return CollectingSender()
+
+
 __all__ = [
-    'readersender'
+    'readersender',
+    'collecting_sender',
 ]
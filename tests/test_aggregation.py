@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_aggregation.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import random
+import statistics
+import pytest
+
+
+def test_running_stats():
+    from .context import readersender
+    from readersender.aggregation import RunningStats
+
+    values = [1e9 + random.random() for _ in range(1000)]
+    stats = RunningStats()
+    for value in values:
+        stats.add(value)
+    assert stats.count == 1000
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.variance(values), rel=1e-6)
+    assert (stats.min, stats.max) == (min(values), max(values))
+    assert (stats.first, stats.last) == (values[0], values[-1])
+    assert readersender is not None
+
+
+def test_sliding_stats():
+    from .context import readersender
+    from readersender.aggregation import SlidingStats
+
+    values = [random.random() for _ in range(200)]
+    stats = SlidingStats(10)
+    for t, value in enumerate(values):
+        stats.add(value, t)
+        stats.expire(t + 1)
+        window = values[max(0, t - 9):t + 1]
+        assert stats.count == len(window)
+        assert stats.mean == pytest.approx(statistics.mean(window))
+        assert (stats.min, stats.max) == (min(window), max(window))
+        if len(window) > 1:
+            assert stats.variance == pytest.approx(statistics.variance(window))
+    assert readersender is not None
+
+
+def test_tumbling_windows():
+    from .context import readersender
+    from readersender.aggregation import WindowAggregator
+
+    aggregator = WindowAggregator(60)
+    windows = []
+    for i in range(1200):     # 10 Hz for two minutes
+        windows += aggregator.add({'ts': 'now', 'ok': True, 'd': {'rnd': i, 'name': 'x'}},
+                                  i / 10)
+    assert len(windows) == 1
+    window = windows[0]
+    assert window['window'] == {'start': '1970-01-01T00:00:00',
+                                'end': '1970-01-01T00:01:00', 'count': 600}
+    assert window['d'] == {'rnd': {'count': 600, 'mean': 299.5, 'min': 0, 'max': 599,
+                                   'last': 599}}
+    assert set(window) == {'d', 'window'}
+
+    windows = aggregator.flush()
+    assert windows[0]['d']['rnd']['min'] == 600
+    assert aggregator.flush() == []
+    assert (aggregator.received, aggregator.emitted) == (1200, 2)
+    assert readersender is not None
+
+
+def test_sliding_windows():
+    from .context import readersender
+    from readersender.aggregation import WindowAggregator
+
+    aggregator = WindowAggregator(10, step=5, fields=['a'], statistics=['count', 'sum'])
+    windows = []
+    for t in range(30):
+        windows += aggregator.add({'a': t, 'b': t}, t)
+    assert [w['a'] for w in windows] == [
+        {'count': 5, 'sum': 10}, {'count': 10, 'sum': 45}, {'count': 10, 'sum': 95},
+        {'count': 10, 'sum': 145}, {'count': 10, 'sum': 195}]
+    # Windows without data are skipped
+    windows = aggregator.add({'a': 1000}, 1000)
+    assert [w['window']['end'] for w in windows] == ['1970-01-01T00:00:30',
+                                                     '1970-01-01T00:00:35']
+    assert aggregator.flush()[0]['a'] == {'count': 1, 'sum': 1000}
+    assert readersender is not None
+
+
+def test_scalar_records():
+    from .context import readersender
+    from readersender.aggregation import WindowAggregator
+
+    aggregator = WindowAggregator(10, statistics=['count', 'mean'])
+    windows = []
+    for t in range(25):
+        windows += aggregator.add(float(t), t)
+    windows += aggregator.flush()
+    assert [w['value'] for w in windows] == [
+        {'count': 10, 'mean': 4.5}, {'count': 10, 'mean': 14.5}, {'count': 5, 'mean': 22.0}]
+    assert readersender is not None
+
+
+def test_aggregator_errors():
+    from .context import readersender
+    from readersender.aggregation import WindowAggregator
+
+    with pytest.raises(ValueError):
+        WindowAggregator(0)
+    with pytest.raises(ValueError):
+        WindowAggregator(10, step=20)
+    with pytest.raises(AttributeError):
+        WindowAggregator(10, statistics=['median'])
+    assert readersender is not None
+
+
+def test_aggregatingsender():
+    from .context import readersender, collecting_sender
+    from readersender.senders import AggregatingSender
+
+    now = [0.0]
+    target = collecting_sender()
+    sender = AggregatingSender(target, 1.0, clock=lambda: now[0])
+    with pytest.raises(RuntimeError):
+        sender.send({'v': 1})
+    sender.connect()
+    for i in range(25):
+        now[0] = i / 10
+        sender.send({'v': i})
+    assert [d['v']['mean'] for d in target.data] == [4.5, 14.5]
+
+    sender.send_batch([readersender.Sample({'v': 100}, time_ns=int(5e9))])
+    assert len(target.data) == 3
+    sender.disconnect()
+    assert [d['v']['last'] for d in target.data] == [9, 19, 24, 100]
+    assert sender.stats() == {'received': 26, 'windows': 4}
+    assert sender.metrics.gauge_values()['windows'] == 4
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_async.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import asyncio
+import pytest
+
+
+def test_asyncreadersender_context():
+    """Tests asynchronous context functionality of AsyncReaderSender.
+    """
+    from .context import readersender
+
+    async def run():
+        async with readersender.AsyncReaderSender() as rs:
+            assert rs.connected
+            await rs.disconnect()
+            assert not rs.connected
+
+    asyncio.run(run())
+
+    # Exceptions raised in the context propagate, and the connection is closed
+    async def fail():
+        async with readersender.AsyncReaderSender() as rs:
+            raise ValueError(rs)
+
+    with pytest.raises(ValueError) as info:
+        asyncio.run(fail())
+    assert not info.value.args[0].connected
+
+    with pytest.raises(TypeError):
+        with readersender.AsyncReaderSender():
+            pass
+
+
+def test_threaded_async_reader():
+    """Tests wrapping a synchronous reader into an AsyncReader.
+    """
+    from .context import readersender
+    from readersender.asyncreader import as_async_reader
+
+    fr = readersender.readers.FooReader()
+    ar = as_async_reader(fr)
+    assert isinstance(ar, readersender.AsyncReader)
+    assert as_async_reader(ar) is ar
+
+    async def run():
+        async with ar:
+            assert fr.connected
+            assert await ar.read() == "foo"
+        assert not fr.connected
+
+    asyncio.run(run())
+
+
+def test_async_main_loop():
+    """Tests running many reader/sender pairs on one event loop.
+    """
+    from .context import readersender
+
+    class CollectingSender(readersender.AsyncSender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.data = []
+
+        async def send(self, data):
+            self.data.append(data)
+
+    pairs = [(readersender.readers.RandomReader(), CollectingSender()) for _ in range(10)]
+
+    async def run():
+        try:
+            await asyncio.wait_for(readersender.tools.async_run_pairs(pairs, run_interval=0.01),
+                                   timeout=0.1)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    for reader, sender in pairs:
+        assert len(sender.data) > 1
+        assert not reader.connected
+        assert not sender.connected
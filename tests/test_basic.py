@@ -78,3 +78,137 @@ def test_randomreader():
     rr.connect()
     rr.read()
     rr.disconnect()
+    # Reads are counted once, by the RandomReader only
+    assert rr.metrics.snapshot()['histograms']['read_seconds']['count'] == 1
+    assert rr.scheme_reader.metrics is None
+
+
+def test_randomreader_read_many():
+    """Tests bulk reading from the RandomReader class.
+    """
+    from .context import readersender
+
+    rr = readersender.readers.RandomReader(seed=1, sample_interval=0.5)
+    rr.connect()
+    records = rr.read_many(100)
+    assert len(records) == 100
+    assert all(0 <= r['d']['rnd'] < 1 for r in records)
+    assert records[0]['ts'] < records[1]['ts']
+
+    columns = rr.read_many(10, columnar=True)
+    assert len(columns['ts']) == len(columns['d']['rnd']) == 10
+    rr.disconnect()
+
+    other = readersender.readers.RandomReader(seed=1)
+    other.connect()
+    assert [r['d']['rnd'] for r in other.read_many(100)] == [r['d']['rnd'] for r in records]
+    other.disconnect()
+
+
+def test_lazy_logging():
+    """Tests deferred formatting and sampling of log messages.
+    """
+    import logging
+    from .context import readersender
+    from readersender.helpers import lazy
+
+    records = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            records.append(record.getMessage())
+
+    logger = logging.getLogger('test_lazy_logging')
+    logger.addHandler(ListHandler())
+    rs = readersender.ReaderSender(logger=logger, loglevel=logging.INFO, log_every=3)
+
+    calls = []
+    rs.log("Value {}", logging.DEBUG, lazy(calls.append, 1))
+    assert not calls and not records
+    assert not rs.log_enabled(logging.DEBUG) and rs.log_enabled(logging.INFO)
+
+    for i in range(7):
+        rs.log("Value {}", logging.INFO, i)
+    assert records == ["Value 0", "Value 3 (2 similar messages suppressed)",
+                       "Value 6 (2 similar messages suppressed)"]
+
+
+def test_guards():
+    """Tests the connection guard decorators.
+    """
+    import inspect
+    import pytest
+    from .context import readersender
+    from readersender.helpers import only_connected, only_disconnected
+
+    class GuardedReader(readersender.Reader):
+        @only_connected(action='raise')
+        def read(self, n=1):
+            """Reads n."""
+            return n
+
+        @only_disconnected(action='raise')
+        def configure(self):
+            return True
+
+    class DelegatingReader(GuardedReader):
+        state = False
+
+        @property
+        def connected(self):
+            return self.state
+
+    assert GuardedReader.read.__name__ == 'read'
+    assert GuardedReader.read.__doc__ == "Reads n."
+    assert list(inspect.signature(GuardedReader.read).parameters) == ['self', 'n']
+
+    reader = GuardedReader()
+    with pytest.raises(RuntimeError):
+        reader.read()
+    assert reader.configure()
+    reader.connect()
+    assert reader.connected
+    assert reader.read(2) == 2
+    assert reader.read_many(2) == [1, 1]
+    with pytest.raises(RuntimeError):
+        reader.configure()
+    reader.disconnect()
+    with pytest.raises(RuntimeError):
+        reader.read()
+
+    reader = DelegatingReader()
+    with pytest.raises(RuntimeError):
+        reader.read()
+    reader.state = True
+    assert reader.read(3) == 3
+
+
+def test_guards_copy():
+    """Tests that copies of a reader bind their methods to themselves.
+    """
+    import copy
+    from .context import readersender
+    from readersender.helpers import guarded_methods, clear_guards_cache
+
+    reader = readersender.readers.FooReader()
+    for clone in (copy.copy(reader), copy.deepcopy(reader)):
+        clone.connect()
+        assert clone.connected
+        assert not reader.connected
+        clone.read()
+        assert clone.metrics.snapshot()['histograms']['read_seconds']['count'] >= 1
+        clone.disconnect()
+        assert not clone.connected
+
+    reader.connect()
+    clone = copy.copy(reader)
+    assert clone.connected
+    clone.disconnect()
+    assert reader.connected and not clone.connected
+    reader.disconnect()
+
+    assert 'read_many' in dict(guarded_methods(type(reader)))
+    clear_guards_cache(type(reader))
+    clear_guards_cache()
+    reader.connect()
+    assert reader.connected
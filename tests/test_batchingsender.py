@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_batchingsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+
+
+def test_batchingsender_count_and_bytes():
+    """Tests flushing batches by count and by size.
+    """
+    from .context import readersender, collecting_sender
+
+    cs = collecting_sender()
+    with readersender.senders.BatchingSender(cs, max_count=3) as bs:
+        for i in range(7):
+            bs.send(i)
+        assert cs.batches == [[0, 1, 2], [3, 4, 5]]
+        assert len(bs) == 1
+    assert cs.batches[-1] == [6]
+    assert not cs.connected
+
+    cs = collecting_sender()
+    with readersender.senders.BatchingSender(cs, max_count=None, max_bytes=10) as bs:
+        for data in ["abcd", "efgh", "ijkl", "m"]:
+            bs.send(data)
+        assert cs.batches == [["abcd", "efgh", "ijkl"]]
+    assert cs.batches[-1] == ["m"]
+
+
+def test_batchingsender_age():
+    """Tests flushing batches by age.
+    """
+    from .context import readersender, collecting_sender
+
+    cs = collecting_sender()
+    bs = readersender.senders.BatchingSender(cs, max_count=None, max_age=0.02)
+    bs.connect()
+    bs.send(1)
+    bs.send(2)
+    assert bs.batch_age is not None
+    time.sleep(0.1)
+    assert cs.batches == [[1, 2]]
+    assert bs.batch_age is None
+    bs.disconnect()
+    assert cs.batches == [[1, 2]]
+
+
+def test_send_batch_default(capsys):
+    """Tests the default send_batch of Sender.
+    """
+    from .context import readersender, collecting_sender
+
+    fs = readersender.senders.FooSender()
+    fs.connect()
+    fs.send_batch(["a", "b"])
+    out = capsys.readouterr().out.splitlines()
+    assert out[-3:] == ["FooSender sending 2 items.", "a", "b"]
+    readersender.Sender.send_batch(fs, ["a", "b"])
+    out = capsys.readouterr().out.splitlines()
+    assert out == ["FooSender sending data.", "a", "FooSender sending data.", "b"]
+    fs.disconnect()
+
+    # The default send_batch sends the items one by one
+    cs = collecting_sender()
+    cs.connect()
+    readersender.Sender.send_batch(cs, ["a", "b"])
+    assert cs.data == ["a", "b"]
+    assert cs.batches == []
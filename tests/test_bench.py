@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_bench.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import json
+import pytest
+
+
+def test_summarize():
+    """Tests the latency statistics of a run.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender import bench
+
+    result = bench.summarize([4000, 1000, 3000, 2000], 0.5, items=40)
+    assert result['calls'] == 4
+    assert result['throughput'] == 80
+    assert result['latency_us']['min'] == 1.0
+    assert result['latency_us']['max'] == 4.0
+    assert result['latency_us']['mean'] == 2.5
+    assert result['latency_us']['p50'] == 2.0
+    assert result['latency_us']['p99'] == 4.0
+    assert bench.percentile([], 50) is None
+
+
+def test_run_benchmarks(tmp_path, capsys):
+    """Tests running benchmarks, the JSON output and comparing with a baseline.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender import bench
+
+    report = bench.run_benchmarks(['schemereader', 'pipeline'], number=20, warmup=1,
+                                  batch_size=5)
+    json.dumps(report)
+    assert report['results']['schemereader']['read']['calls'] == 20
+    assert report['results']['schemereader']['read_many']['items'] == 20
+    assert 'read_send' in report['results']['pipeline']
+    with pytest.raises(AttributeError):
+        bench.run_benchmarks(['nothing'])
+
+    baseline = json.loads(json.dumps(report))
+    assert bench.compare(report, baseline) == []
+    baseline['results']['schemereader']['read']['latency_us']['p50'] /= 10
+    regressions = bench.compare(report, baseline)
+    assert [(name, case) for name, case, *_ in regressions] == [('schemereader', 'read')]
+
+    output = tmp_path / "bench.json"
+    baseline_file = tmp_path / "baseline.json"
+    baseline_file.write_text(json.dumps(baseline))
+    assert bench.main(['foosender', '--number', '10', '--json',
+                       '--output', str(output)]) == 0
+    assert 'foosender' in json.loads(output.read_text())['results']
+    assert bench.main(['schemereader', '--number', '10', '--compare', str(baseline_file),
+                       '--threshold', '1000']) == 0
+    capsys.readouterr()
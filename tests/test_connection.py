@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_connection.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import pytest
+
+
+def test_connection_reuse():
+    """Tests keeping a connection open between uses.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.readers import FooReader
+    from readersender.connection import ConnectionManager
+
+    reader = FooReader()
+    connection = ConnectionManager(reader)
+    assert not connection.connected
+    for _ in range(3):
+        assert connection.call('read') == "foo"
+    assert reader.connected
+    assert connection.stats()['connects'] == 1
+
+    connection = ConnectionManager(FooReader(), idle_timeout=0)
+    with connection.use() as reader:
+        assert reader.connected
+    assert not reader.connected
+
+    connection = ConnectionManager(FooReader(), idle_timeout=0.05)
+    connection.call('read')
+    time.sleep(0.3)
+    assert not connection.connected
+    assert connection.idle_disconnects == 1
+    connection.close()
+
+
+def test_connection_backoff():
+    """Tests reconnecting with exponential backoff and health checks.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.readers import FooReader
+    from readersender.connection import ConnectionManager
+
+    class FlakyReader(FooReader):
+        failing = True
+
+        def connect(self):
+            if self.failing:
+                raise RuntimeError("No connection.")
+            super().connect()
+
+    now = [0.0]
+    reader = FlakyReader()
+    connection = ConnectionManager(reader, backoff=1.0, backoff_factor=2.0,
+                                   clock=lambda: now[0])
+    with pytest.raises(RuntimeError, match="No connection"):
+        connection.acquire()
+    with pytest.raises(RuntimeError, match="Reconnecting"):
+        connection.acquire()
+    now[0] = 1.0
+    with pytest.raises(RuntimeError, match="No connection"):
+        connection.acquire()
+    now[0] = 2.5
+    with pytest.raises(RuntimeError, match="Reconnecting"):
+        connection.acquire()
+    reader.failing = False
+    now[0] = 3.0
+    assert connection.call('read') == "foo"
+    assert connection.connect_failures == 2
+    assert connection.connects == 1
+    connection.close()
+    assert not reader.connected
+
+    healthy = [True]
+    connection = ConnectionManager(FooReader(), keepalive_interval=0.05,
+                                   health_check=lambda rs: healthy[0])
+    connection.call('read')
+    time.sleep(0.2)
+    assert connection.connected
+    healthy[0] = False
+    time.sleep(0.3)
+    assert not connection.connected
+    assert connection.health_check_failures == 1
+    connection.close()
+
+    # A stale connection is detected by ping() and reopened on the next use
+    class PingReader(FooReader):
+        alive = True
+
+        def ping(self):
+            return self.alive
+
+    reader = PingReader()
+    connection = ConnectionManager(reader, keepalive_interval=0.05)
+    connection.call('read')
+    reader.alive = False
+    time.sleep(0.3)
+    assert not connection.connected
+    reader.alive = True
+    assert connection.call('read') == "foo"
+    assert (connection.connects, connection.health_check_failures) == (2, 1)
+    connection.close()
+
+    # Without ping(), the keepalive is disabled
+    connection = ConnectionManager(FooReader(), keepalive_interval=0.05)
+    connection.call('read')
+    time.sleep(0.2)
+    assert connection.connected
+    assert connection.health_check_failures == 0
+    connection.close()
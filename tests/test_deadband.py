@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_deadband.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import pytest
+
+
+def test_deadband():
+    from .context import readersender
+    from readersender.deadband import Deadband
+
+    deadband = Deadband(absolute=0.5, fields={'d.p': {'relative': 0.1}})
+    values = [(20.0, 100), (20.4, 109), (20.6, 109), (20.6, 121), (20.2, 121)]
+    passed = [deadband.check({'ts': str(i), 'd': {'t': t, 'p': p, 'unit': 'C'}})
+              for i, (t, p) in enumerate(values)]
+    assert passed == [True, False, True, True, False]
+    # Changes accumulate against the last passed value
+    assert deadband.check({'d': {'t': 20.2, 'p': 121, 'unit': 'C'}}) is False
+    assert deadband.check({'d': {'t': 20.0, 'p': 121, 'unit': 'C'}}) is True
+    assert deadband.check({'d': {'t': 20.0, 'p': 121, 'unit': 'F'}}) is True
+    assert deadband.check({'d': {'t': 20.0, 'p': 121}}) is True
+    assert deadband.check({'d': {'t': 20.0, 'p': 121, 'ok': True}}) is True
+    assert deadband.changed({'d': {'t': 20.0, 'p': 121, 'ok': False}}) is True
+    assert deadband.check({'d': {'t': 20.0, 'p': 121, 'ok': True}}, source='b') is True
+    assert deadband.stats() == {'passed': 8, 'suppressed': 3, 'heartbeats': 0}
+
+    deadband.reset()
+    assert deadband.check({'d': {'t': 20.0, 'p': 121, 'ok': True}}) is True
+    assert readersender is not None
+
+
+def test_deadband_nan():
+    from .context import readersender
+    from readersender.deadband import Deadband
+
+    nan = float('nan')
+    deadband = Deadband(absolute=1)
+    assert [deadband.check({'v': v}) for v in [nan, nan, 1.0, 1.5, 50.0, nan, nan, 1e9]] == \
+        [True, False, True, False, True, True, False, True]
+    assert readersender is not None
+
+
+def test_deadband_heartbeat():
+    from .context import readersender
+    from readersender.deadband import Deadband
+
+    now = [0.0]
+    deadband = Deadband(heartbeat=10, clock=lambda: now[0])
+    passed = []
+    for t in range(25):
+        now[0] = t
+        passed.append(deadband.check(readersender.Sample(1.0, source='a')))
+    assert [t for t, p in enumerate(passed) if p] == [0, 10, 20]
+    assert deadband.heartbeats == 2
+
+
+def test_deadband_errors():
+    from .context import readersender
+    from readersender.deadband import Deadband
+
+    with pytest.raises(ValueError):
+        Deadband(absolute=-1)
+    with pytest.raises(ValueError):
+        Deadband(heartbeat=0)
+    with pytest.raises(AttributeError):
+        Deadband(fields={'d.t': {'percent': 1}})
+    assert readersender is not None
+
+
+def test_deadbandsender():
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import DeadbandSender
+
+    target = collecting_sender()
+    sender = DeadbandSender(target, absolute=1)
+    with pytest.raises(RuntimeError):
+        sender.send({'v': 1})
+    sender.connect()
+    assert [sender.send({'v': v}) for v in [0, 0.5, 1.5, 2]] == [True, False, True, False]
+    assert sender.send({'v': 2}, source='other') is True
+    assert sender.send_batch([{'v': v} for v in [2.4, 3, 5]]) == 2
+    assert target.data == [{'v': 0}, {'v': 1.5}, {'v': 2}, {'v': 3}, {'v': 5}]
+    assert sender.metrics.gauge_values()['suppressed'] == 3
+    sender.disconnect()
+
+
+def test_deadbandsender_failure():
+    """Tests that data is passed again when the wrapped sender fails to send it.
+    """
+    from .context import readersender, collecting_sender
+    from readersender.senders import DeadbandSender
+
+    class FlakySender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.fail = False
+            self.target = collecting_sender()
+
+        def send(self, data):
+            if self.fail:
+                raise IOError("Sending failed.")
+            self.target.send(data)
+
+    flaky = FlakySender()
+    sender = DeadbandSender(flaky, absolute=1)
+    sender.connect()
+    assert sender.send({'v': 0}) is True
+    flaky.fail = True
+    with pytest.raises(IOError):
+        sender.send({'v': 10})
+    with pytest.raises(IOError):
+        sender.send_batch([{'v': 10}, {'v': 20}])
+    flaky.fail = False
+    assert sender.send({'v': 10}) is True
+    assert sender.send_batch([{'v': 10}, {'v': 20}]) == 1
+    assert flaky.target.data == [{'v': 0}, {'v': 10}, {'v': 20}]
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_framing.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import struct
+import pytest
+
+
+def test_checksums():
+    """Tests checksum functions against known values.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender import framing
+
+    assert framing.crc16_modbus(b"123456789") == 0x4B37
+    assert framing.crc32(b"123456789") == 0xCBF43926
+    assert framing.sum8(b"\xff\x02") == 0x01
+    assert framing.xor8(b"\x0f\xf0") == 0xff
+
+
+def test_delimiter_framer():
+    """Tests splitting a stream by a delimiter across chunk boundaries.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.framing import DelimiterFramer
+
+    framer = DelimiterFramer(b"\r\n", capacity=16)
+    assert framer.feed(b"abc\r") == []
+    assert framer.feed(b"\nde\r\nf") == [b"abc", b"de"]
+    assert framer.feed(b"g" * 20 + b"\r\nh\r\n") == [b"h"]
+    assert framer.overflows == 1
+
+    framer = DelimiterFramer(b";", checksum='xor8')
+    assert framer.feed(b"ab" + bytes([ord('a') ^ ord('b')]) + b";ab\x00;") == [b"ab"]
+    assert framer.errors == 1
+
+
+def test_length_prefix_framer():
+    """Tests length-prefixed frames with sync bytes, checksums and struct decoding.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.framing import LengthPrefixFramer, StructDecoder, crc16_modbus
+
+    def frame(payload, valid=True):
+        crc = crc16_modbus(payload) ^ (0 if valid else 1)
+        return b"\xaa\x55" + struct.pack(">B", len(payload)) + payload + struct.pack("<H", crc)
+
+    decoder = StructDecoder("<hf", fields=['id', 'value'])
+    framer = LengthPrefixFramer(length_format=">B", sync=b"\xaa\x55",
+                                checksum='crc16-modbus')
+    stream = b"noise" + frame(struct.pack("<hf", 1, 0.5)) + \
+        frame(struct.pack("<hf", 2, 1.5), valid=False) + frame(struct.pack("<hf", 3, 2.5))
+    records = []
+    for i in range(0, len(stream), 3):
+        view = framer.writable()
+        chunk = stream[i:i + 3]
+        view[:len(chunk)] = chunk
+        framer.commit(len(chunk))
+        records.extend(decoder(f) for f in framer.frames())
+    assert records == [{'id': 1, 'value': 0.5}, {'id': 3, 'value': 2.5}]
+    assert framer.errors == 1
+    assert len(framer) == 0
+
+    assert StructDecoder("<hf").decode(struct.pack("<hf", 1, 0.5)) == (1, 0.5)
+    with pytest.raises(ValueError):
+        StructDecoder("<hf", fields=['id'])
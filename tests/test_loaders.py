@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_loaders.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import os
+import sys
+import subprocess
+import pytest
+
+
+def test_lazy_imports():
+    """Tests that importing the package does not import the readers, senders and tools.
+    """
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    code = ("import sys, readersender; "
+            "print(sorted(m for m in sys.modules if m.startswith('readersender.') or "
+            "m in ('asyncio', 'serial', 'paho', 'http.server')))")
+    env = dict(os.environ, PYTHONPATH=src)
+    output = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                            stdout=subprocess.PIPE, universal_newlines=True).stdout
+    assert eval(output) == ['readersender.helpers', 'readersender.metrics',
+                            'readersender.reader', 'readersender.readersender',
+                            'readersender.sample', 'readersender.sender']
+
+
+def test_lazy_attributes():
+    """Tests accessing lazily imported attributes.
+    """
+    from .context import readersender
+
+    assert readersender.readers.FooReader.__name__ == 'FooReader'
+    assert 'RandomReader' in dir(readersender.readers)
+    assert readersender.AsyncReader.__name__ == 'AsyncReader'
+    with pytest.raises(AttributeError):
+        readersender.readers.NoSuchReader
+    from readersender.senders import FooSender   # noqa: F401
+
+
+def test_load_classes(monkeypatch):
+    """Tests loading readers and senders by name from built-ins, entry points and the
+    naming convention.
+    """
+    from .context import readersender
+    from readersender.tools import loaders
+
+    assert loaders.load_reader_class('random') is readersender.readers.RandomReader
+    assert loaders.load_reader_class('Scheme') is readersender.readers.SchemeReader
+    assert loaders.load_sender_class('foo') is readersender.senders.FooSender
+    # Not built-in, found by the naming convention
+    assert loaders.load_sender_class('queued') is readersender.senders.QueuedSender
+    with pytest.raises(ImportError):
+        loaders.load_reader_class('nothing')
+
+    class EntryPoint(object):
+        name = 'Custom'
+
+        def load(self):
+            return readersender.readers.FooReader
+
+    monkeypatch.setattr(loaders, 'entry_points',
+                        lambda group: {'custom': EntryPoint()} if group == loaders.READER_GROUP
+                        else {})
+    assert loaders.load_reader_class('custom') is readersender.readers.FooReader
+    assert 'custom' in loaders.reader_names()
+    assert loaders.sender_names() == ['foo', 'mqtt']
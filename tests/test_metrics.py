@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_metrics.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import json
+import urllib.request
+import pytest
+
+
+def test_histogram():
+    """Tests the buckets and quantiles of a latency histogram.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.metrics import Histogram
+
+    histogram = Histogram()
+    assert histogram.quantile(0.5) is None
+    for value in [500, 1500, 1500, 3000, 10 ** 12]:
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['count'] == 5
+    assert snapshot['buckets'][0] == [1.024e-06, 1]
+    assert snapshot['buckets'][1] == [2.048e-06, 3]
+    assert snapshot['buckets'][-1][1] == 4
+    assert histogram.quantile(0.5) == 2.048e-06
+    assert histogram.quantile(1.0) == float('inf')
+
+
+def test_readersender_metrics():
+    """Tests the metrics recorded by readers and senders.
+    """
+    from .context import readersender
+
+    values = iter([1, None, 2])
+    sr = readersender.readers.SchemeReader(lambda: next(values), metrics='test-reader')
+    assert sr.metrics.name.startswith('test-reader-')
+    with pytest.raises(RuntimeError):
+        sr.read()
+    sr.connect()
+    for _ in range(3):
+        sr.read()
+    with pytest.raises(StopIteration):
+        sr.read()
+    sr.disconnect()
+    snapshot = sr.metrics.snapshot()
+    assert snapshot['histograms']['read_seconds']['count'] == 5
+    assert snapshot['histograms']['connect_seconds']['count'] == 1
+    assert snapshot['counters']['read_timeouts'] == 1
+    assert snapshot['counters']['read_errors'] == 2
+
+    fs = readersender.senders.FooSender(metrics=False)
+    assert fs.metrics is None
+
+    bs = readersender.senders.BatchingSender(readersender.senders.FooSender(), max_count=10)
+    bs.connect()
+    bs.send(1)
+    assert bs.metrics.snapshot()['gauges']['batched'] == 1
+    assert bs.metrics.snapshot()['histograms']['send_seconds']['count'] == 1
+    bs.disconnect()
+
+
+def test_metrics_export(tmp_path):
+    """Tests the Prometheus endpoint and the JSON dump.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender import metrics
+
+    registry = set()
+    m = metrics.Metrics('test-export', register=False)
+    registry.add(m)
+    m.inc('runs', 2)
+    m.gauge('queue', lambda: {'depth': 3, 'name': 'skipped'})
+    m.gauge('broken', lambda: 1 / 0)
+    m.histogram('read_seconds').observe(1500)
+
+    text = metrics.format_prometheus(metrics.collect(registry))
+    label = 'instance="{}"'.format(m.name)
+    assert "# TYPE readersender_runs_total counter" in text
+    assert "readersender_runs_total{{{}}} 2".format(label) in text
+    assert "readersender_queue_depth{{{}}} 3".format(label) in text
+    assert 'readersender_read_seconds_bucket{{{},le="+Inf"}} 1'.format(label) in text
+    assert "readersender_read_seconds_count{{{}}} 1".format(label) in text
+
+    server = metrics.MetricsServer(0, host='127.0.0.1', registry=registry).start()
+    try:
+        url = "http://127.0.0.1:{}".format(server.address[1])
+        with urllib.request.urlopen(url + "/metrics") as response:
+            assert response.read().decode('utf-8') == text
+        with urllib.request.urlopen(url + "/metrics.json") as response:
+            assert json.loads(response.read())[m.name]['counters'] == {'runs': 2}
+    finally:
+        server.stop()
+
+    path = tmp_path / "metrics.json"
+    dumper = metrics.MetricsDumper(str(path), interval=60, registry=registry).start()
+    dumper.stop()
+    assert json.loads(path.read_text())['metrics'][m.name]['gauges'] == {'queue_depth': 3}
@@ -8,9 +8,7 @@ Unit tests using the pytest framework.
 @license:       MIT License
 """
 import pytest
-import os
-import pty
-import string
+import threading
 try:
     import paho.mqtt.client as mqtt
 except ModuleNotFoundError:
@@ -26,4 +24,109 @@ def test_mqttsender():
 
     assert MqttSender() is not None
 
-    
+
+class FakeMessageInfo(object):
+    def __init__(self, mid, rc=0):
+        self.mid = mid
+        self.rc = rc
+
+
+class FakeClient(object):
+    """A stand-in for paho.mqtt.client.Client, which publishes on a background thread.
+    """
+    def __init__(self, delay=0.001, connected=True):
+        self.delay = delay
+        self.connected = connected
+        self.messages = []
+        self.mid = 0
+        self.acks = True
+
+    def connect_async(self, host, port, keepalive, bind_address):
+        self.address = (host, port)
+
+    def loop_start(self):
+        if self.connected:
+            threading.Timer(self.delay, self.on_connect, args=(self, None, {}, 0)).start()
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        if not self.connected:
+            return FakeMessageInfo(None, 4)
+        self.mid += 1
+        self.messages.append((topic, payload, qos, retain))
+        if self.acks:
+            threading.Timer(self.delay, self.on_publish, args=(self, None, self.mid)).start()
+        return FakeMessageInfo(self.mid)
+
+
+def test_mqttsender_fake_client():
+    """Tests publishing with a fake MQTT client.
+    """
+    from .context import readersender
+
+    client = FakeClient()
+    ms = readersender.senders.MqttSender(config={'topic': 'sensors/{id}', 'max_inflight': 2},
+                                         client=client)
+    with pytest.raises(RuntimeError):
+        ms.send("data")
+
+    ms.connect()
+    assert ms.wait_for_publish(1.0)
+    handles = [ms.send({'id': i, 'value': i / 2}) for i in range(10)]
+    assert [h.mid for h in handles] == list(range(1, 11))
+    assert ms.pending <= 2
+    assert ms.wait_for_publish(1.0)
+    assert ms.connected
+    assert client.messages[0] == ('sensors/0', '{"id": 0, "value": 0.0}', 0, False)
+
+    ms.config['batch_as_array'] = True
+    ms.send_batch([{'id': 'a'}, {'id': 'b'}], qos=1)
+    ms.disconnect()
+    assert client.messages[-1] == ('sensors/a', '[{"id": "a"}, {"id": "b"}]', 1, False)
+    assert not ms.connected
+    assert ms.pending == 0
+
+
+def test_mqttsender_not_connected():
+    """Tests that unqueued messages do not leak in-flight slots.
+    """
+    from .context import readersender
+
+    ms = readersender.senders.MqttSender(config={'max_inflight': 1},
+                                         client=FakeClient(connected=False))
+    ms.connect()
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            ms.send("data")
+    assert ms.pending == 0
+    ms.disconnect()
+
+
+def test_mqttsender_connection_lost():
+    """Tests that QoS 0 messages lost with the connection release their in-flight slots.
+    """
+    from .context import readersender
+
+    client = FakeClient()
+    ms = readersender.senders.MqttSender(config={'max_inflight': 2, 'inflight_timeout': 0.1},
+                                         client=client)
+    ms.connect()
+    assert ms.wait_for_publish(1.0)
+    client.acks = False
+    ms.send("lost")
+    ms.send("kept", qos=1)
+    with pytest.raises(RuntimeError):
+        ms.send("full")
+    client.on_disconnect(client, None, 1)
+    assert ms.pending == 1
+    assert ms.discarded == 1
+    client.acks = True
+    ms.send("after")
+    client.on_publish(client, None, 2)
+    assert ms.wait_for_publish(1.0)
+    ms.disconnect()
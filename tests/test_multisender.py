@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_multisender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import pytest
+
+
+def test_multisender():
+    """Tests sending to many senders in parallel.
+    """
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import MultiSender
+
+    senders = [collecting_sender(0.05) for _ in range(4)]
+    ms = MultiSender(senders)
+    ms.connect()
+    started = time.monotonic()
+    assert ms.send(1) == []
+    assert time.monotonic() - started < 0.15
+    ms.send_batch([2, 3])
+    ms.disconnect()
+    assert all(sender.data == [1, 2, 3] for sender in senders)
+    assert len(set.union(*(sender.threads for sender in senders))) == 4
+    assert ms.stats()['sent'] == 8
+    stats = ms.sink_stats()
+    assert len(stats) == 4
+    assert all(s['latency_p50'] >= 0.05 for s in stats.values())
+
+    with pytest.raises(AttributeError):
+        MultiSender([])
+    with pytest.raises(ValueError):
+        MultiSender(senders, timeout=[1.0])
+
+
+def test_multisender_failures():
+    """Tests that slow and failing senders do not affect the others.
+    """
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import MultiSender
+
+    fast, slow, failing = collecting_sender(), collecting_sender(0.3), collecting_sender(fail=True)
+    ms = MultiSender([fast, slow, failing], timeout=[None, 0.05, None], max_pending=1)
+    ms.connect()
+    failed = ms.send(1)
+    assert len(failed) == 2
+    # The slow sender is still busy, so its data is dropped
+    assert len(ms.send(2)) == 2
+    assert fast.data == [1, 2]
+    ms.disconnect()
+    assert slow.data == [1]
+    sinks = ms.sinks
+    assert (sinks[1].timeouts, sinks[1].dropped) == (1, 1)
+    assert sinks[2].errors == 2
+    assert ms.metrics.snapshot()['gauges']['sink2_errors'] == 2
+
+    ms = MultiSender([collecting_sender(fail=True)])
+    ms.connect()
+    with pytest.raises(RuntimeError):
+        ms.send(1)
+    ms.disconnect()
+
+
+def test_multisender_reconnect():
+    """Tests that a sender that failed to connect is reconnected with backoff.
+    """
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import MultiSender
+
+    class DownSender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.data = []
+            self.up = False
+            self.attempts = 0
+
+        def connect(self):
+            self.attempts += 1
+            if not self.up:
+                raise IOError("Down.")
+            self._connected = True
+
+        def send(self, data):
+            self.data.append(data)
+
+    up, down = collecting_sender(), DownSender()
+    ms = MultiSender([up, down], retry_delay=0.1)
+    ms.connect()
+    assert ms.send(1) == [ms.sinks[1].name]
+    assert down.attempts == 1
+    down.up = True
+    assert len(ms.send(2)) == 1
+    time.sleep(0.1)
+    assert ms.send(3) == []
+    assert down.data == [3]
+    assert down.attempts == 2
+    assert ms.sink_stats()[ms.sinks[1].name]['reconnects'] == 1
+    ms.disconnect()
+    assert up.data == [1, 2, 3]
+
+
+def test_multisender_async_connect():
+    """Tests that a sender that connects in the background is not failed meanwhile.
+    """
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import MultiSender
+
+    class AsyncSender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.data = []
+            self.ready = False
+
+        def connect(self):
+            # The connection is established later, like with MqttSender
+            if self.ready:
+                self._connected = True
+
+        def send(self, data):
+            self.data.append(data)
+
+    slow = AsyncSender()
+    ms = MultiSender([slow])
+    ms.connect()
+    with pytest.raises(RuntimeError):
+        ms.send(1)
+    slow.ready = True
+    assert ms.send(2) == []
+    assert slow.data == [2]
+    assert ms.stats()['errors'] == 0
+    assert ms.stats()['dropped'] == 1
+    assert ms.sinks[0].failures == 0
+    ms.disconnect()
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_queuedsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import queue
+import threading
+import pytest
+
+
+def test_ringbuffer_overflow_policies():
+    """Tests the overflow policies of RingBuffer.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.ringbuffer import RingBuffer
+
+    rb = RingBuffer(3, 'drop-oldest')
+    assert all(rb.put(i) for i in range(5))
+    assert [rb.get() for _ in range(3)] == [2, 3, 4]
+    assert rb.stats()['dropped'] == 2
+
+    rb = RingBuffer(3, 'drop-newest')
+    assert [rb.put(i) for i in range(5)] == [True, True, True, False, False]
+    assert [rb.get() for _ in range(3)] == [0, 1, 2]
+
+    rb = RingBuffer(1, 'block')
+    rb.put(0)
+    assert not rb.put(1, timeout=0.01)
+    threading.Timer(0.01, rb.get).start()
+    assert rb.put(2, timeout=1.0)
+    assert rb.get() == 2
+    assert rb.stats() == {'queued': 0, 'enqueued': 2, 'dequeued': 2, 'dropped': 1,
+                          'high_watermark': 1}
+
+    rb.put(3)
+    rb.close()
+    with pytest.raises(RuntimeError):
+        rb.put(4)
+    assert rb.get() == 3
+    with pytest.raises(queue.Empty):
+        rb.get()
+
+
+def test_queuedsender():
+    """Tests that a slow sender does not block the QueuedSender.
+    """
+    from .context import readersender
+
+    class SlowSender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.data = []
+
+        def send(self, data):
+            time.sleep(0.01)
+            self.data.append(data)
+
+    slow = SlowSender()
+    qs = readersender.senders.QueuedSender(slow, maxsize=100)
+    qs.connect()
+    assert qs.connected and slow.connected
+
+    start = time.monotonic()
+    for i in range(20):
+        assert qs.send(i)
+    assert time.monotonic() - start < 0.1
+
+    qs.disconnect()
+    assert not qs.connected and not slow.connected
+    assert slow.data == list(range(20))
+    assert qs.stats()['sent'] == 20
+
+    with pytest.raises(RuntimeError):
+        qs.send(0)
+
+
+def test_queuedsender_drain_timeout():
+    """Tests that the wrapped sender is not disconnected under a sending thread that is
+    still running, that its unsent data is kept, and that failed sends are counted.
+    """
+    from .context import readersender, collecting_sender
+
+    slow = collecting_sender(delay=0.2)
+    qs = readersender.senders.QueuedSender(slow, drain_timeout=0.05)
+    qs.connect()
+    qs.send(1)
+    qs.send(2)
+    qs.disconnect()
+    assert slow.connected
+    time.sleep(0.3)
+    # The thread is stopped after its current send and disconnects the wrapped sender
+    assert slow.data == [1]
+    assert not slow.connected
+    assert qs.stats()['queued'] == 1
+    # The unsent item is sent after the next connect
+    qs.connect()
+    qs.send(3)
+    time.sleep(0.5)
+    qs.disconnect()
+    assert slow.data == [1, 2, 3]
+
+    failing = collecting_sender(fail=True)
+    qs = readersender.senders.QueuedSender(failing, retry_delay=0)
+    qs.connect()
+    for i in range(3):
+        qs.send(i)
+    qs.disconnect()
+    assert qs.stats()['errors'] == 3
+    assert not failing.connected
@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_sample.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import json
+import time
+import datetime
+import threading
+
+
+def test_sample():
+    """Tests the timestamps and formatting of a Sample.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.sample import Sample, SampleClock, sample_default
+
+    before = time.time_ns()
+    sample = Sample({'v': 1}, seq=3, source='src')
+    assert abs(sample.time_ns - before) < 10 ** 9
+    assert sample.monotonic_ns is not None
+
+    sample = Sample({'v': 1}, seq=3, source='src', time_ns=1577836800123456789)
+    assert sample.isoformat() == '2020-01-01T00:00:00.123456'
+    assert sample.timestamp == 1577836800.1234567
+    assert sample.as_dict() == {'ts': '2020-01-01T00:00:00.123456', 'seq': 3,
+                                'source': 'src', 'd': {'v': 1}}
+    assert json.loads(json.dumps([sample], default=sample_default)) == [sample.as_dict()]
+    assert datetime.datetime.fromisoformat(Sample(None).isoformat())
+
+    clock = SampleClock(resync_interval=0)
+    first = clock.now()
+    second = clock.now()
+    assert second[1] >= first[1]
+
+
+def test_sample_batch():
+    """Tests the columnar SampleBatch.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.sample import Sample, SampleBatch
+
+    samples = [Sample(i, seq=i, source='a', time_ns=i * 1000, monotonic_ns=i) for i in range(5)]
+    batch = SampleBatch(samples)
+    assert len(batch) == 5
+    assert list(batch) == samples
+    assert batch[2] == samples[2]
+    assert list(batch[1:3]) == samples[1:3]
+    assert batch.as_dicts() == [s.as_dict() for s in samples]
+    assert batch.time_ns.itemsize == 8
+
+    batch = SampleBatch.from_payloads(['x', 'y'], first_seq=10, source='b', time_ns=5,
+                                      monotonic_ns=6)
+    assert [(s.payload, s.seq, s.source, s.time_ns) for s in batch] == \
+        [('x', 10, 'b', 5), ('y', 11, 'b', 5)]
+
+
+def test_read_sample(capsys):
+    """Tests reading samples and sending them.
+    """
+    from .context import readersender
+    from readersender.serialization import get_codec
+
+    sr = readersender.readers.SchemeReader({'v': lambda: 1}, source='meter')
+    sr.connect()
+    first = sr.read_sample()
+    second = sr.read_sample()
+    assert (first.seq, second.seq) == (0, 1)
+    assert first.source == 'meter'
+    assert first.payload == {'v': 1}
+    assert second.monotonic_ns >= first.monotonic_ns
+    batch = sr.read_samples(3)
+    assert list(batch.seq) == [2, 3, 4]
+    assert sr.read_sample().seq == 5
+    # An empty batch does not use a sequence number
+    assert len(sr.read_samples(0)) == 0
+    assert sr.read_sample().seq == 6
+
+    rr = readersender.readers.RandomReader()
+    assert rr.source.startswith('RandomReader')
+
+    codec = get_codec('json')
+    assert json.loads(codec.encode(first)) == first.as_dict()
+    fs = readersender.senders.FooSender()
+    fs.connect()
+    fs.send(first)
+    assert "source='meter'" in capsys.readouterr().out
+
+
+def test_read_sample_threads():
+    """Tests that concurrent read_sample() and read_samples() calls get unique sequence
+    numbers.
+    """
+    from .context import readersender
+
+    sr = readersender.readers.SchemeReader({'v': lambda: 1})
+    sr.connect()
+    seqs = []
+
+    def read():
+        for _ in range(200):
+            seqs.append(sr.read_sample().seq)
+            seqs.extend(sr.read_samples(3).seq)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seqs) == list(range(3200))
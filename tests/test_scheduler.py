@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_scheduler.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import pytest
+
+
+class FakeClock(object):
+    """A clock that only advances when sleeping or working.
+    """
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+
+def run_ticks(policy, work_times):
+    from .context import readersender   # noqa: F401
+    from readersender.scheduler import IntervalScheduler
+
+    clock = FakeClock()
+    scheduler = IntervalScheduler(1.0, overrun_policy=policy, clock=clock, sleep=clock.sleep)
+    released = []
+    for work in work_times:
+        scheduler.wait()
+        released.append(clock.now - 100.0)
+        clock.now += work
+    return released, scheduler.stats
+
+
+def test_scheduler_no_drift():
+    """Tests that ticks stay on the grid regardless of work time.
+    """
+    released, stats = run_ticks('skip', [0.3, 0.9, 0.1, 0.5])
+    assert released == pytest.approx([0.0, 1.0, 2.0, 3.0])
+    assert stats.ticks == 4
+    assert stats.overruns == 0
+    assert stats.max_lateness == pytest.approx(0.0)
+
+
+def test_scheduler_overrun_policies():
+    """Tests skip, catch-up and coalesce overrun policies.
+    """
+    released, stats = run_ticks('skip', [2.5, 0.1, 0.1])
+    assert released == pytest.approx([0.0, 3.0, 4.0])
+    assert stats.missed == 2
+
+    released, stats = run_ticks('catch-up', [2.5, 0.1, 0.1, 0.1, 0.1])
+    assert released == pytest.approx([0.0, 2.5, 2.6, 3.0, 4.0])
+    assert stats.missed == 0
+    assert stats.max_lateness == pytest.approx(1.5)
+
+    released, stats = run_ticks('coalesce', [2.5, 0.1, 0.1])
+    assert released == pytest.approx([0.0, 2.5, 3.0])
+    assert stats.missed == 1
+    assert stats.last_lateness == pytest.approx(0.0)
+    assert stats.as_dict()['overruns'] == 1
+
+
+def test_scheduler_arguments():
+    """Tests argument validation.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.scheduler import IntervalScheduler
+
+    assert IntervalScheduler(0.25).interval == 0.25
+    with pytest.raises(ValueError):
+        IntervalScheduler(0)
+    with pytest.raises(AttributeError):
+        IntervalScheduler(1, overrun_policy='unknown')
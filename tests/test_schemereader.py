@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_schemereader.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import itertools
+import pytest
+
+
+def test_schemereader():
+    """Tests reading a compiled scheme.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.readers import SchemeReader
+
+    counter = itertools.count()
+    sr = SchemeReader({'n': lambda: next(counter), 'l': [lambda: 'a', (lambda: 'b',)],
+                       'd': {'e': lambda: None}})
+    sr.connect()
+    assert sr.read() == {'n': 0, 'l': ['a', ['b']], 'd': {'e': None}}
+    assert sr.read()['n'] == 1
+
+    sr.scheme = [lambda: 1]
+    assert sr.read() == [1]
+    sr.disconnect()
+
+    with pytest.raises(AttributeError):
+        sr.scheme = {'a': {'b': 1}}
+    with pytest.raises(AttributeError):
+        SchemeReader({'a': 'not callable'})
+
+
+def test_schemereader_read_many():
+    """Tests bulk reading with vectorized and plain scheme functions.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.readers import SchemeReader, Vectorized
+
+    counter = itertools.count()
+    sr = SchemeReader({'n': lambda: next(counter),
+                       'v': Vectorized(lambda: -1, lambda n: list(range(n))),
+                       'l': [lambda: 'a'], 'e': {}})
+    sr.connect()
+    assert sr.read()['v'] == -1
+    assert sr.read_many(3) == [{'n': 1 + i, 'v': i, 'l': ['a'], 'e': {}} for i in range(3)]
+    assert sr.read_many(2, columnar=True) == {'n': [4, 5], 'v': [0, 1], 'l': [['a', 'a']],
+                                              'e': {}}
+    sr.disconnect()
+    with pytest.raises(RuntimeError):
+        sr.read_many(1)
+
+    from readersender.readers import FooReader
+    fr = FooReader()
+    fr.connect()
+    assert fr.read_many(2) == ["foo", "foo"]
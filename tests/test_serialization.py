@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_serialization.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import json
+import pytest
+
+
+RECORDS = [
+    {'ts': '2020-01-01T00:00:00', 'd': {'rnd': 0.25, 'n': 3, 'ok': True, 'x': None}},
+    {'ts': 'päivä "1"', 'd': {'rnd': float('nan'), 'n': -1, 'ok': False, 'x': [1]}},
+]
+
+
+def test_codec_roundtrip():
+    """Tests encoding and decoding with every available codec.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.serialization import available_codecs, get_codec
+
+    record = {'ts': 'a', 'd': {'rnd': 0.5, 'values': [1, 2, 3]}}
+    for name in available_codecs():
+        if name in ('str', 'schema-json'):
+            continue
+        codec = get_codec(name)
+        payload = codec.encode(record)
+        assert isinstance(payload, bytes)
+        assert codec.decode(payload) == record
+        batch = codec.encode_batch([record, record])
+        if codec.separator:
+            assert [codec.decode(line) for line in batch.splitlines()] == [record, record]
+
+    codec = get_codec('json')
+    assert codec.encode_batch([1, 2]) == b"1\n2\n"
+    assert codec.encode_batch([3]) == b"3\n"
+
+
+def test_schema_json_codec():
+    """Tests that the schema codec produces the same output as the json codec.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.serialization import get_codec
+
+    scheme = {'ts': None, 'd': {'rnd': None, 'n': None, 'ok': None, 'x': None}}
+    codec = get_codec('schema-json', scheme=scheme)
+    reference = get_codec('json')
+    for record in RECORDS:
+        assert codec.encode(record) == reference.encode(record)
+    json.loads(codec.encode(RECORDS[0]))
+
+    # Records that do not fit the scheme fall back to plain JSON
+    assert codec.encode({'other': 1}) == b'{"other":1}'
+    assert codec.encode([1, 2]) == b'[1,2]'
+    # Keys and list items that are not in the scheme are not dropped
+    codec = get_codec('schema-json', scheme={'a': None, 'x': {'y': None}, 'l': [None]})
+    for record in ({'a': 1, 'x': {'y': 1, 'q': 3}, 'l': [1]},
+                   {'a': 1, 'x': {'y': 1}, 'l': [1, 2]},
+                   {'a': 1, 'x': {'y': 1}, 'l': [1], 'b': 2},
+                   {'a': 1, 'x': {'y': 1}, 'l': [1]}):
+        assert codec.encode(record) == reference.encode(record)
+
+    with pytest.raises(AttributeError):
+        get_codec('schema-json')
+    with pytest.raises(AttributeError):
+        get_codec('schema-json', scheme={1: None})
+    with pytest.raises(AttributeError):
+        get_codec('no-such-codec')
+
+
+def test_sender_codec(capsys):
+    """Tests sending data with a codec.
+    """
+    from .context import readersender
+
+    fs = readersender.senders.FooSender(codec='json')
+    assert fs.codec.name == 'json'
+    fs.connect()
+    fs.send({'a': [1, 2]})
+    fs.send_batch([1, 'b'])
+    fs.disconnect()
+    lines = capsys.readouterr().out.splitlines()
+    assert '{"a":[1,2]}' in lines
+    assert lines.index('1') + 1 == lines.index('"b"')
+
+    fs = readersender.senders.FooSender()
+    assert fs.codec is None
+    assert fs.encode({'a': 1}) == {'a': 1}
+
+    rr = readersender.readers.RandomReader(seed=1)
+    rr.connect()
+    codec = readersender.serialization.get_codec('schema-json', scheme=rr.scheme)
+    data = rr.read()
+    assert json.loads(codec.encode(data)) == data
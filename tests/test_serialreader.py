@@ -11,6 +11,8 @@ import pytest
 import os
 import pty
 import string
+import struct
+import time
 try:
     import serial
 except ModuleNotFoundError:
@@ -93,3 +95,162 @@ def test_serialreader(fake_serial_ports):
         fd.flush()
 
         assert sr.read() == probe_msg
+
+
+@pytest.mark.skipif(serial is None, reason="Cannot test without 'serial' module.")
+@pytest.mark.skipif(pty is None, reason="Cannot test without 'pty' module (available on " +
+                    "unix-like platforms).")
+def test_serialreader_streaming(fake_serial_ports):
+    """Tests the streaming mode of serialreader.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.readers import SerialReader
+
+    master_pty, slave_tty = fake_serial_ports
+
+    sr = SerialReader(port=slave_tty, timeout=0.1, streaming=True)
+    assert sr.streaming
+    assert sr.read_nowait() is None
+
+    lines = ["line {}\n".format(i) for i in range(1000)]
+    os.write(master_pty, "".join(lines).encode('utf-8') + b"partial")
+    frames = list(sr.frames(timeout=0.5))
+    assert frames == lines
+
+    os.write(master_pty, b" line\n")
+    assert sr.read() == "partial line\n"
+    assert sr.read() is None
+
+    # Invalid UTF-8 drops the frame but not the stream
+    os.write(master_pty, b"bad \xff\n" + b"good\n")
+    assert list(sr.frames(timeout=0.5)) == ["good\n"]
+    assert sr.decode_errors == 1
+    assert sr.streaming
+
+    sr.disconnect()
+    assert not sr.streaming
+    sr.connect()
+    assert sr.streaming
+    sr.stop_streaming()
+    assert not sr.streaming
+
+    sr.read_mode = 'until'
+    sr.end_mark = ';'
+    sr.start_streaming()
+    os.write(master_pty, b"a;bb;ccc")
+    assert list(sr.frames(timeout=0.2)) == ["a;", "bb;"]
+
+    # The stream thread reports that it has stopped when the port fails
+    os.close(master_pty)
+    for _ in range(50):
+        if not sr.streaming:
+            break
+        time.sleep(0.01)
+    assert not sr.streaming
+    assert list(sr.frames(timeout=0.2)) == []
+    sr.disconnect()
+
+
+@pytest.mark.skipif(serial is None, reason="Cannot test without 'serial' module.")
+@pytest.mark.skipif(pty is None, reason="Cannot test without 'pty' module (available on " +
+                    "unix-like platforms).")
+def test_serialreader_frames(fake_serial_ports):
+    """Tests binary frame mode of serialreader.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.readers import SerialReader
+    from readersender.framing import FixedLengthFramer, StructDecoder
+
+    master_pty, slave_tty = fake_serial_ports
+
+    sr = SerialReader(port=slave_tty, timeout=0.1, read_mode='frame',
+                      framer=FixedLengthFramer(7, checksum='sum8'),
+                      decoder=StructDecoder(">Hf"))
+    records = [struct.pack(">BHf", 0, i, i / 4)[1:] for i in range(3)]
+    os.write(master_pty, b"".join(r + bytes([sum(r) & 0xFF]) for r in records))
+    assert [sr.read() for _ in range(3)] == [(i, i / 4) for i in range(3)]
+    assert sr.read() is None
+
+    sr.decoder = None
+    sr.encoding = None
+    sr.start_streaming()
+    os.write(master_pty, records[0] + bytes([sum(records[0]) & 0xFF]))
+    assert sr.read() == records[0]
+
+    sr.disconnect()
+    sr.read_mode = 'until'
+    sr.end_mark = b'\x00'
+    sr.connect()
+    os.write(master_pty, b"\x01\x02\x00")
+    assert sr.read() == b"\x01\x02\x00"
+    sr.disconnect()
+    os.close(master_pty)
+
+
+@pytest.mark.skipif(serial is None, reason="Cannot test without 'serial' module.")
+@pytest.mark.skipif(pty is None, reason="Cannot test without 'pty' module (available on " +
+                    "unix-like platforms).")
+def test_serialreader_shared_bus(fake_serial_ports):
+    """Tests many serialreaders polling devices on a shared port.
+    """
+    import threading
+    from .context import readersender   # noqa: F401
+    from readersender.readers import SerialReader, SerialBus
+
+    master_pty, slave_tty = fake_serial_ports
+    stop = threading.Event()
+
+    def devices():
+        # Answers 'ID?\n' with 'ID=value\n'
+        buffer = b""
+        while not stop.is_set():
+            buffer += os.read(master_pty, 1024)
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                os.write(master_pty, line.replace(b"?", b"=ok\n"))
+
+    responder = threading.Thread(target=devices, daemon=True)
+    responder.start()
+
+    readers = [SerialReader(port=slave_tty, timeout=1.0, read_command="{}?\n".format(i),
+                            bus=True) for i in range(3)]
+    bus = readers[0].bus
+    assert all(r.bus is bus for r in readers)
+    assert SerialBus.get(slave_tty) is bus
+    assert bus.clients == 3
+    assert all(r.connected for r in readers)
+
+    results = {}
+
+    def poll(i, reader):
+        results[i] = [reader.read() for _ in range(5)]
+
+    threads = [threading.Thread(target=poll, args=(i, r)) for i, r in enumerate(readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == {i: ["{}=ok\n".format(i)] * 5 for i in range(3)}
+    assert bus.transactions == 15
+
+    with pytest.raises(RuntimeError):
+        readers[0].start_streaming()
+    readers[0].disconnect()
+    assert not readers[0].connected
+    assert readers[1].read() == "1=ok\n"
+    for r in readers[1:]:
+        r.disconnect()
+    assert bus.serial is None
+
+    # A reader that reconnects reopens the bus, and new readers share it
+    readers[0].connect()
+    assert bus.serial is not None
+    reader = SerialReader(port=slave_tty, timeout=1.0, read_command="3?\n", bus=True)
+    assert reader.bus is bus
+    assert SerialBus.get(slave_tty) is bus
+    assert bus.clients == 2
+    assert reader.read() == "3=ok\n"
+    reader.disconnect()
+    readers[0].disconnect()
+    assert bus.serial is None
+    stop.set()
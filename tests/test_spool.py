@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_spool.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+
+
+def test_spool_recovery(tmpdir):
+    """Tests that unconsumed records survive reopening the spool.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.spool import Spool
+
+    spool = Spool(str(tmpdir), segment_bytes=100, write_batch=3)
+    assert spool.empty
+    for i in range(20):
+        assert spool.append(b"record%d" % i)
+    assert spool.peek(5) == [b"record%d" % i for i in range(5)]
+    spool.consume(5)
+    assert spool.consumed == 5
+    spool.close()
+
+    spool = Spool(str(tmpdir), segment_bytes=100)
+    assert not spool.empty
+    assert spool.peek(100) == [b"record%d" % i for i in range(5, 20)]
+    spool.consume(15)
+    assert spool.empty
+    assert spool.peek(10) == []
+    spool.close()
+    assert len(tmpdir.listdir(lambda p: p.ext == '.seg')) <= 1
+
+
+def test_spool_truncated(tmpdir):
+    """Tests that a partial record left by a crash is skipped and the spool drains.
+    """
+    from .context import readersender
+    from readersender.spool import Spool
+
+    spool = Spool(str(tmpdir), write_batch=1)
+    for i in range(3):
+        spool.append(b"record%d" % i)
+    spool.close()
+    segment = tmpdir.listdir(lambda p: p.ext == '.seg')[0]
+    with open(str(segment), 'r+b') as f:
+        f.truncate(segment.size() - 3)
+
+    spool = Spool(str(tmpdir))
+    assert spool.peek(10) == [b"record0", b"record1"]
+    spool.consume(2)
+    assert not spool.empty
+    assert spool.peek(10) == []
+    assert spool.empty
+    assert spool.corrupt_segments == 1
+    spool.close()
+    assert Spool(str(tmpdir)).empty
+
+    # A sender drains the spool and goes back to sending directly
+    with open(str(tmpdir.join("00000000000000000100.seg")), 'wb') as f:
+        f.write(b"\x00\x00\x00\x10\x00")
+    target = readersender.senders.FooSender()
+    calls = []
+    target.send_batch = calls.append
+    ss = readersender.senders.SpoolingSender(target, spool=str(tmpdir), retry_delay=0.05)
+    ss.connect()
+    time.sleep(0.2)
+    assert ss.spool.empty
+    assert calls == []
+    ss.send('direct')
+    assert ss.stats()['sent'] == 1
+    ss.disconnect()
+
+
+def test_spool_fsync_interval(tmpdir, monkeypatch):
+    """Tests that consuming records fsyncs the read position only by the fsync interval.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender import spool as spool_module
+
+    fsyncs = []
+    monkeypatch.setattr(spool_module.os, 'fsync', fsyncs.append)
+    spool = spool_module.Spool(str(tmpdir), write_batch=1, fsync_interval=1000)
+    for i in range(10):
+        spool.append(b"record")
+        spool.peek(1)
+        spool.consume(1)
+    assert fsyncs == []
+    spool.close()
+    assert fsyncs
+
+
+def test_spool_eviction(tmpdir):
+    """Tests size caps with both eviction policies.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.spool import Spool
+
+    spool = Spool(str(tmpdir.mkdir("oldest")), segment_bytes=100, max_bytes=300,
+                  write_batch=1, fsync='never')
+    for i in range(100):
+        spool.append(b"0123456789")
+    assert spool.total_bytes <= 300 + 100
+    assert spool.evicted_segments > 0
+
+    spool = Spool(str(tmpdir.mkdir("newest")), max_bytes=100, eviction='drop-newest')
+    results = [spool.append(b"0123456789") for i in range(10)]
+    assert results == [True] * 5 + [False] * 5
+    assert spool.dropped == 5
+
+
+def test_spoolingsender(tmpdir):
+    """Tests spooling data during an outage and replaying it afterwards.
+    """
+    from .context import readersender
+
+    class FlakySender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.data = []
+            self.up = False
+
+        def connect(self):
+            self._connected = self.up
+
+        def send(self, data):
+            if not self.up:
+                raise RuntimeError("Down.")
+            self.data.append(data)
+
+    flaky = FlakySender()
+    ss = readersender.senders.SpoolingSender(flaky, spool={'directory': str(tmpdir),
+                                                           'write_batch': 1},
+                                             retry_delay=0.01)
+    ss.connect()
+    assert ss.connected and not flaky.connected
+    for i in range(10):
+        ss.send({'i': i})
+    assert ss.spooled == 10
+    assert flaky.data == []
+
+    flaky.up = True
+    for _ in range(100):
+        if ss.spool.empty:
+            break
+        time.sleep(0.01)
+    ss.send({'i': 10})
+    assert flaky.data == [{'i': i} for i in range(11)]
+    assert ss.stats()['replayed'] == 10
+    ss.disconnect()
+    assert not flaky.connected
+
+
+def test_spoolingsender_kwargs(tmpdir):
+    """Tests that spooled data is replayed with the arguments it was sent with.
+    """
+    from .context import readersender
+
+    class TopicSender(readersender.Sender):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.batches = []
+            self.up = False
+
+        def connect(self):
+            self._connected = self.up
+
+        def send(self, data, topic_args=None, qos=0):
+            self.send_batch([data], topic_args, qos)
+
+        def send_batch(self, batch, topic_args=None, qos=0):
+            if not self.up:
+                raise RuntimeError("Down.")
+            self.batches.append(("sensors/{id}".format(**topic_args), qos, batch))
+
+    target = TopicSender()
+    ss = readersender.senders.SpoolingSender(target, spool={'directory': str(tmpdir),
+                                                            'write_batch': 1},
+                                             retry_delay=0.01)
+    ss.connect()
+    ss.send(1, topic_args={'id': 'a'})
+    ss.send(2, topic_args={'id': 'a'})
+    ss.send(3, topic_args={'id': 'b'}, qos=1)
+    ss.send(4, topic_args={'id': 'a'})
+    target.up = True
+    for _ in range(100):
+        if ss.spool.empty:
+            break
+        time.sleep(0.01)
+    ss.disconnect()
+    assert target.batches == [("sensors/a", 0, [1, 2]), ("sensors/b", 1, [3]),
+                              ("sensors/a", 0, [4])]
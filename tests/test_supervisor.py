@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_supervisor.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import asyncio
+import json
+
+
+def test_restart_policy():
+    """Tests the restart policy delays and limits.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.tools.supervisor import RestartPolicy
+
+    policy = RestartPolicy(restart_delay=1, max_restarts=3, backoff=2, max_restart_delay=3)
+    assert [policy.next_delay() for _ in range(4)] == [1.0, 2.0, 3.0, None]
+    policy.reset()
+    assert policy.next_delay() == 1.0
+
+    policy = RestartPolicy(restart_delay=0, max_restarts=None)
+    assert all(policy.next_delay() == 0 for _ in range(100))
+
+
+def test_supervisor_isolation(tmpdir):
+    """Tests that a failing pipeline does not stop the others.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.tools.supervisor import load_config, create_pipelines, supervise
+
+    config_file = tmpdir.join("pipelines.json")
+    config_file.write(json.dumps({
+        'defaults': {'interval': 0.01, 'restart_policy': {'restart_delay': 0}},
+        'pipelines': [
+            {'name': 'good', 'reader': 'random', 'sender': 'foo'},
+            {'name': 'bad', 'reader': 'nonexistent', 'sender': 'foo',
+             'restart_policy': {'restart_delay': 0, 'max_restarts': 2}},
+        ]
+    }))
+    pipelines = create_pipelines(load_config(str(config_file)))
+    good, bad = pipelines
+    assert good.interval == 0.01
+
+    async def run():
+        task = asyncio.ensure_future(supervise(pipelines))
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(run())
+    assert bad.restart_policy.restarts == 2
+    assert good.restart_policy.restarts == 0
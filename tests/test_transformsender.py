@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_transformsender.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import random
+
+
+def checksum(data):
+    """A transform that runs in a worker process.
+    """
+    if isinstance(data, bytes):
+        return sum(data) & 0xFFFF
+    return None if data % 5 == 0 else data * 2
+
+
+def slow_double(data):
+    time.sleep(random.random() * 0.01)
+    return data * 2
+
+
+def test_transformsender_process():
+    """Tests transforming data in worker processes, including shared memory payloads.
+    """
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import TransformSender
+
+    target = collecting_sender()
+    ts = TransformSender(target, checksum, executor='process', max_workers=2, batch_size=4,
+                         shared_memory_threshold=1024)
+    ts.connect()
+    for i in range(1, 11):
+        ts.send(i)
+    payload = bytes(range(256)) * 16
+    ts.send(payload)
+    ts.disconnect()
+    assert target.data == [2, 4, 6, 8, 12, 14, 16, 18, sum(payload) & 0xFFFF]
+    assert ts.stats() == {'submitted': 11, 'sent': 9, 'dropped': 2, 'errors': 0}
+    assert not target.connected
+
+
+def test_transformsender_thread():
+    """Tests unordered and lingering tasks in worker threads.
+    """
+    from .context import readersender, collecting_sender   # noqa: F401
+    from readersender.senders import TransformSender
+
+    target = collecting_sender()
+    ts = TransformSender(target, slow_double, executor='thread', max_workers=4,
+                         ordered=False, max_pending=2)
+    ts.connect()
+    for i in range(50):
+        ts.send(i)
+    ts.disconnect()
+    assert sorted(target.data) == [2 * i for i in range(50)]
+
+    target = collecting_sender()
+    ts = TransformSender(target, slow_double, executor='thread', batch_size=100, linger=0.05)
+    ts.connect()
+    ts.send(1)
+    time.sleep(0.3)
+    assert target.data == [2]
+    ts.disconnect()
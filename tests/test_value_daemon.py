@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Unit tests using the pytest framework.
+
+@file           test_value_daemon.py
+@author:        Juuso Korhonen (juusokorhonen on github.com)
+@license:       MIT License
+"""
+import time
+import socket
+import threading
+import pytest
+
+
+def test_value_cache():
+    """Tests the expiry of cached values.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.tools.value_daemon import ValueCache
+
+    now = [0.0]
+    cache = ValueCache(ttl=1.0, clock=lambda: now[0])
+    assert cache.get('a') is None
+    cache.put('a', 1)
+    now[0] = 0.5
+    assert cache.get('a') == (1, 0.5)
+    assert cache.get('a', max_age=0.2) is None
+    assert cache.get('a', max_age=5) == (1, 0.5)
+    now[0] = 1.5
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+    # Concurrent requests for an expired value all miss
+    def clock():
+        time.sleep(0.001)
+        return now[0]
+
+    cache = ValueCache(ttl=1.0, clock=clock)
+    cache.put('a', 1)
+    now[0] = 5.0
+    errors = []
+
+    def get():
+        try:
+            assert cache.get('a') is None
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert (cache.hits, cache.misses) == (0, 8)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Needs UNIX domain sockets")
+def test_value_daemon(tmp_path):
+    """Tests serving cached values over a UNIX socket.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.tools.value_daemon import ValueDaemon, request_value
+
+    path = str(tmp_path / "daemon.sock")
+    with pytest.raises(OSError):
+        request_value('random', socket_path=path)
+
+    daemon = ValueDaemon(path, ttl=60).start()
+    try:
+        with pytest.raises(RuntimeError):
+            ValueDaemon(path).start()
+
+        args = {'init': {'seed': 1}}
+        first = request_value('random', args, socket_path=path)
+        assert request_value('random', args, socket_path=path) == first
+        assert request_value('random', args, socket_path=path, max_age=0) != first
+        assert daemon.stats()['reads'] == 2
+        assert daemon.stats()['readers'] == 1
+
+        # Concurrent requests share a read
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            request_value('random', {'init': {'seed': 2}}, socket_path=path)))
+            for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 5 and all(r == results[0] for r in results)
+        assert daemon.stats()['reads'] == 3
+
+        with pytest.raises(RuntimeError):
+            request_value('nothing', socket_path=path)
+    finally:
+        daemon.shutdown()
+
+    # A stale socket is replaced
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.bind(path)
+    daemon = ValueDaemon(path).start()
+    daemon.shutdown()
+
+
+def test_value_daemon_reader_lock():
+    """Tests that reads of one reader with different arguments do not overlap.
+    """
+    from .context import readersender   # noqa: F401
+    from readersender.tools.value_daemon import ValueDaemon
+
+    daemon = ValueDaemon(ttl=60)
+    connection, _ = daemon._connection(('random', '{}'), 'random', {})
+    active = []
+    overlaps = []
+
+    def read(command=None):
+        active.append(command)
+        if len(active) > 1:
+            overlaps.append(list(active))
+        time.sleep(0.02)
+        active.remove(command)
+        return command
+
+    connection.readersender.read = read
+    threads = [threading.Thread(target=daemon.read,
+                                args=('random', {'read': {'command': str(i)}}))
+               for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert daemon.reads == 5
+    assert overlaps == []
+    daemon.shutdown()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Needs UNIX domain sockets")
+def test_value_daemon_socket_security(tmp_path, monkeypatch):
+    """Tests the location and permissions of the socket, and trusting only own sockets.
+    """
+    import os
+    import stat
+    from .context import readersender   # noqa: F401
+    from readersender.tools import value_daemon
+    from readersender.tools.value_daemon import ValueDaemon, request_value
+
+    monkeypatch.delenv('READERSENDER_SOCKET', raising=False)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    assert value_daemon.default_socket_path() == str(tmp_path / "readersender.sock")
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    monkeypatch.setattr(value_daemon.tempfile, 'gettempdir', lambda: str(tmp_path))
+    path = value_daemon.default_socket_path()
+    assert os.path.dirname(path) == str(tmp_path / "readersender-{}".format(os.getuid()))
+
+    daemon = ValueDaemon().start()
+    try:
+        assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert request_value('random') is not None
+    finally:
+        daemon.shutdown()
+
+    # A daemon that does not answer is an error, not a missing daemon
+    silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    silent.bind(path)
+    silent.listen(1)
+    try:
+        with pytest.raises(RuntimeError):
+            request_value('random', timeout=0.1)
+        if os.getuid() == 0:
+            os.chown(path, 65534, 65534)
+            with pytest.raises(PermissionError):
+                request_value('random', timeout=0.1)
+    finally:
+        silent.close()